@@ -0,0 +1,458 @@
+import argparse
+import contextlib
+import gc
+import glob
+import io
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+
+from website_testcase_generator import (
+    ScreenshotFrame, VisualAnalysisQueue, VisualResultCache, compare_screenshots, extract_elements,
+    extract_elements_from_jsx, jsx_tag_scanner, load_vision_model, website_intelligence, write_to_excel,
+    VISION_CONF_THRESHOLD, VISION_IOU_THRESHOLD,
+    _detections_to_numpy, BeautifulSoup, cv2, np,
+)
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fragments typical of a production bundle: minified code, strings and regexes full of
+# markup-like characters, plus the occasional JSX left in by a dev build
+BUNDLE_FRAGMENTS = [
+    'function n(e,t){return e<t?-1:e>t?1:0}',
+    'var r=/<\\/?[a-z][^>]*>/gi,o="<div class=\\"x\\">",a=\'<a href="#">\';',
+    'e.exports=function(e){for(var t=0;t<e.length;t++)if(e[t]<<1>8)return t;return-1};',
+    'const u=`<p>${i.name}</p>`,c={a:1,b:[2,3],d:{e:"}"}};',
+    '/* <button>commented</button> */',
+    'function l(){return <form onSubmit={s}><input name="q" type="search"/><button type="submit">Go</button></form>}',
+    'const m=({items:e})=>(<ul>{e.map(t=><li key={t.id}><a href={t.url}>{t.title}</a></li>)}</ul>);',
+    'if(x<y&&y>z){w=x/y/z}',
+    'var p="</a></button>",q=\'<a \';',
+]
+
+# Markup that is opened but never closed, where non-greedy DOTALL regexes scan to end of file
+UNCLOSED_FRAGMENTS = [
+    'var a=\'<a class="x">\',b="<button>";',
+    'function f(e){return e<n?e:n}',
+    'c.innerHTML="<a href=\\"#\\">"+d;',
+]
+
+def generate_minified_bundle(size_bytes, seed=0, fragments=BUNDLE_FRAGMENTS):
+    """Deterministic pseudo-minified JS bundle of roughly size_bytes"""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        fragment = rng.choice(fragments)
+        parts.append(fragment)
+        total += len(fragment)
+    return ''.join(parts)
+
+def legacy_extract_elements_from_jsx(js_content):
+    """The previous three-pass regex implementation, kept for comparison"""
+    forms = list(re.finditer(r'<form[^>]*>', js_content, re.IGNORECASE))
+    buttons = list(re.finditer(r'<button[^>]*>(.*?)</button>', js_content, re.IGNORECASE | re.DOTALL))
+    links = list(re.finditer(r'<a[^>]*>(.*?)</a>', js_content, re.IGNORECASE | re.DOTALL))
+    return len(forms) + len(buttons) + len(links)
+
+def time_call(func, *args, repeat=3, disable_gc=False):
+    """Best wall-clock time of several runs, in seconds (optionally with the collector paused, for steadier numbers)"""
+    best = None
+    for _ in range(repeat):
+        if disable_gc:
+            gc.collect()
+            gc.disable()
+        try:
+            start = time.perf_counter()
+            func(*args)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_jsx_scanner(sizes_mb, repeat=3, legacy_max_mb=8):
+    """Time the single-pass JSX scanner on minified bundles of the given sizes"""
+    for title, fragments, legacy_limit in (('Mixed bundle', BUNDLE_FRAGMENTS, legacy_max_mb),
+                                           ('Unclosed markup', UNCLOSED_FRAGMENTS, min(legacy_max_mb, 0.25))):
+        print(title)
+        print(f"{'Size':>8} {'Scanner (s)':>12} {'MB/s':>8} {'Elements':>9} {'Legacy (s)':>11}")
+        for size_mb in sizes_mb:
+            bundle = generate_minified_bundle(int(size_mb * 1024 * 1024), fragments=fragments)
+            elements = len(jsx_tag_scanner.scan(bundle))
+            scanner_time = time_call(extract_elements_from_jsx, bundle, 'bundle.js', repeat=repeat)
+            if size_mb <= legacy_limit:
+                legacy_text = f"{time_call(legacy_extract_elements_from_jsx, bundle, repeat=1):11.3f}"
+            else:
+                legacy_text = f"{'skipped':>11}"
+            print(f"{size_mb:>6}MB {scanner_time:12.3f} {size_mb / scanner_time:8.2f} {elements:9d} {legacy_text}")
+
+def load_bundled_screenshots():
+    """The screenshot_*.png files shipped with the repository, as frames"""
+    paths = sorted(glob.glob(os.path.join(REPO_DIR, 'screenshot_*.png')))
+    return [ScreenshotFrame.from_file(path) for path in paths]
+
+def make_tall_frame(frames, stack):
+    """Stack several screenshots vertically to imitate a long scrolling page"""
+    images = [frames[i % len(frames)].image for i in range(stack)]
+    ok, encoded = cv2.imencode('.png', np.vstack(images))
+    return ScreenshotFrame(encoded.tobytes())
+
+def bench_visual_queue(batch_sizes, tall_stack=6, repeat=1, cache_dir=None):
+    """Pages per minute of tiled, batched visual analysis on CPU (optionally through the tile cache)"""
+    if not website_intelligence.visual_analysis_enabled:
+        print("Computer vision is not available (ultralytics/opencv not installed); skipping.")
+        return
+    frames = load_bundled_screenshots()
+    tall_frames = [make_tall_frame(frames[i:] + frames[:i], tall_stack) for i in range(3)]
+    cache = VisualResultCache(cache_dir) if cache_dir else None
+    print(f"{'Pages':<22} {'Batch':>6} {'Tiles':>6} {'Cached':>7} {'Seconds':>8} {'Pages/min':>10}")
+    for title, page_frames in (('Bundled screenshots', frames), (f'Tall pages (x{tall_stack})', tall_frames)):
+        for batch_size in batch_sizes:
+            queue = VisualAnalysisQueue(website_intelligence, batch_size=batch_size, cache=cache)
+            for _ in range(repeat):
+                # Fresh frames so every run pays for PNG decoding too
+                for i, frame in enumerate(page_frames):
+                    queue.add(i, ScreenshotFrame(frame.png_bytes))
+                queue.flush()
+            print(f"{title:<22} {batch_size:>6} {queue.stats['tiles']:>6} {queue.stats['cached_tiles']:>7} "
+                  f"{queue.stats['seconds']:8.2f} {queue.pages_per_minute():10.1f}")
+
+def encode_frame(image):
+    """PNG-encode an image into a fresh frame"""
+    ok, encoded = cv2.imencode('.png', image)
+    return ScreenshotFrame(encoded.tobytes())
+
+def bench_visual_regression(heights, repeat=3):
+    """Time tile-based baseline comparison of tall pages for typical kinds of change"""
+    frames = load_bundled_screenshots()
+    print(f"{'Height':>7} {'Change':<18} {'Regions':>8} {'Equal tiles':>11} {'ms':>8}")
+    for height in heights:
+        stack = -(-height // frames[0].image.shape[0])
+        page = np.vstack([frames[i % len(frames)].image for i in range(stack)])[:height]
+        small_change = page.copy()
+        small_change[height // 3:height // 3 + 40, 100:300] = 0
+        shifted = np.roll(page, 8, axis=0)
+        cases = (('same capture', page), ('small change', small_change), ('content shifted', shifted))
+        baseline = encode_frame(page)
+        for title, image in cases:
+            best = None
+            for _ in range(repeat):
+                # Decode outside the timing, as the capture and baseline are decoded anyway
+                current = encode_frame(image)
+                baseline._image, current._image = page, image
+                result = compare_screenshots(baseline, current)
+                best = result['seconds'] if best is None else min(best, result['seconds'])
+            print(f"{height:>7} {title:<18} {len(result['regions']):>8} "
+                  f"{result['tiles_equal']:>5}/{result['tiles']:<5} {best * 1000:8.1f}")
+
+def parse_vision_config(text):
+    """'onnx:480:int8' -> ('onnx', 480, True); the size defaults to 640"""
+    parts = text.split(':')
+    imgsz = int(parts[1]) if len(parts) > 1 and parts[1] else 640
+    return parts[0], imgsz, 'int8' in parts[2:]
+
+def box_iou(box, boxes):
+    """IoU of one xyxy box against an array of boxes"""
+    inter_w = np.maximum(np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0]), 0)
+    inter_h = np.maximum(np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1]), 0)
+    inter = inter_w * inter_h
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum((box[2] - box[0]) * (box[3] - box[1]) + areas - inter, 1e-9)
+
+def count_matches(reference, candidate, iou_threshold=0.5):
+    """Candidate detections matching an unused reference detection of the same class, best confidence first"""
+    ref_boxes, _, ref_classes = reference
+    boxes, confidences, classes = candidate
+    used = np.zeros(len(ref_boxes), dtype=bool)
+    matches = 0
+    for i in np.argsort(-confidences):
+        candidates = (~used) & (ref_classes == classes[i])
+        if not candidates.any():
+            continue
+        ious = np.where(candidates, box_iou(boxes[i], ref_boxes), 0)
+        best = int(ious.argmax())
+        if ious[best] >= iou_threshold:
+            used[best] = True
+            matches += 1
+    return matches
+
+def bench_vision_backends(configs, threads=None, repeat=3):
+    """Latency per screenshot and agreement with the first configuration (the reference) for each backend"""
+    images = [frame.image for frame in load_bundled_screenshots()]
+    reference = None
+    print(f"{'Config':<20} {'ms/image':>9} {'Detections':>11} {'Precision':>10} {'Recall':>7}")
+    for config in configs:
+        backend, imgsz, int8 = parse_vision_config(config)
+        try:
+            model = load_vision_model(backend, imgsz, threads, int8)
+        except Exception as e:
+            print(f"{config:<20} unavailable: {e}")
+            continue
+        model(images[:1], verbose=False, imgsz=imgsz, conf=VISION_CONF_THRESHOLD, iou=VISION_IOU_THRESHOLD)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = model(images, verbose=False, imgsz=imgsz, conf=VISION_CONF_THRESHOLD, iou=VISION_IOU_THRESHOLD)
+            elapsed = (time.perf_counter() - start) / len(images)
+            best = elapsed if best is None else min(best, elapsed)
+        detections = [(_detections_to_numpy(r.boxes.xyxy).astype(float), _detections_to_numpy(r.boxes.conf).astype(float),
+                       _detections_to_numpy(r.boxes.cls).astype(int)) for r in results]
+        if reference is None:
+            reference = detections
+        total = sum(len(d[0]) for d in detections)
+        expected = sum(len(d[0]) for d in reference)
+        matched = sum(count_matches(ref, det) for ref, det in zip(reference, detections))
+        precision = matched / total if total else 1.0
+        recall = matched / expected if expected else 1.0
+        print(f"{config:<20} {best * 1000:9.1f} {total:11d} {precision:10.2f} {recall:7.2f}")
+
+def make_dashboard_page(sections):
+    """A dashboard-like page built from the bundled broken site, repeated to the given number of sections"""
+    with open(os.path.join(REPO_DIR, 'broken_site', 'index.html'), encoding='utf-8') as f:
+        body = re.search(r'<body[^>]*>(.*)</body>', f.read(), re.S | re.I).group(1)
+    card = ('<div class="card product-card"><img src="p.png"><a href="/item/{0}">Product item {0}</a>'
+            '<button class="btn btn-primary">Add to cart</button></div>')
+    parts = [f'<section class="content">{body}{card.format(i)}</section>' for i in range(sections)]
+    return f"<html><head><title>Dashboard</title></head><body>{''.join(parts)}</body></html>"
+
+def bench_live_structure(section_counts, repeat=3):
+    """page.content() + BeautifulSoup + analysis against the single in-page extraction script"""
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        print("Playwright is not installed; skipping.")
+        return
+    print(f"{'Sections':>9} {'HTML KB':>8} {'Serialize+parse (ms)':>21} {'Live script (ms)':>17} {'Same analysis':>14}")
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            page = browser.new_page()
+            for sections in section_counts:
+                html = make_dashboard_page(sections)
+                page.set_content(html)
+                url = 'http://localhost/dashboard'
+                serialized = lambda: website_intelligence.analyze_website_structure(
+                    BeautifulSoup(page.content(), 'html.parser'), url)
+                live = lambda: website_intelligence.analyze_live_structure(page, url)
+                same = serialized() == live()
+                print(f"{sections:>9} {len(html) / 1024:8.0f} {time_call(serialized, repeat=repeat) * 1000:21.1f} "
+                      f"{time_call(live, repeat=repeat) * 1000:17.1f} {str(same):>14}")
+        finally:
+            browser.close()
+
+# Page shapes for the synthetic-site suite, smallest to largest
+SYNTHETIC_SIZES = {
+    'small': {'forms': 2, 'fields': 4, 'links': 20, 'depth': 3, 'cards': 10, 'tables': 2},
+    'medium': {'forms': 8, 'fields': 8, 'links': 150, 'depth': 6, 'cards': 60, 'tables': 8},
+    'large': {'forms': 25, 'fields': 12, 'links': 600, 'depth': 10, 'cards': 250, 'tables': 25},
+}
+SYNTHETIC_FIELDS = [('text', 'first_name'), ('text', 'last_name'), ('email', 'email'), ('password', 'password'),
+                    ('tel', 'phone'), ('number', 'quantity'), ('date', 'birth_date'), ('search', 'q'),
+                    ('url', 'website'), ('text', 'card_number')]
+SYNTHETIC_FORMS = ['login', 'register', 'contact', 'search', 'checkout', 'newsletter']
+SYNTHETIC_WORDS = ['home', 'about', 'products', 'services', 'blog', 'contact', 'help', 'support', 'login',
+                   'signup', 'cart', 'account', 'profile', 'settings', 'privacy', 'terms', 'news', 'course']
+DEFAULT_SUITE_BASELINE = os.path.join(REPO_DIR, 'benchmark_baseline.json')
+
+def generate_synthetic_site(forms, fields, links, depth, cards, tables, seed=0):
+    """Deterministic HTML page with the given forms, fields per form, links, nesting depth, cards and tables"""
+    rng = random.Random(seed)
+    words = lambda count: ' '.join(rng.choice(SYNTHETIC_WORDS) for _ in range(count))
+    nav_count = min(links, 12)
+    nav = ''.join(f'<li><a href="/{rng.choice(SYNTHETIC_WORDS)}/{i}">{words(2).title()}</a></li>'
+                  for i in range(nav_count))
+    parts = [f'<header><nav class="navbar main-menu"><ul>{nav}</ul></nav></header>']
+    for i in range(forms):
+        purpose = SYNTHETIC_FORMS[i % len(SYNTHETIC_FORMS)]
+        inputs = []
+        for j in range(fields):
+            input_type, name = SYNTHETIC_FIELDS[(i + j) % len(SYNTHETIC_FIELDS)]
+            required = ' required' if rng.random() < 0.5 else ''
+            inputs.append(f'<label for="{purpose}_{name}_{i}_{j}">{name.replace("_", " ").title()}</label>'
+                          f'<input type="{input_type}" name="{name}" id="{purpose}_{name}_{i}_{j}"'
+                          f' placeholder="Enter {name.replace("_", " ")}"{required}>')
+        if i % 3 == 0:
+            inputs.append('<select name="country"><option value="us">US</option><option value="uk">UK</option></select>')
+        if i % 4 == 1:
+            inputs.append('<textarea name="message"></textarea>')
+        parts.append(f'<form id="{purpose}-form-{i}" class="{purpose}-form" action="/{purpose}" method="post">'
+                     f'<h2>{purpose.title()}</h2>{"".join(inputs)}<button type="submit">{purpose.title()}</button></form>')
+    card_html = ''.join(f'<div class="card product-card"><img src="/img/{i}.png" alt="item {i}"><h3>Product item {i}</h3>'
+                        f'<p>{words(8)}</p><a href="/item/{i}">View</a><button class="btn btn-primary">Add to cart</button></div>'
+                        for i in range(cards))
+    parts.append(f'<section class="content products">{card_html}</section>')
+    for t in range(tables):
+        rows = ''.join(f'<tr><td>{words(1)}</td><td>{rng.randint(1, 999)}</td><td><a href="/row/{t}/{r}">Edit</a></td></tr>'
+                       for r in range(10))
+        parts.append(f'<table class="data-table"><tr><th>Name</th><th>Value</th><th>Action</th></tr>{rows}</table>')
+    # Remaining links go in a footer of nested lists as deep as the page is
+    footer_links = [f'<a href="/{rng.choice(SYNTHETIC_WORDS)}/page-{i}">{words(2).title()}</a>'
+                    for i in range(links - nav_count)]
+    per_level = max(1, len(footer_links) // max(1, depth))
+    footer = ''
+    for level in reversed(range(depth)):
+        chunk = footer_links[level * per_level:(level + 1) * per_level if level < depth - 1 else None]
+        footer = f'<ul class="footer-menu">{"".join(f"<li>{link}</li>" for link in chunk)}<li>{footer}</li></ul>'
+    parts.append(f'<footer><nav>{footer}</nav></footer>')
+    # Main content sits inside depth levels of wrappers
+    body = ''.join(parts)
+    for level in range(depth):
+        body = f'<div class="container level-{level}">{body}</div>'
+    return f'<html><head><title>Synthetic shop</title></head><body>{body}</body></html>'
+
+def synthetic_jsx(html):
+    """The synthetic page's body as the JSX of a React component"""
+    body = re.search(r'<body>(.*)</body>', html, re.S).group(1).replace(' class="', ' className="')
+    return f'export default function Page() {{\n  return (\n    {body}\n  );\n}}\n'
+
+@contextlib.contextmanager
+def offline_analysis():
+    """Run the analysis engine with network, browser and visual stages stubbed out, restoring them afterwards"""
+    import website_testcase_generator as generator
+    def no_network(*args, **kwargs):
+        raise RuntimeError('network access is disabled in benchmarks')
+    settings = ('visual_mode', 'baseline', 'auth_sessions', 'visual_cache')
+    saved = {name: getattr(website_intelligence, name) for name in settings}
+    saved_get, saved_playwright = generator.requests.get, getattr(generator, 'sync_playwright', None)
+    website_intelligence.visual_mode = 'off'
+    website_intelligence.baseline = None
+    website_intelligence.auth_sessions = None
+    website_intelligence.visual_cache = None
+    generator.requests.get = no_network
+    generator.sync_playwright = no_network
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(website_intelligence, name, value)
+        generator.requests.get = saved_get
+        if saved_playwright is None:
+            del generator.sync_playwright
+        else:
+            generator.sync_playwright = saved_playwright
+
+def suite_operations(html, url, workbook_path):
+    """(name, callable) for every timed stage, each working on the same synthetic page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    analysis = website_intelligence.analyze_website_structure(soup, url)
+    test_cases = extract_elements(soup, url)
+    jsx = synthetic_jsx(html)
+    return [
+        ('analyze_website_structure', lambda: website_intelligence.analyze_website_structure(soup, url)),
+        ('generate_intelligent_test_cases', lambda: website_intelligence.generate_intelligent_test_cases(analysis, url)),
+        ('extract_elements', lambda: extract_elements(soup, url)),
+        ('extract_elements_from_jsx', lambda: extract_elements_from_jsx(jsx, url)),
+        ('write_to_excel', lambda: write_to_excel(test_cases, workbook_path)),
+    ]
+
+def run_benchmark_suite(sizes, repeat=5):
+    """Best time in seconds of each stage at each size, keyed 'size/stage'"""
+    import tempfile
+    results = {}
+    with offline_analysis(), tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            html = generate_synthetic_site(**SYNTHETIC_SIZES[size])
+            url = f'http://synthetic.test/{size}'
+            # The stages print progress; keep the timing table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                operations = suite_operations(html, url, os.path.join(tmp, f'{size}.xlsx'))
+                for name, operation in operations:
+                    results[f'{size}/{name}'] = time_call(operation, repeat=repeat, disable_gc=True)
+    return results
+
+def bench_suite(sizes, repeat=5, baseline_path=DEFAULT_SUITE_BASELINE, threshold=0.25, min_delta=0.02,
+                update_baseline=False):
+    """Time the analysis engine on synthetic sites and compare with stored baselines; returns the regressions"""
+    results = run_benchmark_suite(sizes, repeat=repeat)
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+    regressions = []
+    print(f"{'Stage':<42} {'Time (ms)':>10} {'Baseline':>10} {'Ratio':>7}  Status")
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<42} {seconds * 1000:10.1f} {'-':>10} {'-':>7}  new")
+            continue
+        ratio = seconds / base if base else float('inf')
+        # Tiny stages are noisy; they only regress by more than min_delta seconds as well as the ratio
+        regressed = ratio > 1 + threshold and seconds - base > min_delta
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<42} {seconds * 1000:10.1f} {base * 1000:10.1f} {ratio:7.2f}  {'REGRESSION' if regressed else 'ok'}")
+    if update_baseline:
+        baseline.update(results)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': baseline},
+                      f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {baseline_path}")
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than baseline by more than {threshold:.0%}")
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Website Test Case Generator benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    jsx_parser = subparsers.add_parser('jsx', help='JSX scanner on minified bundles')
+    jsx_parser.add_argument('--sizes', type=float, nargs='+', default=[0.25, 1, 4, 8], help='Bundle sizes in MB')
+    jsx_parser.add_argument('--repeat', type=int, default=3)
+    jsx_parser.add_argument('--legacy-max-mb', type=float, default=8,
+                            help='Largest bundle to run the old regex implementation on (unclosed markup is capped at 0.25)')
+    visual_parser = subparsers.add_parser('visual', help='Tiled, batched visual analysis throughput')
+    visual_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8])
+    visual_parser.add_argument('--tall-stack', type=int, default=6, help='Screenshots stacked into each tall page')
+    visual_parser.add_argument('--repeat', type=int, default=1)
+    visual_parser.add_argument('--cache-dir', default=None,
+                               help='Run through a visual result cache in this directory (repeats become cache hits)')
+    regression_parser = subparsers.add_parser('regression', help='Tile-based visual regression against a baseline')
+    regression_parser.add_argument('--heights', type=int, nargs='+', default=[720, 4000, 12000], help='Page heights in px')
+    regression_parser.add_argument('--repeat', type=int, default=3)
+    vision_parser = subparsers.add_parser('vision', help='Vision backend latency and accuracy on the bundled screenshots')
+    vision_parser.add_argument('--configs', nargs='+',
+                               default=['torch:640', 'onnx:640', 'onnx:480', 'onnx:320', 'onnx:640:int8',
+                                        'openvino:640', 'openvino:480', 'openvino:640:int8'],
+                               help='backend:imgsz[:int8]; accuracy is measured against the first one')
+    vision_parser.add_argument('--threads', type=int, default=None)
+    vision_parser.add_argument('--repeat', type=int, default=3)
+    live_parser = subparsers.add_parser('live', help='Live DOM extraction against page.content() and re-parsing')
+    live_parser.add_argument('--sections', type=int, nargs='+', default=[1, 10, 50])
+    live_parser.add_argument('--repeat', type=int, default=3)
+    suite_parser = subparsers.add_parser('suite', help='Analysis engine on synthetic sites, checked against baselines')
+    suite_parser.add_argument('--sizes', nargs='+', choices=list(SYNTHETIC_SIZES), default=list(SYNTHETIC_SIZES))
+    suite_parser.add_argument('--repeat', type=int, default=5)
+    suite_parser.add_argument('--baseline', default=DEFAULT_SUITE_BASELINE,
+                              help='Baseline timings JSON; baselines are per machine, record one with --update-baseline')
+    suite_parser.add_argument('--threshold', type=float, default=0.25,
+                              help='Allowed slowdown against the baseline as a fraction (0.25 = 25%%)')
+    suite_parser.add_argument('--min-delta', type=float, default=0.02, metavar='SECONDS',
+                              help='Slowdowns smaller than this are never regressions')
+    suite_parser.add_argument('--update-baseline', action='store_true', help='Store these timings as the baseline')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.benchmark == 'jsx':
+        bench_jsx_scanner(args.sizes, repeat=args.repeat, legacy_max_mb=args.legacy_max_mb)
+    elif args.benchmark == 'visual':
+        bench_visual_queue(args.batch_sizes, tall_stack=args.tall_stack, repeat=args.repeat, cache_dir=args.cache_dir)
+    elif args.benchmark == 'regression':
+        bench_visual_regression(args.heights, repeat=args.repeat)
+    elif args.benchmark == 'vision':
+        bench_vision_backends(args.configs, threads=args.threads, repeat=args.repeat)
+    elif args.benchmark == 'live':
+        bench_live_structure(args.sections, repeat=args.repeat)
+    elif args.benchmark == 'suite':
+        regressions = bench_suite(args.sizes, repeat=args.repeat, baseline_path=args.baseline, threshold=args.threshold,
+                                  min_delta=args.min_delta, update_baseline=args.update_baseline)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import http.client
+import json
+import socket
+import sys
+import time
+
+# Standard library only, so CI jobs can run it without the generator's dependencies installed
+
+DEFAULT_SERVER = '127.0.0.1:8765'
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket"""
+
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+def connect(server, timeout=30):
+    """Connection to a server given as HOST:PORT, http://HOST:PORT or unix:/path/to/socket"""
+    if server.startswith('unix:'):
+        return UnixHTTPConnection(server[len('unix:'):], timeout=timeout)
+    host, _, port = server.split('://', 1)[-1].rstrip('/').rpartition(':')
+    return http.client.HTTPConnection(host or '127.0.0.1', int(port), timeout=timeout)
+
+def request(server, method, path, body=None):
+    """(status, response body) for one request"""
+    conn = connect(server)
+    try:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+def submit_job(server, url, username=None, password=None, output_format='xlsx'):
+    """Queue a job and return its status dict"""
+    spec = {'url': url, 'format': output_format}
+    if username:
+        spec['username'] = username
+    if password:
+        spec['password'] = password
+    status, body = request(server, 'POST', '/jobs', spec)
+    if status != 202:
+        raise RuntimeError(json.loads(body).get('error', f'HTTP {status}'))
+    return json.loads(body)
+
+def wait_for_job(server, job_id, timeout=None, poll=0.5):
+    """Poll until the job is done or failed and return its final status dict"""
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        status, body = request(server, 'GET', f'/jobs/{job_id}')
+        if status != 200:
+            raise RuntimeError(json.loads(body).get('error', f'HTTP {status}'))
+        job = json.loads(body)
+        if job['status'] in ('done', 'failed'):
+            return job
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f'Job {job_id} still {job["status"]} after {timeout}s')
+        time.sleep(poll)
+        poll = min(poll * 1.5, 5)
+
+def fetch_result(server, job_id):
+    status, body = request(server, 'GET', f'/jobs/{job_id}/result')
+    if status != 200:
+        raise RuntimeError(json.loads(body).get('error') or json.loads(body).get('status', f'HTTP {status}'))
+    return body
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Submit a website to a running test case generator daemon')
+    parser.add_argument('url', help='Website URL')
+    parser.add_argument('--username', help='Username for login forms', default=None)
+    parser.add_argument('--password', help='Password for login forms', default=None)
+    parser.add_argument('--format', choices=['xlsx', 'json'], default='xlsx', help='Result format')
+    parser.add_argument('--output', default=None, help='Where to save the result (default: test_cases.<format>)')
+    parser.add_argument('--server', default=DEFAULT_SERVER,
+                        help=f'Daemon address, HOST:PORT or unix:/path/to/socket (default: {DEFAULT_SERVER})')
+    parser.add_argument('--timeout', type=float, default=None, help='Seconds to wait for the job (default: no limit)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    output = args.output or f'test_cases.{args.format}'
+    try:
+        job = submit_job(args.server, args.url, args.username, args.password, args.format)
+        job = wait_for_job(args.server, job['id'], timeout=args.timeout)
+        if job['status'] == 'failed':
+            print(f"Job failed: {job['error']}")
+            sys.exit(1)
+        with open(output, 'wb') as f:
+            f.write(fetch_result(args.server, job['id']))
+    except (OSError, RuntimeError) as e:
+        print(f"Test case generator daemon error: {e}")
+        sys.exit(1)
+    print(f"Test cases written to {output} ({job['test_cases']} test cases)")
+
+if __name__ == "__main__":
+    main()
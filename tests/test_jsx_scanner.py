@@ -0,0 +1,68 @@
+from website_testcase_generator import JSXTagScanner, extract_elements_from_jsx
+
+def scan(source):
+    return [(element['tag'], element['attributes'], element['text']) for element in JSXTagScanner().scan(source)]
+
+def test_tracked_tags_and_text():
+    source = ('const A = () => <form onSubmit={save}><input name="q" type="search"/>'
+              '<button type="submit">Go</button></form>;')
+    assert scan(source) == [
+        ('form', {'onSubmit': 'save'}, 'Go'),
+        ('input', {'name': 'q', 'type': 'search'}, ''),
+        ('button', {'type': 'submit'}, 'Go'),
+    ]
+
+def test_attribute_forms():
+    source = '<a href="/x" {...rest} disabled data-x={1 + 2} title=\'t\' onClick={() => go("a")}>Home</a>'
+    assert scan(source) == [('a', {'href': '/x', '...': '...rest', 'disabled': True, 'data-x': '1 + 2',
+                                   'title': 't', 'onClick': '() => go("a")'}, 'Home')]
+
+def test_nesting_collects_descendant_text():
+    source = 'return <nav><ul><li><a href="/">Home</a></li><li><a href="/b">B <b>bold</b></a></li></ul></nav>'
+    assert scan(source) == [('a', {'href': '/'}, 'Home'), ('a', {'href': '/b'}, 'B bold')]
+
+def test_expressions_in_children():
+    source = 'items.map(i => <a key={i.id} href={i.url}>{i.name}</a>); <button>Save {count} items</button>'
+    assert scan(source) == [('a', {'key': 'i.id', 'href': 'i.url'}, '{i.name}'),
+                            ('button', {}, 'Save {count} items')]
+
+def test_jsx_inside_expression_is_not_parent_text():
+    source = '<form>{open && <button>Send</button>}</form>'
+    assert scan(source) == [('form', {}, 'Send'), ('button', {}, 'Send')]
+
+def test_fragments():
+    assert scan('return (<><button>frag</button></>)') == [('button', {}, 'frag')]
+
+def test_markup_in_strings_and_templates_is_ignored():
+    source = 'var s = "<button>in string</button>", t = \'<a href="#">x</a>\', u = `<form>${x}</form>`;'
+    assert scan(source) == []
+
+def test_markup_in_comments_is_ignored():
+    assert scan('// <button>line comment</button>\n/* <a>block</a> */ x = 1') == []
+
+def test_regex_literals_and_operators_are_not_markup():
+    source = 'var r = /<button>[^<]*<\\/button>/g; if (a < b && c > d) {}; n = 1<<2; return x/y<z'
+    assert scan(source) == []
+
+def test_markup_after_keyword():
+    assert scan('function f(){return <a href="/r">R</a>}') == [('a', {'href': '/r'}, 'R')]
+
+def test_newline_ends_statement_before_markup():
+    assert scan('a = b\n<button>after newline</button>') == [('button', {}, 'after newline')]
+    assert scan('x = y /* c */\n<a href="/n">after comment</a>') == [('a', {'href': '/n'}, 'after comment')]
+
+def test_no_newline_means_comparison():
+    assert scan('a = b <button') == []
+
+def test_unclosed_markup_ends_at_end_of_input():
+    assert scan('var a = "<a class=x>"; f(<button>Open') == [('button', {}, 'Open')]
+    assert scan('<a href="/x"') == [('a', {'href': '/x'}, '')]
+
+def test_bytes_input():
+    assert scan(b'<A HREF="/x">t</A>') == [('a', {'HREF': '/x'}, 't')]
+
+def test_extract_elements_from_jsx_builds_test_cases():
+    cases = extract_elements_from_jsx('<form><input name="email" type="email"/><button>Sign up</button></form>',
+                                      'signup.jsx')
+    assert [(case['Type'], case['Element']) for case in cases] == [
+        ('Form', 'JSX/JS Form'), ('Button', 'Sign up'), ('Form Field', 'email field (email)')]
@@ -0,0 +1,20 @@
+from website_testcase_generator import (DEFAULT_ELEMENT_CAPS, DEFAULT_MAX_SOURCE_BYTES, RepoAnalysisCache,
+                                        SourceItem, repo_analysis_settings_key)
+
+ITEM = SourceItem(0, 'html', 'index.html', 'index.html', 'ab' * 20, None)
+
+def make_cache(tmp_path, element_caps):
+    key = repo_analysis_settings_key(DEFAULT_MAX_SOURCE_BYTES, 'sample', element_caps)
+    return RepoAnalysisCache(str(tmp_path), settings_key=key)
+
+def test_same_element_caps_hit_the_cache(tmp_path):
+    make_cache(tmp_path, dict(DEFAULT_ELEMENT_CAPS)).put(ITEM, [{'Type': 'Link'}])
+    # Insertion order does not change the key
+    caps = dict(reversed(list(DEFAULT_ELEMENT_CAPS.items())))
+    assert make_cache(tmp_path, caps).get(ITEM) == [{'Type': 'Link'}]
+
+def test_element_cap_change_misses_the_cache(tmp_path):
+    make_cache(tmp_path, dict(DEFAULT_ELEMENT_CAPS)).put(ITEM, [{'Type': 'Link'}])
+    cache = make_cache(tmp_path, dict(DEFAULT_ELEMENT_CAPS, links=10))
+    assert cache.get(ITEM) is None
+    assert cache.misses == 1
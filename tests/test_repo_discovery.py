@@ -0,0 +1,64 @@
+import os
+import subprocess
+
+import pytest
+
+from website_testcase_generator import clone_github_repo, discover_source_files
+
+pytest.importorskip('git')
+
+FIXTURE_FILES = {
+    'index.html': '<form><input name="q"></form>',
+    'src/app.jsx': 'const A = () => <button>Go</button>;',
+    'src/util.js': 'export const x = 1;',
+    'src/bundle.min.js': 'var a=1;',
+    'docs/page.html': '<a href="/">Home</a>',
+    'dist/out.js': 'var b=2;',
+    'node_modules/lib/index.js': 'module.exports = {};',
+    '.gitignore': 'dist/\n*.min.js\n',
+}
+
+def run_git(*args, cwd):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                   cwd=cwd, check=True, capture_output=True)
+
+@pytest.fixture
+def bare_repo(tmp_path):
+    """A bare repository with two commits, served over file:// so shallow and partial clones apply"""
+    work = tmp_path / 'work'
+    work.mkdir()
+    run_git('init', '-q', cwd=work)
+    for path, content in FIXTURE_FILES.items():
+        (work / path).parent.mkdir(parents=True, exist_ok=True)
+        (work / path).write_text(content)
+    # Ignored files are committed too, as vendored trees often are
+    run_git('add', '-f', '.', cwd=work)
+    run_git('commit', '-q', '-m', 'initial', cwd=work)
+    (work / 'src/util.js').write_text('export const x = 2;')
+    run_git('commit', '-q', '-am', 'second', cwd=work)
+    bare = tmp_path / 'repo.git'
+    run_git('clone', '-q', '--bare', str(work), str(bare), cwd=tmp_path)
+    run_git('config', 'uploadpack.allowFilter', 'true', cwd=bare)
+    return 'file://' + str(bare)
+
+def discovered(root):
+    found = discover_source_files(str(root))
+    return sorted(os.path.relpath(path, root) for files in found.values() for path in files)
+
+def test_shallow_clone_discovers_sources_and_honors_gitignore(bare_repo, tmp_path):
+    dest = tmp_path / 'clone'
+    repo = clone_github_repo(bare_repo, str(dest), depth=1)
+    assert repo.git.rev_list('--count', 'HEAD') == '1'
+    assert discovered(dest) == ['docs/page.html', 'index.html', 'src/app.jsx', 'src/util.js']
+
+def test_blobless_clone(bare_repo, tmp_path):
+    dest = tmp_path / 'clone'
+    repo = clone_github_repo(bare_repo, str(dest), depth=1, blobless=True)
+    assert repo.git.config('remote.origin.partialclonefilter') == 'blob:none'
+    assert discovered(dest) == ['docs/page.html', 'index.html', 'src/app.jsx', 'src/util.js']
+
+def test_sparse_clone_only_checks_out_requested_paths(bare_repo, tmp_path):
+    dest = tmp_path / 'clone'
+    clone_github_repo(bare_repo, str(dest), depth=1, sparse_paths=['src'])
+    # Cone-mode sparse checkouts keep top-level files, but no other directories
+    assert discovered(dest) == ['index.html', 'src/app.jsx', 'src/util.js']
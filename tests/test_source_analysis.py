@@ -0,0 +1,33 @@
+import multiprocessing
+
+import pytest
+
+import website_testcase_generator as generator
+from website_testcase_generator import SourceItem, analyze_source_items
+
+ITEMS = [SourceItem(0, 'js', None, 'good.jsx', None, b'<button>Save</button>'),
+         SourceItem(1, 'js', None, 'bad.jsx', None, b'<a href="/">Home</a>')]
+
+def failing_on_bad(kind, filepath, base_url=None, content=None, max_bytes=None, oversize_policy=None):
+    if base_url == 'bad.jsx':
+        raise RuntimeError('boom')
+    return [{'Type': 'Button', 'Element': base_url}]
+
+def test_serial_analysis_runs_without_browsers_and_restores_them(monkeypatch):
+    seen = []
+    def record(*args, **kwargs):
+        seen.append((generator.PLAYWRIGHT_AVAILABLE, generator.website_intelligence.visual_analysis_enabled))
+        return []
+    monkeypatch.setattr(generator, 'analyze_source_file', record)
+    monkeypatch.setattr(generator, 'PLAYWRIGHT_AVAILABLE', True)
+    monkeypatch.setattr(generator.website_intelligence, 'visual_analysis_enabled', True)
+    analyze_source_items(ITEMS, workers=1)
+    assert seen == [(False, False), (False, False)]
+    assert generator.PLAYWRIGHT_AVAILABLE and generator.website_intelligence.visual_analysis_enabled
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='workers inherit the patch by fork')
+def test_failed_chunk_is_reported_and_the_rest_kept(monkeypatch, capsys):
+    monkeypatch.setattr(generator, 'analyze_source_file', failing_on_bad)
+    test_cases = list(analyze_source_items(ITEMS, workers=2))
+    assert test_cases == [{'Type': 'Button', 'Element': 'good.jsx'}]
+    assert 'Failed to analyze bad.jsx: boom' in capsys.readouterr().out
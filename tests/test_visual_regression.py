@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from website_testcase_generator import REGRESSION_TILE_SIZE, ScreenshotFrame, compare_screenshots
+
+cv2 = pytest.importorskip('cv2')
+
+def frame(image):
+    ok, encoded = cv2.imencode('.png', image)
+    assert ok
+    return ScreenshotFrame(encoded.tobytes())
+
+def page_with_glyph(mirrored=False):
+    """A white 4x4-tile page with a one-pixel diagonal drawn in the tile at row 1, column 2"""
+    size = REGRESSION_TILE_SIZE
+    image = np.full((4 * size, 4 * size, 3), 255, dtype=np.uint8)
+    for i in range(size):
+        col = size - 1 - i if mirrored else i
+        image[size + i, 2 * size + col] = 0
+    return image
+
+def test_identical_captures_have_no_regions():
+    result = compare_screenshots(frame(page_with_glyph()), frame(page_with_glyph()))
+    assert result['identical']
+    assert result['regions'] == []
+
+def test_mirrored_glyph_is_detected():
+    # "/" redrawn as "\\" keeps every row and column sum of the tile, so only an exact check catches it
+    result = compare_screenshots(frame(page_with_glyph()), frame(page_with_glyph(mirrored=True)))
+    size = REGRESSION_TILE_SIZE
+    assert not result['identical']
+    assert result['tiles_equal'] == result['tiles'] - 1
+    assert [region['bbox'] for region in result['regions']] == [[2 * size, size, 3 * size, 2 * size]]
+    assert result['regions'][0]['changed_pixels'] == 2 * size
@@ -1,18 +1,38 @@
 import os
 import tempfile
-import glob
 import shutil
+import heapq
+import math
+import mmap
+import functools
+import multiprocessing
+import threading
+import queue
+import gzip
+import tracemalloc
+import xml.etree.ElementTree as ElementTree
+import socketserver
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor, Future, FIRST_COMPLETED,
+                                TimeoutError as FutureTimeoutError, wait as wait_futures)
+from contextlib import contextmanager
 import requests
 from bs4 import BeautifulSoup
 from openpyxl import Workbook
-from urllib.parse import urljoin
+from openpyxl.cell import WriteOnlyCell
+from urllib.parse import urldefrag, urljoin, urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
 import sys
 import re
 from openpyxl.styles import PatternFill, Font
 import argparse
 import openpyxl
 import json
-from collections import defaultdict
+import time
+import hashlib
+import hmac
+from collections import defaultdict, namedtuple
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
@@ -29,6 +49,12 @@ try:
 except ImportError:
     COMPUTER_VISION_AVAILABLE = False
 
+# OpenCV on its own is enough to decode screenshots
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
 try:
     from git import Repo
 except ImportError:
@@ -40,6 +66,1241 @@ try:
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
+class _NullSpan:
+    """Stands in for every span while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    """One timed operation; recorded on its tracer when the block exits"""
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        memory = self.tracer.memory
+        if memory is not None and memory.enabled and self.category == 'phase':
+            memory.enter(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter(), self.args, exc_type)
+        memory = self.tracer.memory
+        if memory is not None and memory.enabled and self.category == 'phase':
+            memory.exit(self.name)
+        return False
+
+class Tracer:
+    """Timed spans for each phase and Playwright operation, exported as Chrome trace events and a summary table"""
+
+    def __init__(self, memory=None):
+        self.enabled = False
+        self.events = []
+        self.thread_names = {}
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        # Optional MemoryProfiler sampled at the boundaries of 'phase' spans
+        self.memory = memory
+
+    def enable(self):
+        self.enabled = True
+        self.events = []
+        self.thread_names = {}
+        self.origin = time.perf_counter()
+
+    def span(self, name, category='phase', **args):
+        """Context manager timing a block (a shared no-op while tracing is off)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def record(self, name, category, start, end, args=None, error=None):
+        thread = threading.current_thread()
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': thread.ident,
+                 'ts': round((start - self.origin) * 1e6, 1), 'dur': round((end - start) * 1e6, 1)}
+        if args or error:
+            event['args'] = dict(args or {}, **({'error': error.__name__} if error else {}))
+        with self.lock:
+            self.events.append(event)
+            self.thread_names[thread.ident] = thread.name
+
+    def wrap(self, target, label):
+        """Proxy target so its method calls become Playwright spans (target itself while tracing is off)"""
+        return TracedProxy(self, target, label) if self.enabled else target
+
+    def summary(self):
+        """Rows of (category, name, count, total_ms, mean_ms, max_ms), slowest total first"""
+        totals = defaultdict(list)
+        for event in self.events:
+            totals[(event['cat'], event['name'])].append(event['dur'] / 1000)
+        rows = [(category, name, len(durations), sum(durations), sum(durations) / len(durations), max(durations))
+                for (category, name), durations in totals.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def format_summary(self):
+        lines = [f"{'category':<11} {'span':<40} {'count':>6} {'total ms':>11} {'mean ms':>10} {'max ms':>10}"]
+        for category, name, count, total, mean, longest in self.summary():
+            lines.append(f"{category:<11} {name[:40]:<40} {count:>6} {total:>11.1f} {mean:>10.1f} {longest:>10.1f}")
+        return '\n'.join(lines)
+
+    def write_chrome_trace(self, path):
+        """Write the spans as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                     'args': {'name': 'website_testcase_generator'}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in self.thread_names.items()]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}, f)
+
+class TracedProxy:
+    """Wraps a Playwright object so each method call is recorded; returned pages, handles and contexts are wrapped too"""
+    _WRAPPED_TYPES = {'Browser': 'browser', 'BrowserContext': 'context', 'Page': 'page',
+                      'ElementHandle': 'element', 'Locator': 'locator'}
+
+    def __init__(self, tracer, target, label):
+        self._tracer = tracer
+        self._target = target
+        self._label = label
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            span_args = {'target': args[0][:200]} if args and isinstance(args[0], str) else {}
+            with _Span(self._tracer, f'{self._label}.{name}', 'playwright', span_args):
+                result = value(*args, **kwargs)
+            label = self._WRAPPED_TYPES.get(type(result).__name__)
+            return TracedProxy(self._tracer, result, label) if label else result
+        return call
+
+    def __eq__(self, other):
+        return self._target == (other._target if isinstance(other, TracedProxy) else other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __bool__(self):
+        return bool(self._target)
+
+def current_rss():
+    """Resident set size of this process in bytes (peak RSS where /proc is unavailable, 0 if unknown)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class MemoryProfiler:
+    """Opt-in tracemalloc snapshots and RSS at phase boundaries, plus a soft memory ceiling
+
+    Allocations are process-wide, so a phase running next to another thread's phase is charged for both.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.ceiling = None
+        self.top = 5
+        self.phases = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def start(self, top=5):
+        tracemalloc.start()
+        self.enabled = True
+        self.top = top
+        self.phases = {}
+
+    def over_ceiling(self):
+        """True once RSS is above the soft ceiling (always False without one)"""
+        return self.ceiling is not None and current_rss() > self.ceiling
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ])
+
+    def _stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def enter(self, name):
+        stack = self._stack()
+        current, peak = tracemalloc.get_traced_memory()
+        # Peaks are measured per phase, so fold what the enclosing phase saw so far into it first
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        stack.append({'snapshot': self._snapshot(), 'start': current, 'peak': 0})
+
+    def exit(self, name):
+        stack = self._stack()
+        frame = stack.pop()
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, frame['peak'])
+        stats = self._snapshot().compare_to(frame['snapshot'], 'lineno')
+        with self.lock:
+            record = self.phases.setdefault(name, {'calls': 0, 'peak': 0, 'net': 0, 'rss': 0,
+                                                   'sites': defaultdict(int)})
+            record['calls'] += 1
+            record['peak'] = max(record['peak'], peak)
+            record['net'] += current - frame['start']
+            record['rss'] = max(record['rss'], current_rss())
+            for stat in stats[:self.top * 4]:
+                if stat.size_diff > 0:
+                    record['sites'][str(stat.traceback[0])] += stat.size_diff
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+
+    def format_report(self):
+        """Per-phase peak, net growth and RSS, each followed by its top allocation sites"""
+        mb = 1024 * 1024
+        lines = [f"{'phase':<34} {'calls':>6} {'peak MB':>9} {'net MB':>9} {'RSS MB':>9}"]
+        for name, record in sorted(self.phases.items(), key=lambda item: item[1]['peak'], reverse=True):
+            lines.append(f"{name[:34]:<34} {record['calls']:>6} {record['peak'] / mb:>9.1f} "
+                         f"{record['net'] / mb:>9.1f} {record['rss'] / mb:>9.1f}")
+            sites = sorted(record['sites'].items(), key=lambda item: item[1], reverse=True)[:self.top]
+            for site, size in sites:
+                lines.append(f"    {size / mb:>8.2f} MB  {site}")
+        return '\n'.join(lines)
+
+MEMORY = MemoryProfiler()
+TRACER = Tracer(memory=MEMORY)
+
+# Collections check the soft memory ceiling every this many appends; reading RSS is cheap but not free
+MEMORY_CHECK_INTERVAL = 256
+
+class TestCaseSpool:
+    """List-like store of test cases that moves them to a temporary JSON-lines file once memory passes the ceiling"""
+
+    def __init__(self, memory=None):
+        self.memory = memory or MEMORY
+        self.cases = []
+        self.path = None
+        self.file = None
+        self.spilled = 0
+
+    def append(self, case):
+        if self.file is not None:
+            self.file.write(json.dumps(case, default=str) + '\n')
+            self.spilled += 1
+            return
+        self.cases.append(case)
+        if len(self.cases) % MEMORY_CHECK_INTERVAL == 0 and self.memory.over_ceiling():
+            self.spill()
+
+    def extend(self, cases):
+        for case in cases:
+            self.append(case)
+
+    def spill(self):
+        """Move everything held in memory to disk; later appends go straight to the file"""
+        fd, self.path = tempfile.mkstemp(prefix='tcgen_cases_', suffix='.jsonl')
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+        print(f"Memory above the soft ceiling; spilling test cases to {self.path}")
+        cases, self.cases = self.cases, []
+        self.extend(cases)
+
+    def __len__(self):
+        return self.spilled + len(self.cases)
+
+    def __iter__(self):
+        if self.file is not None:
+            self.file.flush()
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+        yield from self.cases
+
+    def close(self):
+        """Delete the spill file, if any"""
+        if self.file is not None:
+            self.file.close()
+            os.remove(self.path)
+            self.file = None
+            self.path = None
+
+def traced(name, category='phase'):
+    """Decorator recording each call as a span while tracing is on"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            with _Span(TRACER, name, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class ScreenshotFrame:
+    """A page screenshot held in memory: the PNG bytes plus a lazily decoded BGR image"""
+
+    def __init__(self, png_bytes, url=None):
+        self.png_bytes = png_bytes
+        self.url = url
+        self._image = None
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a stored screenshot, e.g. one of the screenshot_*.png baselines"""
+        with open(path, 'rb') as f:
+            return cls(f.read(), url=path)
+
+    @property
+    def image(self):
+        """Decoded BGR numpy array (None if the bytes cannot be decoded)"""
+        if self._image is None and self.png_bytes and cv2 is not None:
+            self._image = cv2.imdecode(np.frombuffer(self.png_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return self._image
+
+    def save(self, path):
+        """Persist the screenshot exactly as captured"""
+        with open(path, 'wb') as f:
+            f.write(self.png_bytes)
+        return path
+
+def screenshot_filename(url):
+    """Name a persisted screenshot after its page, like screenshot_Admin_Dashboard.png"""
+    path = re.sub(r'^[a-z]+://', '', url or '').strip('/')
+    name = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_') or 'page'
+    return f"screenshot_{name[:100]}.png"
+
+# Keys of the visual element dict, in report order
+VISUAL_ELEMENT_TYPES = ['buttons', 'forms', 'links', 'images', 'text_areas', 'tables', 'videos', 'modals']
+
+# Visual analysis backends: YOLO on screenshots, geometry of the rendered DOM, or none
+VISUAL_MODES = ('yolo', 'dom', 'off')
+
+# Collects geometry, visibility, computed styles and stacking for every element the visual layer
+# cares about in one round trip. Categories are claimed in order, so submit inputs count as buttons.
+DOM_GEOMETRY_SCRIPT = """
+() => {
+    const categories = [
+        ['buttons', 'button, input[type=submit], input[type=button], input[type=reset], input[type=image], [role=button]'],
+        ['forms', 'form, input:not([type=hidden]), select'],
+        ['links', 'a[href], [role=link]'],
+        ['images', 'img, picture, svg[role=img], [role=img]'],
+        ['text_areas', 'textarea, [contenteditable=""], [contenteditable=true], [role=textbox]'],
+        ['tables', 'table, [role=grid], [role=table]'],
+        ['videos', 'video, iframe[src*="youtube"], iframe[src*="vimeo"]'],
+        ['modals', 'dialog, [role=dialog], [role=alertdialog], [aria-modal=true]'],
+    ];
+    const seen = new Set();
+    const elements = [];
+    const viewportWidth = window.innerWidth, viewportHeight = window.innerHeight;
+    const stackingIndex = (el) => {
+        for (let node = el; node && node !== document.documentElement; node = node.parentElement) {
+            const zIndex = getComputedStyle(node).zIndex;
+            if (zIndex !== 'auto') return parseInt(zIndex, 10) || 0;
+        }
+        return 0;
+    };
+    for (const [category, selector] of categories) {
+        for (const el of document.querySelectorAll(selector)) {
+            if (seen.has(el)) continue;
+            seen.add(el);
+            const rect = el.getBoundingClientRect();
+            const style = getComputedStyle(el);
+            const visible = rect.width > 0 && rect.height > 0 && style.display !== 'none'
+                && style.visibility !== 'hidden' && parseFloat(style.opacity) > 0;
+            // Only points inside the viewport can be hit-tested
+            let topmost = null;
+            const x = rect.left + rect.width / 2, y = rect.top + rect.height / 2;
+            if (visible && x >= 0 && y >= 0 && x < viewportWidth && y < viewportHeight) {
+                const hit = document.elementFromPoint(x, y);
+                topmost = !!hit && (hit === el || el.contains(hit));
+            }
+            elements.push({
+                category: category,
+                tag: el.tagName.toLowerCase(),
+                text: (el.innerText || el.value || el.getAttribute('aria-label') || '').trim().slice(0, 80),
+                rect: [rect.left + window.scrollX, rect.top + window.scrollY,
+                       rect.right + window.scrollX, rect.bottom + window.scrollY],
+                visible: visible,
+                topmost: topmost,
+                z_index: stackingIndex(el),
+                order: elements.length,
+                styles: {
+                    display: style.display, position: style.position, cursor: style.cursor,
+                    opacity: style.opacity, color: style.color, backgroundColor: style.backgroundColor,
+                    fontSize: style.fontSize,
+                },
+            });
+        }
+    }
+    return elements;
+}
+"""
+
+# Words the structure analysis looks for in HTML and in element text, beyond the pattern dictionaries
+LIVE_HTML_WORDS = ['main', 'primary', 'breadcrumb', 'bread', 'sidebar', 'side', 'footer',
+                   'header', 'title', 'content', 'aside', 'form']
+LIVE_TEXT_WORDS = ['login', 'signin', 'register', 'signup', 'contact', 'message',
+                   'product', 'item', 'goods', 'user', 'profile', 'person', 'post', 'article', 'blog']
+
+# Everything analyze_website_structure reads from a parsed page, collected in the live DOM in one call.
+# Keyword checks run in the page against the vocabulary passed in, so only matches come back, not markup.
+LIVE_STRUCTURE_SCRIPT = """
+(vocabulary) => {
+    const lower = (value) => (value || '').toLowerCase();
+    const found = (value, words) => words.filter((word) => value.includes(word));
+    const htmlHits = (el) => found(lower(el.outerHTML), vocabulary.html);
+    const textHits = (el) => found(lower(el.textContent), vocabulary.text);
+    const attributes = (el) => {
+        const result = {};
+        for (const attribute of el.attributes) result[attribute.name] = attribute.value;
+        return result;
+    };
+    const all = (root, selector) => Array.from(root.querySelectorAll(selector));
+    const has = (root, selector) => root.querySelector(selector) !== null;
+    const depth = (el) => {
+        let count = 0;
+        for (let node = el.parentNode; node; node = node.parentNode) count++;
+        return count;
+    };
+    const classMatches = (el, pattern) => Array.from(el.classList).some((name) => pattern.test(name));
+    const container = (el) => {
+        const landmark = el.parentElement && el.parentElement.closest(vocabulary.containers);
+        return landmark ? landmark.tagName.toLowerCase() : 'body';
+    };
+    // Each link's nearest nav/ul/ol, as an index into link_navs (its HTML hits), or -1
+    const linkNavs = [];
+    const navIndex = new Map();
+    const navOf = (link) => {
+        const nav = link.parentElement && link.parentElement.closest('nav, ul, ol');
+        if (!nav) return -1;
+        if (!navIndex.has(nav)) {
+            navIndex.set(nav, linkNavs.length);
+            linkNavs.push(htmlHits(nav));
+        }
+        return navIndex.get(nav);
+    };
+    return {
+        site_hits: found(lower(document.documentElement.textContent), vocabulary.site),
+        forms: all(document, 'form').map((form) => ({
+            attrs: attributes(form),
+            fields: all(form, 'input, select, textarea').map(attributes),
+            text_hits: textHits(form),
+            html_hits: htmlHits(form),
+        })),
+        navigation: all(document, 'nav, ul, ol').filter((nav) => has(nav, 'a')).map((nav) => {
+            const links = all(nav, 'a');
+            return {
+                links: links.map((link) => ({text: link.textContent.trim(), href: link.getAttribute('href') || ''})),
+                html_hits: htmlHits(nav),
+                depth: Math.max(...links.map(depth)),
+                lists: all(nav, 'ul').length,
+            };
+        }),
+        content_areas: all(document, 'div, section, article, main, aside')
+            .filter((el) => el.textContent.trim())
+            .map((el) => ({
+                html_hits: htmlHits(el),
+                size: el.textContent.length,
+                elements: all(el, '*').length,
+                interactive: has(el, 'button, a, input'),
+            })),
+        buttons: all(document, 'button').map((button) => ({
+            text: button.textContent, attrs: attributes(button), container: container(button),
+        })),
+        links: all(document, 'a').map((link) => ({
+            text: link.textContent, href: link.getAttribute('href') || '', container: container(link), nav: navOf(link),
+        })),
+        link_navs: linkNavs,
+        inputs: all(document, 'input').map(attributes),
+        modals: all(document, 'div, dialog').filter((el) => classMatches(el, /modal|popup|dialog/i)).map((modal) => ({
+            content: modal.textContent.slice(0, 100),
+            text_hits: textHits(modal),
+            interactive: has(modal, 'button, a, input'),
+        })),
+        tables: all(document, 'table').map((table) => {
+            const rows = all(table, 'tr');
+            return {
+                rows: rows.length,
+                columns: rows.length ? all(rows[0], 'td, th').length : 0,
+                has_headers: has(table, 'th'),
+                interactive: has(table, 'button, a, input'),
+            };
+        }),
+        lists: all(document, 'ul, ol').map((list) => ({
+            type: list.tagName === 'OL' ? 'ordered' : 'unordered',
+            items: all(list, 'li').length,
+            nested: has(list, 'ul, ol'),
+            interactive: has(list, 'a, button'),
+        })),
+        cards: all(document, 'div, article').filter((el) => classMatches(el, /card|item|product/i)).map((card) => ({
+            text_hits: textHits(card),
+            elements: all(card, '*').length,
+            interactive: has(card, 'a, button'),
+            has_image: has(card, 'img'),
+        })),
+    };
+}
+"""
+
+# Element for a field spec: its explicit selector, else the first of the name selectors, then the id,
+# that matches. Each is queried in priority order, since one joined selector returns the first in document order.
+FIELD_FINDER_SCRIPT = """
+    const find = (field) => {
+        if (field.selector) return document.querySelector(field.selector);
+        const selectors = [];
+        if (field.name) {
+            const name = CSS.escape(field.name);
+            selectors.push(`input[name="${name}"]`, `textarea[name="${name}"]`, `select[name="${name}"]`);
+        }
+        if (field.id) selectors.push(`#${CSS.escape(field.id)}`);
+        for (const selector of selectors) {
+            const el = document.querySelector(selector);
+            if (el) return el;
+        }
+        return null;
+    };
+"""
+
+# Resolves and fills a batch of fields in one round trip. Values go through the native value
+# setters followed by input/change events, so framework-controlled inputs see the edit.
+BULK_FILL_SCRIPT = """
+(fields) => {
+    const setters = [HTMLInputElement, HTMLTextAreaElement, HTMLSelectElement].map((cls) => [
+        cls, Object.getOwnPropertyDescriptor(cls.prototype, 'value').set,
+    ]);
+    const unfillable = new Set(['hidden', 'submit', 'button', 'reset', 'image', 'file', 'checkbox', 'radio']);
+""" + FIELD_FINDER_SCRIPT + """
+    return fields.map((field) => {
+        const el = find(field);
+        if (!el) return {found: false, error: null, value: null};
+        const type = (el.getAttribute('type') || '').toLowerCase();
+        let error = null;
+        if (el.tagName === 'INPUT' && unfillable.has(type)) error = `Input of type "${type}" cannot be filled`;
+        else if (el.disabled) error = 'Element is disabled';
+        else if (el.readOnly) error = 'Element is read-only';
+        else if (!el.getClientRects().length) error = 'Element is not visible';
+        if (error) return {found: true, error: error, value: null};
+        el.focus();
+        const setter = setters.find(([cls]) => el instanceof cls);
+        if (setter) setter[1].call(el, field.value);
+        else el.textContent = field.value;
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        return {found: true, error: null, value: setter ? el.value : el.textContent};
+    });
+}
+"""
+
+# True once any of the fields has rendered, resolved exactly as BULK_FILL_SCRIPT will resolve it
+BULK_FILL_READY_SCRIPT = """
+(fields) => {
+""" + FIELD_FINDER_SCRIPT + """
+    return fields.some((field) => find(field) !== null);
+}
+"""
+
+# Attributes tried, in order, for a unique selector before falling back to an nth-of-type path
+LOCATOR_ATTRIBUTES = ['data-testid', 'data-test', 'data-qa', 'data-cy', 'name']
+
+# Maps every link, button and form field to a selector that matches it alone. Uniqueness is checked
+# against counts taken in one pass. A MutationObserver bumps a version so callers can tell when to rebuild.
+LOCATOR_INDEX_SCRIPT = """
+(attributes) => {
+    if (!window.__tcgenLocatorObserver) {
+        window.__tcgenLocatorVersion = 0;
+        window.__tcgenLocatorObserver = new MutationObserver(() => { window.__tcgenLocatorVersion++; });
+        window.__tcgenLocatorObserver.observe(document.documentElement, {
+            childList: true, subtree: true, attributes: true, attributeFilter: ['id', 'href'].concat(attributes),
+        });
+    }
+    const counts = new Map();
+    const count = (key) => counts.set(key, (counts.get(key) || 0) + 1);
+    for (const el of document.querySelectorAll('[id]')) count(`#${el.id}`);
+    for (const attribute of attributes) {
+        for (const el of document.querySelectorAll(`[${attribute}]`)) {
+            count(`${el.tagName}[${attribute}=${el.getAttribute(attribute)}]`);
+        }
+    }
+    const unique = (key) => counts.get(key) === 1;
+    const path = (el) => {
+        const parts = [];
+        for (let node = el; node; node = node.parentElement) {
+            if (node !== el && node.id && unique(`#${node.id}`)) {
+                parts.unshift(`#${CSS.escape(node.id)}`);
+                break;
+            }
+            const tag = node.tagName.toLowerCase();
+            if (!node.parentElement) {
+                parts.unshift(tag);
+                break;
+            }
+            const siblings = Array.from(node.parentElement.children).filter((child) => child.tagName === node.tagName);
+            parts.unshift(`${tag}:nth-of-type(${siblings.indexOf(node) + 1})`);
+        }
+        return parts.join(' > ');
+    };
+    const selector = (el) => {
+        if (el.id && unique(`#${el.id}`)) return `#${CSS.escape(el.id)}`;
+        for (const attribute of attributes) {
+            const value = el.getAttribute(attribute);
+            if (value && unique(`${el.tagName}[${attribute}=${value}]`)) {
+                return `${el.tagName.toLowerCase()}[${attribute}="${CSS.escape(value)}"]`;
+            }
+        }
+        return path(el);
+    };
+    const text = (el) => el.textContent.replace(/\\s+/g, ' ').trim();
+    const all = (query) => Array.from(document.querySelectorAll(query));
+    return {
+        version: window.__tcgenLocatorVersion,
+        links: all('a').map((el) => ({text: text(el), href: el.getAttribute('href') || '', selector: selector(el)})),
+        buttons: all('button').map((el) => ({text: text(el), selector: selector(el)})),
+        fields: all('input, select, textarea').map((el) => ({
+            name: el.getAttribute('name') || '', id: el.id, selector: selector(el),
+        })),
+    };
+}
+"""
+
+# The element for a selector from the index, or null once the DOM has changed since the index was built
+# (the index is then rebuilt before looking again)
+LOCATOR_QUERY_SCRIPT = """
+([selector, version]) => window.__tcgenLocatorVersion === version ? document.querySelector(selector) : null
+"""
+
+def _detections_to_numpy(values):
+    """Convert a torch tensor (or array-like) of detections to a numpy array"""
+    if hasattr(values, 'cpu'):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+def non_max_suppression(boxes, scores, iou_threshold=0.5):
+    """Greedy NMS over xyxy boxes; returns the indices to keep, highest score first"""
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=int)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    order = np.argsort(-scores)
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        inter_w = np.maximum(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0)
+        inter_h = np.maximum(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0)
+        inter = inter_w * inter_h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+# Vision inference backends: ultralytics on PyTorch, or an exported ONNX model run by onnxruntime or OpenVINO
+VISION_BACKENDS = ('torch', 'onnx', 'openvino')
+DEFAULT_VISION_WEIGHTS = 'yolov8n.pt'
+DEFAULT_VISION_IMGSZ = 640
+# Detection thresholds shared by every backend (ultralytics' own predict defaults)
+VISION_CONF_THRESHOLD = 0.25
+VISION_IOU_THRESHOLD = 0.7
+
+class DetectionBoxes:
+    """The parts of ultralytics' Boxes the visual pipeline reads: xyxy, conf and cls arrays"""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+DetectionResult = namedtuple('DetectionResult', ['boxes', 'names'])
+
+def letterbox(image, size):
+    """Resize keeping the aspect ratio and pad to size x size; returns the image, scale and (left, top) padding"""
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    top, left = (size - new_height) // 2, (size - new_width) // 2
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[top:top + new_height, left:left + new_width] = image
+    return canvas, scale, (left, top)
+
+def image_to_blob(image, size):
+    """Letterboxed BGR image as a normalized 1x3xSxS RGB float blob, plus the scale and padding to undo"""
+    canvas, scale, padding = letterbox(image, size)
+    blob = canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob), scale, padding
+
+def read_onnx_metadata(model_path):
+    """Input size and class names that ultralytics stores in an exported model"""
+    import ast
+    import onnx
+    model = onnx.load(model_path, load_external_data=False)
+    metadata = {prop.key: prop.value for prop in model.metadata_props}
+    imgsz = model.graph.input[0].type.tensor_type.shape.dim[2].dim_value
+    names = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+    return imgsz, names
+
+class ExportedYoloDetector:
+    """YOLOv8 on an exported ONNX model, run by onnxruntime or OpenVINO with a fixed thread count
+
+    Called like an ultralytics model: a list of BGR images in, one result per image out.
+    """
+
+    def __init__(self, model_path, backend='onnx', threads=None, conf_threshold=VISION_CONF_THRESHOLD,
+                 iou_threshold=VISION_IOU_THRESHOLD):
+        # Identifies the model (and its input size) in the visual result cache
+        self.ckpt_path = f"{model_path}:{backend}"
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.imgsz, self.names = read_onnx_metadata(model_path)
+        if backend == 'openvino':
+            self._infer = self._load_openvino(model_path, threads)
+        else:
+            self._infer = self._load_onnxruntime(model_path, threads)
+
+    def _load_onnxruntime(self, model_path, threads):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        input_name = session.get_inputs()[0].name
+        return lambda blob: session.run(None, {input_name: blob})[0]
+
+    def _load_openvino(self, model_path, threads):
+        import openvino as ov
+        core = ov.Core()
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = threads
+        compiled = core.compile_model(core.read_model(model_path), 'CPU', config)
+        request = compiled.create_infer_request()
+        output = compiled.output(0)
+        return lambda blob: request.infer({0: blob})[output]
+
+    def __call__(self, images, verbose=False, conf=None, iou=None, **kwargs):
+        return [self.predict(image, conf, iou) for image in images]
+
+    def predict(self, image, conf=None, iou=None):
+        """Detections for one BGR image in its own pixel coordinates"""
+        conf = self.conf_threshold if conf is None else conf
+        iou = self.iou_threshold if iou is None else iou
+        blob, scale, (left, top) = image_to_blob(image, self.imgsz)
+        # (4 + classes) x anchors: box centre and size, then one score per class
+        predictions = np.asarray(self._infer(blob))[0].T
+        scores = predictions[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+        keep = confidences > conf
+        predictions, class_ids, confidences = predictions[keep], class_ids[keep], confidences[keep]
+        boxes = np.empty((len(predictions), 4), dtype=np.float32)
+        boxes[:, 0:2] = predictions[:, 0:2] - predictions[:, 2:4] / 2
+        boxes[:, 2:4] = predictions[:, 0:2] + predictions[:, 2:4] / 2
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - left) / scale
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - top) / scale
+        height, width = image.shape[:2]
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        # Per-class NMS in one pass: shifting each class apart keeps boxes of different classes from overlapping
+        shifted = boxes + (class_ids[:, None] * (max(width, height) + 1)).astype(np.float32)
+        keep = non_max_suppression(shifted, confidences, iou)
+        return DetectionResult(DetectionBoxes(boxes[keep], confidences[keep], class_ids[keep]), self.names)
+
+def _bundled_screenshot_paths():
+    """The screenshot_*.png files shipped next to this script"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith('screenshot_') and name.endswith('.png'))
+
+def quantize_vision_model(onnx_path, output_path, calibration_paths=None):
+    """Int8-quantize an exported model, calibrated on screenshots; the detection head stays in float"""
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_dynamic, quantize_static)
+    import onnx
+    calibration_paths = _bundled_screenshot_paths() if calibration_paths is None else calibration_paths
+    if not calibration_paths:
+        quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QUInt8)
+        return output_path
+
+    imgsz, _ = read_onnx_metadata(onnx_path)
+    graph = onnx.load(onnx_path, load_external_data=False).graph
+    input_name = graph.input[0].name
+    # Box coordinates and class scores share the head's output tensor, so quantizing it loses the scores
+    module_indexes = [int(m.group(1)) for m in (re.match(r'/model\.(\d+)/', node.name) for node in graph.node) if m]
+    head_prefix = f"/model.{max(module_indexes)}/" if module_indexes else None
+    head_nodes = [node.name for node in graph.node if head_prefix and node.name.startswith(head_prefix)]
+
+    class ScreenshotCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.blobs = iter([{input_name: image_to_blob(ScreenshotFrame.from_file(path).image, imgsz)[0]}
+                               for path in calibration_paths])
+
+        def get_next(self):
+            return next(self.blobs, None)
+
+    quantize_static(onnx_path, output_path, ScreenshotCalibrationReader(), quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True,
+                    nodes_to_exclude=head_nodes)
+    return output_path
+
+def export_vision_model(weights=DEFAULT_VISION_WEIGHTS, imgsz=DEFAULT_VISION_IMGSZ, int8=False, models_dir=None):
+    """Export YOLO weights to ONNX once per input size (optionally int8-quantized), cached under CACHE_ROOT/models"""
+    models_dir = models_dir or os.path.join(CACHE_ROOT, 'models')
+    stem = f"{os.path.splitext(os.path.basename(weights))[0]}-{imgsz}"
+    onnx_path = os.path.join(models_dir, f"{stem}.onnx")
+    if not os.path.exists(onnx_path):
+        from ultralytics import YOLO as UltralyticsYOLO
+        os.makedirs(models_dir, exist_ok=True)
+        exported = UltralyticsYOLO(weights).export(format='onnx', imgsz=imgsz, verbose=False)
+        shutil.move(exported, onnx_path)
+    if not int8:
+        return onnx_path
+    int8_path = os.path.join(models_dir, f"{stem}-int8.onnx")
+    if not os.path.exists(int8_path):
+        quantize_vision_model(onnx_path, int8_path)
+    return int8_path
+
+@traced('load vision model')
+def load_vision_model(backend='torch', imgsz=DEFAULT_VISION_IMGSZ, threads=None, int8=False,
+                      weights=DEFAULT_VISION_WEIGHTS):
+    """Detector for the given backend; all of them take a list of images and return ultralytics-like results"""
+    if backend == 'torch':
+        import torch
+        from ultralytics import YOLO as UltralyticsYOLO
+        if threads:
+            torch.set_num_threads(threads)
+        if int8:
+            print("Int8 quantization only applies to the onnx and openvino backends; using float weights")
+        return UltralyticsYOLO(weights)
+    return ExportedYoloDetector(export_vision_model(weights, imgsz, int8), backend=backend, threads=threads)
+
+def perceptual_hash(image, hash_size=16):
+    """DCT perceptual hash of an image as a hex string; near-identical renders hash the same"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    resized = cv2.resize(image, (hash_size * 4, hash_size * 4), interpolation=cv2.INTER_AREA)
+    low_frequencies = cv2.dct(np.float32(resized))[:hash_size, :hash_size].flatten()
+    # Median without the DC term, which only reflects overall brightness
+    bits = low_frequencies > np.median(low_frequencies[1:])
+    return np.packbits(bits).tobytes().hex()
+
+class VisualAnalysisQueue:
+    """Collects screenshots from several pages, tiles tall ones and runs YOLO over the tiles in batches"""
+
+    def __init__(self, intelligence, tile_height=None, overlap=0.1, batch_size=8, cache=None):
+        self.intelligence = intelligence
+        # Optional VisualResultCache: tiles whose perceptual hash is known skip inference
+        self.cache = cache
+        # Square tiles by default, so the model sees tall pages at their real aspect ratio
+        self.tile_height = tile_height
+        self.overlap = overlap
+        self.batch_size = max(1, batch_size)
+        self.pending = []
+        self.stats = {'pages': 0, 'tiles': 0, 'cached_tiles': 0, 'batches': 0, 'seconds': 0.0}
+
+    def add(self, key, frame):
+        """Queue a screenshot frame (or stored PNG path) for analysis under key"""
+        if isinstance(frame, str):
+            frame = ScreenshotFrame.from_file(frame)
+        self.pending.append((key, frame))
+
+    def tile_offsets(self, height, width):
+        """Vertical offsets and tile height covering a page, with overlap between neighbours"""
+        tile_height = self.tile_height or width
+        if height <= tile_height:
+            return [0], height
+        step = max(1, int(tile_height * (1 - self.overlap)))
+        offsets = list(range(0, height - tile_height, step))
+        offsets.append(height - tile_height)
+        return offsets, tile_height
+
+    def _take_cached_tiles(self, tiles, detections, model):
+        """Use cached detections where a tile's perceptual hash is known; returns the tiles still to infer"""
+        model_name = f"{getattr(model, 'ckpt_path', None) or type(model).__name__}:{self.intelligence.vision_imgsz}"
+        model_tag = hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:8]
+        uncached = []
+        for key, y_offset, tile in tiles:
+            cache_key = f"{perceptual_hash(tile)}-{tile.shape[1]}x{tile.shape[0]}-{model_tag}"
+            tile_detections = self.cache.get(cache_key)
+            if tile_detections is None:
+                uncached.append((key, y_offset, tile, cache_key))
+            else:
+                self.stats['cached_tiles'] += 1
+                self._add_tile_detections(detections, key, y_offset, tile_detections)
+        return uncached
+
+    def _add_tile_detections(self, detections, key, y_offset, tile_detections):
+        """Record a tile's detections for its page, shifted into page coordinates"""
+        boxes, confidences, class_ids, names = tile_detections
+        if len(boxes) == 0:
+            return
+        boxes = boxes.copy()
+        boxes[:, [1, 3]] += y_offset
+        detections[key].append((boxes, confidences, class_ids, names))
+
+    @traced('visual analysis')
+    def flush(self):
+        """Run inference over everything queued; returns {key: visual_elements}"""
+        start = time.perf_counter()
+        tiles = []
+        results_by_key = {}
+        for key, frame in self.pending:
+            image = frame.image if frame is not None else None
+            if image is None:
+                results_by_key[key] = {}
+                continue
+            results_by_key[key] = None
+            offsets, tile_height = self.tile_offsets(*image.shape[:2])
+            for y_offset in offsets:
+                tiles.append((key, y_offset, image[y_offset:y_offset + tile_height]))
+        page_count = len(self.pending)
+        self.pending = []
+
+        detections = defaultdict(list)
+        model = self.intelligence.vision_model()
+        if self.cache is not None:
+            tiles = self._take_cached_tiles(tiles, detections, model)
+        for batch_start in range(0, len(tiles), self.batch_size):
+            batch = tiles[batch_start:batch_start + self.batch_size]
+            with TRACER.span('visual inference', 'inference', tiles=len(batch)):
+                results = model([tile[2] for tile in batch], verbose=False, imgsz=self.intelligence.vision_imgsz,
+                                conf=VISION_CONF_THRESHOLD, iou=VISION_IOU_THRESHOLD)
+            self.stats['batches'] += 1
+            for (key, y_offset, _, *cache_key), result in zip(batch, results):
+                if result.boxes is None or len(result.boxes) == 0:
+                    tile_detections = (np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=int), result.names)
+                else:
+                    tile_detections = (_detections_to_numpy(result.boxes.xyxy).astype(float),
+                                       _detections_to_numpy(result.boxes.conf).astype(float),
+                                       _detections_to_numpy(result.boxes.cls).astype(int),
+                                       result.names)
+                if cache_key:
+                    self.cache.put(cache_key[0], tile_detections)
+                self._add_tile_detections(detections, key, y_offset, tile_detections)
+        if self.cache is not None:
+            self.cache.evict()
+
+        for key in results_by_key:
+            if results_by_key[key] is not None:
+                continue
+            page_detections = detections.get(key, [])
+            if page_detections:
+                boxes = np.concatenate([d[0] for d in page_detections])
+                confidences = np.concatenate([d[1] for d in page_detections])
+                class_ids = np.concatenate([d[2] for d in page_detections])
+                names = page_detections[0][3]
+                # Objects inside the overlap band are seen by two tiles; keep the best box per class
+                keep = []
+                for class_id in np.unique(class_ids):
+                    indices = np.flatnonzero(class_ids == class_id)
+                    keep.extend(indices[non_max_suppression(boxes[indices], confidences[indices])])
+                keep = np.sort(np.array(keep, dtype=int))
+                boxes, confidences, class_ids = boxes[keep], confidences[keep], class_ids[keep]
+            else:
+                boxes, confidences, class_ids, names = np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=int), {}
+            results_by_key[key] = self.intelligence.build_visual_elements(boxes, confidences, class_ids, names)
+
+        self.stats['pages'] += page_count
+        self.stats['tiles'] += len(tiles)
+        self.stats['seconds'] += time.perf_counter() - start
+        return results_by_key
+
+    def pages_per_minute(self):
+        """Throughput over everything flushed so far"""
+        if not self.stats['seconds']:
+            return 0.0
+        return self.stats['pages'] * 60.0 / self.stats['seconds']
+
+# Visual regression: fixed-size tiles, per-channel difference above which a pixel counts as changed,
+# and the share of changed pixels that marks a whole tile as changed (ignores anti-aliasing noise)
+REGRESSION_TILE_SIZE = 32
+REGRESSION_PIXEL_THRESHOLD = 24
+REGRESSION_TILE_FRACTION = 0.01
+
+def _pad_to_tiles(image, tile_size):
+    """Zero-pad an image so its height and width are whole numbers of tiles"""
+    height, width, channels = image.shape
+    rows, cols = -(-height // tile_size), -(-width // tile_size)
+    if (rows * tile_size, cols * tile_size) == (height, width):
+        return image
+    padded = np.zeros((rows * tile_size, cols * tile_size, channels), dtype=image.dtype)
+    padded[:height, :width] = image
+    return padded
+
+def _tile_view(image, tile_size):
+    """View a padded image as (rows, cols, tile, tile, channels) without copying"""
+    height, width, channels = image.shape
+    return image.reshape(height // tile_size, tile_size, width // tile_size, tile_size, channels).swapaxes(1, 2)
+
+def tiles_differ(first, second, tile_size):
+    """Per-tile exact inequality of two padded images of the same shape, compared eight bytes at a time"""
+    height, width, channels = first.shape
+    rows, cols = height // tile_size, width // tile_size
+    run = tile_size * channels
+    first, second = np.ascontiguousarray(first), np.ascontiguousarray(second)
+    if run % 8:
+        word_type, words = np.uint8, run
+    else:
+        word_type, words = np.uint64, run // 8
+    first = first.reshape(height, -1).view(word_type).reshape(rows, tile_size, cols, words)
+    second = second.reshape(height, -1).view(word_type).reshape(rows, tile_size, cols, words)
+    return (first != second).any(axis=(1, 3))
+
+def _changed_tile_regions(changed, changed_pixels, tile_size, height, width):
+    """Group 8-connected changed tiles into regions with pixel bounding boxes"""
+    regions = []
+    seen = np.zeros_like(changed)
+    rows, cols = changed.shape
+    for row, col in zip(*np.nonzero(changed)):
+        if seen[row, col]:
+            continue
+        seen[row, col] = True
+        stack = [(row, col)]
+        tiles = []
+        while stack:
+            r, c = stack.pop()
+            tiles.append((r, c))
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < rows and 0 <= nc < cols and changed[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        stack.append((nr, nc))
+        tile_rows = [r for r, _ in tiles]
+        tile_cols = [c for _, c in tiles]
+        bbox = [int(min(tile_cols)) * tile_size, int(min(tile_rows)) * tile_size,
+                min(int(max(tile_cols) + 1) * tile_size, width), min(int(max(tile_rows) + 1) * tile_size, height)]
+        area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+        pixels = int(sum(changed_pixels[r, c] for r, c in tiles))
+        regions.append({'bbox': bbox, 'tiles': len(tiles), 'changed_pixels': pixels,
+                        'changed_ratio': float(pixels / max(area, 1))})
+    return regions
+
+def compare_screenshots(baseline, current, tile_size=REGRESSION_TILE_SIZE,
+                        pixel_threshold=REGRESSION_PIXEL_THRESHOLD, tile_fraction=REGRESSION_TILE_FRACTION):
+    """Diff two screenshot frames tile by tile; returns the changed regions and comparison stats"""
+    start = time.perf_counter()
+    result = {'identical': False, 'regions': [], 'tiles': 0, 'tiles_equal': 0, 'size_changed': False,
+              'baseline_size': None, 'current_size': None, 'seconds': 0.0}
+    # Byte-identical captures need no decoding at all
+    if baseline.png_bytes == current.png_bytes:
+        result['identical'] = True
+        result['seconds'] = time.perf_counter() - start
+        return result
+    baseline_image, current_image = baseline.image, current.image
+    if baseline_image is None or current_image is None:
+        raise ValueError('Screenshot could not be decoded')
+    result['baseline_size'] = list(baseline_image.shape[1::-1])
+    result['current_size'] = list(current_image.shape[1::-1])
+    # Compare the common area; whatever only one of the screenshots has is a change of its own
+    height = min(baseline_image.shape[0], current_image.shape[0])
+    width = min(baseline_image.shape[1], current_image.shape[1])
+    baseline_image = _pad_to_tiles(baseline_image[:height, :width], tile_size)
+    current_image = _pad_to_tiles(current_image[:height, :width], tile_size)
+    baseline_tiles, current_tiles = _tile_view(baseline_image, tile_size), _tile_view(current_image, tile_size)
+    result['tiles'] = baseline_tiles.shape[0] * baseline_tiles.shape[1]
+
+    # Only tiles that are not exactly equal are diffed pixel by pixel. Checksums can't stand in for this
+    # (a mirrored glyph keeps every row and column sum), and a word-wise equality pass is cheaper anyway
+    suspect = tiles_differ(baseline_image, current_image, tile_size)
+    result['tiles_equal'] = result['tiles'] - int(suspect.sum())
+    changed_pixels = np.zeros(suspect.shape, dtype=np.int64)
+    if suspect.any():
+        difference = np.abs(baseline_tiles[suspect].astype(np.int16) - current_tiles[suspect].astype(np.int16))
+        changed_pixels[suspect] = (difference.max(axis=-1) > pixel_threshold).sum(axis=(1, 2))
+    changed = changed_pixels > tile_fraction * tile_size * tile_size
+    result['regions'] = _changed_tile_regions(changed, changed_pixels, tile_size, height, width)
+
+    full_height = max(result['baseline_size'][1], result['current_size'][1])
+    full_width = max(result['baseline_size'][0], result['current_size'][0])
+    if (full_height, full_width) != (height, width):
+        result['size_changed'] = True
+        for bbox in ([0, height, full_width, full_height], [width, 0, full_width, height]):
+            area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+            if area > 0:
+                result['regions'].append({'bbox': bbox, 'tiles': 0, 'changed_pixels': area, 'changed_ratio': 1.0})
+    result['identical'] = not result['regions']
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def baseline_path_for(baseline, url):
+    """A baseline given as a PNG file is used directly; a directory holds one screenshot per page"""
+    if baseline.lower().endswith('.png'):
+        return baseline
+    return os.path.join(baseline, screenshot_filename(url))
+
+# Seconds one page (render, forms, post-login and dashboard probes) may take before the rest is skipped
+DEFAULT_PAGE_BUDGET = 180
+
+class BudgetExhausted(Exception):
+    """Raised when an operation asks for a timeout after its time budget has run out"""
+
+class TimeBudget:
+    """Deadline for a run or a page; operations take their timeouts from what is left of it and its parents"""
+
+    def __init__(self, seconds=None, parent=None):
+        self.parent = parent
+        self.deadline = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left (never negative), or None when neither this budget nor a parent has a deadline"""
+        left = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        parent_left = self.parent.remaining() if self.parent else None
+        if left is None or parent_left is None:
+            return parent_left if left is None else left
+        return min(left, parent_left)
+
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, ms):
+        """A Playwright timeout of at most ms milliseconds that ends by the deadline"""
+        remaining = self.remaining()
+        if remaining is None:
+            return ms
+        if remaining <= 0:
+            raise BudgetExhausted('Time budget exhausted')
+        # Playwright treats 0 as "no timeout", so never hand it out
+        return max(1, min(ms, int(remaining * 1000)))
+
+    def child(self, seconds=None):
+        """A nested budget that also ends when this one does"""
+        return TimeBudget(seconds, parent=self)
+
+def skipped_test_case(test_type, action, element):
+    """Test case for work left pending when the time budget ran out"""
+    return {
+        'Type': test_type,
+        'Action': action,
+        'Element': element,
+        'Expected Result': 'Test should run within the time budget',
+        'Actual Result': 'Skipped: time budget exhausted',
+        'Notes': '[Time Budget]'
+    }
+
+# Milliseconds a probe still gets to navigate back after the budget has run out
+PROBE_RETURN_GRACE = 5000
+
+def go_back_after_probe(page, budget, timeout=30000, settle=1000):
+    """Navigate back after a probe's click; once the budget is spent this is a brief best effort, so the page is
+    still left where the probes found it"""
+    try:
+        back_timeout = budget.timeout(timeout)
+    except BudgetExhausted:
+        back_timeout = PROBE_RETURN_GRACE
+    try:
+        page.go_back(timeout=back_timeout)
+    except Exception:
+        if not budget.expired():
+            raise
+        return
+    try:
+        page.wait_for_timeout(budget.timeout(settle))
+    except BudgetExhausted:
+        pass
+
+# Most elements of one category analyzed per page (0 or None for no limit); larger sets are sampled by stratum
+DEFAULT_ELEMENT_CAPS = {'links': 2000, 'navigation_links': 500, 'buttons': 500, 'inputs': 500, 'cards': 500}
+# Landmarks that give an element its container for sampling (the page body otherwise)
+SAMPLING_CONTAINERS = ['nav', 'header', 'footer', 'aside', 'main', 'form', 'table', 'dialog']
+
+def stratified_sample(keys, cap):
+    """Indexes (in document order) to keep out of elements with these stratum keys, plus dropped counts per stratum
+
+    Each stratum keeps at least one element while the cap allows, the rest of the cap is shared in proportion
+    to stratum size, and picks are spread evenly through each stratum.
+    """
+    if not cap or len(keys) <= cap:
+        return list(range(len(keys))), {}
+    strata = defaultdict(list)
+    for index, key in enumerate(keys):
+        strata[key].append(index)
+    # Largest strata first; when there are more strata than the cap, the smallest ones go entirely
+    ordered = sorted(strata, key=lambda key: len(strata[key]), reverse=True)
+    quotas = {key: 0 for key in ordered}
+    for key in ordered[:cap]:
+        quotas[key] = 1
+    spare = cap - sum(quotas.values())
+    if spare > 0:
+        extra = sum(len(strata[key]) - 1 for key in ordered)
+        shares = {key: spare * (len(strata[key]) - 1) / extra for key in ordered}
+        for key in ordered:
+            quotas[key] += int(shares[key])
+        # Largest remainders take the slots rounding left over
+        leftover = cap - sum(quotas.values())
+        for key in sorted(ordered, key=lambda key: shares[key] - int(shares[key]), reverse=True)[:leftover]:
+            quotas[key] += 1
+    kept = []
+    dropped = {}
+    for key in ordered:
+        members, quota = strata[key], min(quotas[key], len(strata[key]))
+        kept.extend(members[i * len(members) // quota] for i in range(quota))
+        if quota < len(members):
+            dropped['/'.join(str(part) for part in key)] = len(members) - quota
+    return sorted(kept), dropped
+
+def record_sampling(sampling, category, total, kept, dropped):
+    """Add one sampling decision to a report dict ({category: {'total', 'kept', 'dropped'}})"""
+    if sampling is None or not dropped:
+        return
+    entry = sampling.setdefault(category, {'total': 0, 'kept': 0, 'dropped': {}})
+    entry['total'] += total
+    entry['kept'] += kept
+    for stratum, count in dropped.items():
+        entry['dropped'][stratum] = entry['dropped'].get(stratum, 0) + count
+
+def sampling_test_cases(sampling):
+    """One report row per category that was sampled, listing what was left out"""
+    cases = []
+    for category, entry in sampling.items():
+        dropped = sorted(entry['dropped'].items(), key=lambda item: item[1], reverse=True)
+        cases.append({
+            'Type': 'Sampling',
+            'Action': f'Analyze {category.replace("_", " ")}',
+            'Element': f'{entry["total"]} {category.replace("_", " ")}',
+            'Expected Result': 'Every element analyzed, or a representative sample of each kind',
+            'Actual Result': f'Analyzed {entry["kept"]} of {entry["total"]}; sampled out: '
+                             + ', '.join(f'{stratum} ({count})' for stratum, count in dropped),
+            'Notes': '[Adaptive Sampling]'
+        })
+    return cases
+
+def nearest_ancestor(element, names):
+    """Closest bs4 ancestor whose tag name is in names (a plain walk; find_parent is far slower per call)"""
+    for parent in element.parents:
+        if parent.name in names:
+            return parent
+    return None
+
+def sampling_container(element):
+    """Nearest landmark ancestor's tag name of a bs4 element, for stratifying samples"""
+    container = nearest_ancestor(element, SAMPLING_CONTAINERS)
+    return container.name if container else 'body'
+
 class WebsiteIntelligence:
     """Machine Learning powered website analysis and test case generation"""
     
@@ -131,15 +1392,42 @@ class WebsiteIntelligence:
         self.tested_links = set()
         self.tested_forms = set()
         self.tested_cards = set()
+        self._tracking_lock = threading.Lock()
         
         # Computer Vision models and tools
         self.cv_models = {}
+        self._vision_model_lock = threading.Lock()
         self.element_detectors = {}
         self.visual_analysis_enabled = COMPUTER_VISION_AVAILABLE
+        self.visual_mode = 'yolo'
+        self._yolo_class_lookups = {}
+        # Screenshots stay in memory unless a directory is given to persist them
+        self.screenshot_dir = None
+        # Tall screenshots are cut into tiles (page-width squares by default) and batched
+        self.visual_tile_height = None
+        self.visual_batch_size = 8
+        # Inference input size; the torch backend resizes per call, exported models are built for it
+        self.vision_imgsz = DEFAULT_VISION_IMGSZ
+        # Optional VisualResultCache of per-tile detections keyed by perceptual hash
+        self.visual_cache = None
+        # Visual regression: baseline PNG file or directory, and whether to overwrite it with new captures
+        self.baseline = None
+        self.update_baseline = False
+        # Optional AuthSessionCache so logins are reused across forms and runs
+        self.auth_sessions = None
+        # Per-category element caps; pages with more are sampled by stratum
+        self.element_caps = dict(DEFAULT_ELEMENT_CAPS)
+        # Time budgets: the whole run (unbounded unless set) and seconds per page within it
+        self.run_budget = TimeBudget()
+        self.page_budget = DEFAULT_PAGE_BUDGET
         
         if self.visual_analysis_enabled:
             self.initialize_computer_vision_models()
     
+    def new_page_budget(self):
+        """Budget for one page, ending at the page limit or the end of the run budget, whichever is first"""
+        return self.run_budget.child(self.page_budget)
+    
     def reset_test_tracking(self):
         """Reset tracking of tested elements for new website"""
         self.tested_elements.clear()
@@ -186,21 +1474,144 @@ class WebsiteIntelligence:
             element_id = element.get('id', '') or element.get('name', '') or 'unnamed'
             return f"{element_type}:{element_id}"
     
+    @traced('analyze_website_structure')
     def analyze_website_structure(self, soup, url):
         """Analyze website structure using ML techniques"""
+        # What the element caps left out, per category
+        sampling = {}
         analysis = {
             'website_type': self.detect_website_type(soup, url),
             'forms': self.analyze_forms(soup),
-            'navigation': self.analyze_navigation(soup),
+            'navigation': self.analyze_navigation(soup, sampling),
             'content_areas': self.analyze_content_areas(soup),
-            'interactive_elements': self.analyze_interactive_elements(soup),
-            'data_structures': self.analyze_data_structures(soup)
+            'interactive_elements': self.analyze_interactive_elements(soup, sampling),
+            'data_structures': self.analyze_data_structures(soup, sampling),
+            'sampling': sampling
         }
         return analysis
     
+    def sample_elements(self, category, elements, key, sampling=None):
+        """Elements within the category's cap, sampled by the stratum key(element) returns when over it"""
+        cap = self.element_caps.get(category)
+        if not cap or len(elements) <= cap:
+            return elements
+        kept, dropped = stratified_sample([key(element) for element in elements], cap)
+        record_sampling(sampling, category, len(elements), len(kept), dropped)
+        return [elements[index] for index in kept]
+    
+    def live_structure_vocabulary(self):
+        """Keywords LIVE_STRUCTURE_SCRIPT checks for in the page"""
+        pattern_words = {word for patterns in self.element_patterns.values() for word in patterns}
+        return {
+            'site': sorted({word for keywords in self.website_types.values() for word in keywords}),
+            'html': sorted(pattern_words | set(LIVE_HTML_WORDS)),
+            'text': sorted(pattern_words | set(LIVE_TEXT_WORDS)),
+            'containers': ', '.join(SAMPLING_CONTAINERS)
+        }
+    
+    @traced('analyze_live_structure')
+    def analyze_live_structure(self, page, url=None):
+        """analyze_website_structure for a live Playwright page, from one in-page script instead of page.content()"""
+        structure = page.evaluate(LIVE_STRUCTURE_SCRIPT, self.live_structure_vocabulary())
+        return self.build_live_analysis(structure, url or page.url)
+    
+    def build_live_analysis(self, structure, url):
+        """Turn LIVE_STRUCTURE_SCRIPT output into the dict analyze_website_structure returns"""
+        sampling = {}
+        forms = []
+        for form in structure['forms']:
+            forms.append({
+                'action': form['attrs'].get('action', ''),
+                'method': form['attrs'].get('method', 'get'),
+                'fields': [self.field_info_from(attrs) for attrs in form['fields']],
+                'purpose': self.form_purpose_from(set(form['text_hits']), set(form['html_hits'])),
+                'complexity': self.form_complexity_from(form['fields'])
+            })
+        
+        navigation = []
+        for nav in structure['navigation']:
+            html_hits = set(nav['html_hits'])
+            navigation.append({
+                'type': self.navigation_type_from(html_hits),
+                'links': self.sample_elements('navigation_links', nav['links'],
+                                              lambda link: (self.link_purpose_from(link['text'].lower()),),
+                                              sampling),
+                'structure': {'depth': nav['depth'], 'breadth': len(nav['links']), 'hierarchical': nav['lists'] > 1}
+            })
+        
+        content_areas = [{
+            'type': self.content_type_from(set(area['html_hits'])),
+            'size': area['size'],
+            'elements': area['elements'],
+            'interactive': area['interactive']
+        } for area in structure['content_areas']]
+        
+        buttons = []
+        for button in self.sample_elements('buttons', structure['buttons'],
+                                           lambda button: (self.button_purpose_from(button['text'].lower()),
+                                                           button['container']), sampling):
+            attrs = button['attrs']
+            buttons.append({
+                'text': button['text'].strip(),
+                'type': attrs.get('type', 'button'),
+                'purpose': self.button_purpose_from(button['text'].lower()),
+                'style': self.button_style_from(attrs.get('class', '').split(), attrs.get('style', ''))
+            })
+        
+        nav_types = [self.navigation_type_from(set(hits)) for hits in structure['link_navs']]
+        def link_stratum(link):
+            context = nav_types[link['nav']] if link['nav'] >= 0 else link['container']
+            return (self.link_purpose_from(link['text'].lower()), context,
+                    'external' if self.is_external_link(link['href']) else 'internal')
+        links = [{
+            'text': link['text'].strip(),
+            'href': link['href'],
+            'purpose': self.link_purpose_from(link['text'].lower()),
+            'external': self.is_external_link(link['href'])
+        } for link in self.sample_elements('links', structure['links'], link_stratum, sampling)]
+        
+        modals = [{
+            'type': self.modal_type_from(set(modal['text_hits'])),
+            'content': modal['content'],
+            'interactive': modal['interactive']
+        } for modal in structure['modals']]
+        
+        cards = [{
+            'type': self.card_type_from(set(card['text_hits'])),
+            'elements': card['elements'],
+            'interactive': card['interactive'],
+            'has_image': card['has_image']
+        } for card in self.sample_elements('cards', structure['cards'],
+                                           lambda card: (self.card_type_from(set(card['text_hits'])),), sampling)]
+        
+        return {
+            'website_type': self.website_type_from(set(structure['site_hits']), url),
+            'forms': forms,
+            'navigation': navigation,
+            'content_areas': content_areas,
+            'interactive_elements': {
+                'buttons': buttons,
+                'links': links,
+                'inputs': [self.input_info_from(attrs) for attrs in
+                           self.sample_elements('inputs', structure['inputs'],
+                                                lambda attrs: (self.field_purpose_from(attrs), attrs.get('type', 'text')),
+                                                sampling)],
+                'modals': modals
+            },
+            'data_structures': {
+                'tables': structure['tables'],
+                'lists': structure['lists'],
+                'cards': cards
+            },
+            'sampling': sampling
+        }
+    
     def detect_website_type(self, soup, url):
         """Detect website type using content analysis"""
-        text_content = soup.get_text().lower()
+        return self.website_type_from(soup.get_text().lower(), url)
+    
+    def website_type_from(self, text_content, url):
+        """Website type from lowercase page text (or the set of keywords found in it) and the URL"""
         url_lower = url.lower()
         
         # Create feature vector
@@ -237,24 +1648,28 @@ class WebsiteIntelligence:
         field_analysis = []
         
         for field in fields:
-            field_info = {
-                'type': field.get('type', 'text'),
-                'name': field.get('name', ''),
-                'id': field.get('id', ''),
-                'placeholder': field.get('placeholder', ''),
-                'required': field.has_attr('required'),
-                'purpose': self.detect_field_purpose(field),
-                'validation': self.detect_field_validation(field)
-            }
-            field_analysis.append(field_info)
+            field_analysis.append(self.field_info_from(field.attrs))
         
         return field_analysis
     
+    def field_info_from(self, attrs):
+        """Field analysis from an element's attribute dict"""
+        return {
+            'type': attrs.get('type', 'text'),
+            'name': attrs.get('name', ''),
+            'id': attrs.get('id', ''),
+            'placeholder': attrs.get('placeholder', ''),
+            'required': 'required' in attrs,
+            'purpose': self.field_purpose_from(attrs),
+            'validation': self.field_validation_from(attrs)
+        }
+    
     def detect_form_purpose(self, form):
         """Detect form purpose using content analysis"""
-        form_text = form.get_text().lower()
-        form_html = str(form).lower()
-        
+        return self.form_purpose_from(form.get_text().lower(), str(form).lower())
+    
+    def form_purpose_from(self, form_text, form_html):
+        """Form purpose from lowercase text and HTML (or the sets of pattern words found in them)"""
         scores = {}
         for purpose, patterns in self.element_patterns.items():
             score = sum(1 for pattern in patterns if pattern in form_text or pattern in form_html)
@@ -266,7 +1681,11 @@ class WebsiteIntelligence:
     
     def detect_field_purpose(self, field):
         """Detect field purpose using pattern matching"""
-        field_attrs = ' '.join([str(v) for v in field.attrs.values()]).lower()
+        return self.field_purpose_from(field.attrs)
+    
+    def field_purpose_from(self, attrs):
+        """Field purpose from an element's attribute dict"""
+        field_attrs = ' '.join([str(v) for v in attrs.values()]).lower()
         
         for purpose, patterns in self.form_field_patterns.items():
             if any(pattern in field_attrs for pattern in patterns):
@@ -276,20 +1695,27 @@ class WebsiteIntelligence:
     
     def detect_field_validation(self, field):
         """Detect field validation rules"""
+        return self.field_validation_from(field.attrs)
+    
+    def field_validation_from(self, attrs):
+        """Field validation rules from an element's attribute dict"""
         validation = {
-            'required': field.has_attr('required'),
-            'pattern': field.get('pattern', ''),
-            'min_length': field.get('minlength', ''),
-            'max_length': field.get('maxlength', ''),
-            'min_value': field.get('min', ''),
-            'max_value': field.get('max', '')
+            'required': 'required' in attrs,
+            'pattern': attrs.get('pattern', ''),
+            'min_length': attrs.get('minlength', ''),
+            'max_length': attrs.get('maxlength', ''),
+            'min_value': attrs.get('min', ''),
+            'max_value': attrs.get('max', '')
         }
         return validation
     
     def assess_form_complexity(self, form):
         """Assess form complexity score"""
-        fields = form.find_all(['input', 'select', 'textarea'])
-        required_fields = len([f for f in fields if f.has_attr('required')])
+        return self.form_complexity_from([field.attrs for field in form.find_all(['input', 'select', 'textarea'])])
+    
+    def form_complexity_from(self, fields):
+        """Form complexity from the attribute dicts of its fields"""
+        required_fields = len([f for f in fields if 'required' in f])
         validation_fields = len([f for f in fields if f.get('pattern') or f.get('minlength') or f.get('maxlength')])
         
         complexity_score = len(fields) + (required_fields * 2) + (validation_fields * 3)
@@ -301,7 +1727,7 @@ class WebsiteIntelligence:
         else:
             return 'complex'
     
-    def analyze_navigation(self, soup):
+    def analyze_navigation(self, soup, sampling=None):
         """Analyze navigation structure"""
         nav_elements = soup.find_all(['nav', 'ul', 'ol'])
         navigation = []
@@ -309,9 +1735,12 @@ class WebsiteIntelligence:
         for nav in nav_elements:
             links = nav.find_all('a')
             if links:
+                nav_links = [{'text': link.get_text().strip(), 'href': link.get('href', '')} for link in links]
                 nav_info = {
                     'type': self.detect_navigation_type(nav),
-                    'links': [{'text': link.get_text().strip(), 'href': link.get('href', '')} for link in links],
+                    'links': self.sample_elements('navigation_links', nav_links,
+                                                  lambda link: (self.link_purpose_from(link['text'].lower()),),
+                                                  sampling),
                     'structure': self.analyze_navigation_structure(nav)
                 }
                 navigation.append(nav_info)
@@ -320,9 +1749,10 @@ class WebsiteIntelligence:
     
     def detect_navigation_type(self, nav):
         """Detect navigation type"""
-        nav_text = nav.get_text().lower()
-        nav_html = str(nav).lower()
-        
+        return self.navigation_type_from(str(nav).lower())
+    
+    def navigation_type_from(self, nav_html):
+        """Navigation type from lowercase HTML (or the set of words found in it)"""
         if 'main' in nav_html or 'primary' in nav_html:
             return 'main_navigation'
         elif 'breadcrumb' in nav_html or 'bread' in nav_html:
@@ -375,9 +1805,10 @@ class WebsiteIntelligence:
     
     def detect_content_type(self, element):
         """Detect content type"""
-        text = element.get_text().lower()
-        element_html = str(element).lower()
-        
+        return self.content_type_from(str(element).lower())
+    
+    def content_type_from(self, element_html):
+        """Content type from lowercase HTML (or the set of words found in it)"""
         if 'header' in element_html or 'title' in element_html:
             return 'header'
         elif 'footer' in element_html:
@@ -391,19 +1822,21 @@ class WebsiteIntelligence:
         else:
             return 'general'
     
-    def analyze_interactive_elements(self, soup):
+    def analyze_interactive_elements(self, soup, sampling=None):
         """Analyze interactive elements"""
         interactive = {
-            'buttons': self.analyze_buttons(soup),
-            'links': self.analyze_links(soup),
-            'inputs': self.analyze_inputs(soup),
+            'buttons': self.analyze_buttons(soup, sampling),
+            'links': self.analyze_links(soup, sampling),
+            'inputs': self.analyze_inputs(soup, sampling),
             'modals': self.analyze_modals(soup)
         }
         return interactive
     
-    def analyze_buttons(self, soup):
+    def analyze_buttons(self, soup, sampling=None):
         """Analyze button patterns"""
-        buttons = soup.find_all('button')
+        buttons = self.sample_elements('buttons', soup.find_all('button'),
+                                       lambda button: (self.detect_button_purpose(button), sampling_container(button)),
+                                       sampling)
         button_analysis = []
         
         for button in buttons:
@@ -419,8 +1852,10 @@ class WebsiteIntelligence:
     
     def detect_button_purpose(self, button):
         """Detect button purpose"""
-        button_text = button.get_text().lower()
-        
+        return self.button_purpose_from(button.get_text().lower())
+    
+    def button_purpose_from(self, button_text):
+        """Button purpose from its lowercase text"""
         if any(word in button_text for word in ['submit', 'save', 'create', 'add']):
             return 'submit'
         elif any(word in button_text for word in ['cancel', 'close', 'back']):
@@ -434,9 +1869,10 @@ class WebsiteIntelligence:
     
     def analyze_button_style(self, button):
         """Analyze button styling"""
-        classes = button.get('class', [])
-        style = button.get('style', '')
-        
+        return self.button_style_from(button.get('class', []), button.get('style', ''))
+    
+    def button_style_from(self, classes, style):
+        """Button styling from its class list and inline style"""
         return {
             'classes': classes,
             'inline_style': style,
@@ -445,9 +1881,18 @@ class WebsiteIntelligence:
             'danger': any('danger' in c.lower() or 'delete' in c.lower() for c in classes)
         }
     
-    def analyze_links(self, soup):
+    def analyze_links(self, soup, sampling=None):
         """Analyze link patterns"""
-        links = soup.find_all('a')
+        nav_types = {}
+        def stratum(link):
+            # Links in a navigation list are told apart by its type, others by their landmark
+            nav = nearest_ancestor(link, ('nav', 'ul', 'ol'))
+            if nav is not None and id(nav) not in nav_types:
+                nav_types[id(nav)] = self.detect_navigation_type(nav)
+            context = nav_types[id(nav)] if nav is not None else sampling_container(link)
+            return (self.detect_link_purpose(link), context,
+                    'external' if self.is_external_link(link.get('href', '')) else 'internal')
+        links = self.sample_elements('links', soup.find_all('a'), stratum, sampling)
         link_analysis = []
         
         for link in links:
@@ -463,9 +1908,10 @@ class WebsiteIntelligence:
     
     def detect_link_purpose(self, link):
         """Detect link purpose"""
-        link_text = link.get_text().lower()
-        href = link.get('href', '').lower()
-        
+        return self.link_purpose_from(link.get_text().lower())
+    
+    def link_purpose_from(self, link_text):
+        """Link purpose from its lowercase text"""
         if any(word in link_text for word in ['home', 'main', 'index']):
             return 'home'
         elif any(word in link_text for word in ['about', 'info', 'company']):
@@ -483,32 +1929,31 @@ class WebsiteIntelligence:
         """Check if link is external"""
         return href.startswith('http') and not href.startswith('/')
     
-    def analyze_inputs(self, soup):
+    def analyze_inputs(self, soup, sampling=None):
         """Analyze input patterns"""
-        inputs = soup.find_all('input')
+        inputs = self.sample_elements('inputs', soup.find_all('input'),
+                                      lambda input_elem: (self.detect_input_purpose(input_elem),
+                                                          input_elem.get('type', 'text')), sampling)
         input_analysis = []
         
         for input_elem in inputs:
-            input_info = {
-                'type': input_elem.get('type', 'text'),
-                'name': input_elem.get('name', ''),
-                'placeholder': input_elem.get('placeholder', ''),
-                'required': input_elem.has_attr('required'),
-                'purpose': self.detect_input_purpose(input_elem)
-            }
-            input_analysis.append(input_info)
+            input_analysis.append(self.input_info_from(input_elem.attrs))
         
         return input_analysis
     
+    def input_info_from(self, attrs):
+        """Input analysis from an element's attribute dict"""
+        return {
+            'type': attrs.get('type', 'text'),
+            'name': attrs.get('name', ''),
+            'placeholder': attrs.get('placeholder', ''),
+            'required': 'required' in attrs,
+            'purpose': self.field_purpose_from(attrs)
+        }
+    
     def detect_input_purpose(self, input_elem):
         """Detect input purpose"""
-        attrs = ' '.join([str(v) for v in input_elem.attrs.values()]).lower()
-        
-        for purpose, patterns in self.form_field_patterns.items():
-            if any(pattern in attrs for pattern in patterns):
-                return purpose
-        
-        return 'general'
+        return self.field_purpose_from(input_elem.attrs)
     
     def analyze_modals(self, soup):
         """Analyze modal patterns"""
@@ -527,8 +1972,10 @@ class WebsiteIntelligence:
     
     def detect_modal_type(self, modal):
         """Detect modal type"""
-        modal_text = modal.get_text().lower()
-        
+        return self.modal_type_from(modal.get_text().lower())
+    
+    def modal_type_from(self, modal_text):
+        """Modal type from lowercase text (or the set of words found in it)"""
         if any(word in modal_text for word in ['login', 'signin']):
             return 'login_modal'
         elif any(word in modal_text for word in ['register', 'signup']):
@@ -538,12 +1985,12 @@ class WebsiteIntelligence:
         else:
             return 'general_modal'
     
-    def analyze_data_structures(self, soup):
+    def analyze_data_structures(self, soup, sampling=None):
         """Analyze data structures like tables and lists"""
         data_structures = {
             'tables': self.analyze_tables(soup),
             'lists': self.analyze_lists(soup),
-            'cards': self.analyze_cards(soup)
+            'cards': self.analyze_cards(soup, sampling)
         }
         return data_structures
     
@@ -583,9 +2030,10 @@ class WebsiteIntelligence:
         
         return list_analysis
     
-    def analyze_cards(self, soup):
+    def analyze_cards(self, soup, sampling=None):
         """Analyze card structures"""
         cards = soup.find_all(['div', 'article'], class_=re.compile(r'card|item|product', re.I))
+        cards = self.sample_elements('cards', cards, lambda card: (self.detect_card_type(card),), sampling)
         card_analysis = []
         
         for card in cards:
@@ -601,9 +2049,10 @@ class WebsiteIntelligence:
     
     def detect_card_type(self, card):
         """Detect card type"""
-        card_text = card.get_text().lower()
-        card_html = str(card).lower()
-        
+        return self.card_type_from(card.get_text().lower())
+    
+    def card_type_from(self, card_text):
+        """Card type from lowercase text (or the set of words found in it)"""
         if any(word in card_text for word in ['product', 'item', 'goods']):
             return 'product_card'
         elif any(word in card_text for word in ['user', 'profile', 'person']):
@@ -613,8 +2062,14 @@ class WebsiteIntelligence:
         else:
             return 'general_card'
     
+    @traced('generate_intelligent_test_cases')
     def generate_intelligent_test_cases(self, analysis, url):
         """Generate intelligent test cases based on analysis with deduplication"""
+        # The tested_* sets are per website, so pooled pages take turns
+        with self._tracking_lock:
+            return self._generate_intelligent_test_cases(analysis, url)
+    
+    def _generate_intelligent_test_cases(self, analysis, url):
         test_cases = []
         
         # Reset tracking for new website
@@ -638,6 +2093,9 @@ class WebsiteIntelligence:
         data_cases = self.generate_data_structure_test_cases_deduplicated(analysis['data_structures'], url)
         test_cases.extend(data_cases)
         
+        # Record what the element caps left out of the analysis
+        test_cases.extend(sampling_test_cases(analysis.get('sampling', {})))
+        
         return test_cases
     
     def generate_form_test_cases_deduplicated(self, form, url):
@@ -1039,8 +2497,7 @@ class WebsiteIntelligence:
     def initialize_computer_vision_models(self):
         """Initialize computer vision models for web element detection"""
         try:
-            # Initialize YOLO model for general object detection
-            self.cv_models['yolo'] = YOLO('yolov8n.pt')
+            # The YOLO model itself is loaded on first use, once the vision backend is known
             
             # Define web element classes for detection
             self.element_classes = {
@@ -1060,91 +2517,178 @@ class WebsiteIntelligence:
             print(f"Failed to initialize Computer Vision models: {e}")
             self.visual_analysis_enabled = False
     
+    def vision_model(self):
+        """Detector for visual analysis, loading the default PyTorch weights unless a backend was configured"""
+        if 'yolo' not in self.cv_models:
+            # Several threads may ask for the model at once; the weights are loaded only once
+            with self._vision_model_lock:
+                if 'yolo' not in self.cv_models:
+                    try:
+                        self.cv_models['yolo'] = load_vision_model('torch', self.vision_imgsz)
+                    except Exception as e:
+                        print(f"Failed to initialize Computer Vision models: {e}")
+                        self.visual_analysis_enabled = False
+                        raise
+        return self.cv_models['yolo']
+    
+    def configure_vision_backend(self, backend='torch', imgsz=DEFAULT_VISION_IMGSZ, threads=None, int8=False):
+        """Select the detector used for visual analysis: ultralytics on PyTorch, or an exported ONNX/OpenVINO model"""
+        self.vision_imgsz = imgsz
+        if backend == 'torch' and not threads and not int8:
+            return
+        if cv2 is None:
+            print("OpenCV is required for visual analysis")
+            self.visual_analysis_enabled = False
+            return
+        try:
+            self.cv_models['yolo'] = load_vision_model(backend, imgsz, threads, int8)
+            self.visual_analysis_enabled = True
+            print(f"Vision backend: {backend} ({imgsz}px{', int8' if int8 and backend != 'torch' else ''})")
+        except Exception as e:
+            print(f"Failed to initialize the {backend} vision backend: {e}")
+            self.visual_analysis_enabled = False
+    
+    @traced('capture screenshot')
     def capture_website_screenshot(self, url, page=None):
-        """Capture screenshot of the website for visual analysis"""
+        """Capture a full-page screenshot of the website as an in-memory frame"""
         try:
             if page:
                 # Use existing Playwright page
-                screenshot_path = tempfile.mktemp(suffix='.png')
-                page.screenshot(path=screenshot_path, full_page=True)
-                return screenshot_path
+                frame = ScreenshotFrame(page.screenshot(full_page=True), url=url)
             else:
                 # Use Playwright to capture screenshot
-                from playwright.sync_api import sync_playwright
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
+                with shared_browser() as browser:
                     page = browser.new_page()
-                    page.goto(url, timeout=15000)
-                    screenshot_path = tempfile.mktemp(suffix='.png')
-                    page.screenshot(path=screenshot_path, full_page=True)
-                    browser.close()
-                    return screenshot_path
+                    try:
+                        page.goto(url, timeout=15000)
+                        frame = ScreenshotFrame(page.screenshot(full_page=True), url=url)
+                    finally:
+                        page.close()
+            if self.screenshot_dir:
+                os.makedirs(self.screenshot_dir, exist_ok=True)
+                frame.save(os.path.join(self.screenshot_dir, screenshot_filename(url)))
+            return frame
         except Exception as e:
             print(f"Failed to capture screenshot: {e}")
             return None
     
-    def analyze_visual_elements(self, screenshot_path):
-        """Analyze visual elements in the screenshot using computer vision"""
-        if not self.visual_analysis_enabled or not screenshot_path:
+    def analyze_visual_elements(self, screenshot):
+        """Analyze visual elements in a screenshot frame (or stored PNG path) using computer vision"""
+        if not self.visual_analysis_enabled or not screenshot:
             return {}
         
         try:
-            # Load the image
-            image = cv2.imread(screenshot_path)
-            if image is None:
-                return {}
-            
-            # Run YOLO detection
-            results = self.cv_models['yolo'](image)
-            
-            # Process results
-            visual_elements = {
-                'buttons': [],
-                'forms': [],
-                'links': [],
-                'images': [],
-                'text_areas': [],
-                'tables': [],
-                'videos': [],
-                'modals': []
-            }
-            
-            # Process detections
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Get bounding box coordinates
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = box.conf[0].cpu().numpy()
-                        class_id = int(box.cls[0].cpu().numpy())
-                        class_name = result.names[class_id]
-                        
-                        # Map YOLO classes to web elements
-                        element_type = self.map_yolo_class_to_web_element(class_name)
-                        
-                        if element_type and confidence > 0.5:  # Confidence threshold
-                            visual_elements[element_type].append({
-                                'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                                'confidence': float(confidence),
-                                'class': class_name,
-                                'center': [int((x1 + x2) / 2), int((y1 + y2) / 2)]
-                            })
-            
-            # Clean up screenshot
-            os.remove(screenshot_path)
-            
-            return visual_elements
-            
+            return self.analyze_visual_pages({'page': screenshot}).get('page', {})
         except Exception as e:
             print(f"Visual analysis failed: {e}")
             return {}
     
-    def map_yolo_class_to_web_element(self, yolo_class):
-        """Map YOLO detection classes to web element types"""
-        class_mapping = {
-            'person': None,  # Not relevant for web elements
-            'bicycle': None,
+    def new_visual_queue(self):
+        """VisualAnalysisQueue with this run's tiling, batching and cache settings"""
+        return VisualAnalysisQueue(self, tile_height=self.visual_tile_height, batch_size=self.visual_batch_size,
+                                   cache=self.visual_cache)
+    
+    def analyze_visual_pages(self, screenshots):
+        """Analyze several pages at once ({key: frame}); tiles from all pages share inference batches"""
+        if not self.visual_analysis_enabled:
+            return {key: {} for key in screenshots}
+        queue = self.new_visual_queue()
+        for key, screenshot in screenshots.items():
+            queue.add(key, screenshot)
+        return queue.flush()
+    
+    def active_visual_mode(self):
+        """The visual mode that can actually run here ('off' when its dependencies are missing)"""
+        if self.visual_mode == 'yolo' and self.visual_analysis_enabled:
+            return 'yolo'
+        if self.visual_mode == 'dom' and PLAYWRIGHT_AVAILABLE:
+            return 'dom'
+        return 'off'
+    
+    @traced('dom geometry')
+    def analyze_dom_geometry(self, url, page=None):
+        """Visual elements from the rendered DOM's geometry, in the same format as YOLO detections"""
+        try:
+            if page:
+                items = page.evaluate(DOM_GEOMETRY_SCRIPT)
+            else:
+                with shared_browser() as browser:
+                    page = browser.new_page()
+                    try:
+                        page.goto(url, timeout=15000)
+                        items = page.evaluate(DOM_GEOMETRY_SCRIPT)
+                    finally:
+                        page.close()
+        except Exception as e:
+            print(f"DOM geometry analysis failed: {e}")
+            return {}
+        return self.build_dom_visual_elements(items)
+    
+    def build_dom_visual_elements(self, items):
+        """Turn the DOM geometry script's output into the visual element dict"""
+        visual_elements = {element_type: [] for element_type in VISUAL_ELEMENT_TYPES}
+        for item in items:
+            if not item['visible']:
+                continue
+            left, top, right, bottom = (int(round(value)) for value in item['rect'])
+            # Elements covered by something else stay below the button/form thresholds
+            confidence = 0.5 if item['topmost'] is False else 1.0
+            visual_elements[item['category']].append({
+                'bbox': [left, top, right, bottom],
+                'confidence': confidence,
+                'class': item['tag'],
+                'center': [(left + right) // 2, (top + bottom) // 2],
+                'text': item['text'],
+                'topmost': item['topmost'],
+                'z_index': item['z_index'],
+                'styles': item['styles']
+            })
+        return visual_elements
+    
+    def yolo_class_lookup(self, names):
+        """Array mapping YOLO class ids to indexes in VISUAL_ELEMENT_TYPES (-1 for irrelevant classes)"""
+        cache_key = tuple(sorted(names.items()))
+        lookup = self._yolo_class_lookups.get(cache_key)
+        if lookup is None:
+            lookup = np.full(max(names, default=-1) + 1, -1, dtype=int)
+            for class_id, class_name in names.items():
+                element_type = self.map_yolo_class_to_web_element(class_name)
+                if element_type:
+                    lookup[class_id] = VISUAL_ELEMENT_TYPES.index(element_type)
+            self._yolo_class_lookups[cache_key] = lookup
+        return lookup
+    
+    def build_visual_elements(self, boxes, confidences, class_ids, names):
+        """Turn page-coordinate detection arrays into the visual element dict used for test generation"""
+        visual_elements = {element_type: [] for element_type in VISUAL_ELEMENT_TYPES}
+        if len(boxes) == 0:
+            return visual_elements
+        
+        # Class mapping and confidence threshold as array masks
+        type_indexes = self.yolo_class_lookup(names)[class_ids]
+        keep = (type_indexes >= 0) & (confidences > 0.5)
+        boxes, confidences, class_ids, type_indexes = boxes[keep], confidences[keep], class_ids[keep], type_indexes[keep]
+        bboxes = boxes.astype(int)
+        centers = ((boxes[:, 0:2] + boxes[:, 2:4]) / 2).astype(int)
+        
+        # Python dicts only for the surviving detections
+        for type_index, bbox, confidence, class_id, center in zip(type_indexes.tolist(), bboxes.tolist(),
+                                                                  confidences.tolist(), class_ids.tolist(),
+                                                                  centers.tolist()):
+            visual_elements[VISUAL_ELEMENT_TYPES[type_index]].append({
+                'bbox': bbox,
+                'confidence': confidence,
+                'class': names[class_id],
+                'center': center
+            })
+        
+        return visual_elements
+    
+    def map_yolo_class_to_web_element(self, yolo_class):
+        """Map YOLO detection classes to web element types"""
+        class_mapping = {
+            'person': None,  # Not relevant for web elements
+            'bicycle': None,
             'car': None,
             'motorcycle': None,
             'airplane': None,
@@ -1205,7 +2749,7 @@ class WebsiteIntelligence:
             'bed': None,
             'dining table': None,
             'toilet': None,
-            'tv': 'video',
+            'tv': 'videos',
             'laptop': None,
             'mouse': None,
             'remote': None,
@@ -1216,7 +2760,7 @@ class WebsiteIntelligence:
             'toaster': None,
             'sink': None,
             'refrigerator': None,
-            'book': 'text',
+            'book': 'text_areas',
             'clock': None,
             'vase': None,
             'scissors': None,
@@ -1227,61 +2771,104 @@ class WebsiteIntelligence:
         
         return class_mapping.get(yolo_class, None)
     
-    def detect_visual_buttons(self, visual_elements):
+    def visual_element_arrays(self, visual_elements):
+        """Flatten visual elements (in dict order) into a list plus bbox and confidence arrays"""
+        elements = [element for elements in visual_elements.values() for element in elements]
+        if not elements:
+            return elements, np.zeros((0, 4), dtype=int), np.zeros(0)
+        bboxes = np.array([element['bbox'] for element in elements], dtype=int)
+        confidences = np.array([element['confidence'] for element in elements], dtype=float)
+        return elements, bboxes, confidences
+    
+    def _select_visual_elements(self, elements, sizes, mask, element_type):
+        """Build result dicts for the elements selected by a mask"""
+        return [{
+            'bbox': elements[i]['bbox'],
+            'confidence': elements[i]['confidence'],
+            'type': element_type,
+            'size': sizes[i].tolist(),
+            'center': elements[i]['center']
+        } for i in np.flatnonzero(mask)]
+    
+    def detect_visual_buttons(self, visual_elements, arrays=None):
         """Detect buttons using visual analysis"""
-        buttons = []
+        elements, bboxes, confidences = arrays or self.visual_element_arrays(visual_elements)
+        sizes = bboxes[:, 2:4] - bboxes[:, 0:2]
+        width, height = sizes[:, 0], sizes[:, 1]
         
-        # Look for rectangular shapes that could be buttons
-        for element_type, elements in visual_elements.items():
-            for element in elements:
-                bbox = element['bbox']
-                width = bbox[2] - bbox[0]
-                height = bbox[3] - bbox[1]
-                
-                # Button-like characteristics
-                if (width > 50 and height > 20 and 
-                    width < 300 and height < 100 and
-                    element['confidence'] > 0.6):
-                    buttons.append({
-                        'bbox': bbox,
-                        'confidence': element['confidence'],
-                        'type': 'visual_button',
-                        'size': [width, height],
-                        'center': element['center']
-                    })
-        
-        return buttons
+        # Button-like characteristics
+        mask = (width > 50) & (height > 20) & (width < 300) & (height < 100) & (confidences > 0.6)
+        return self._select_visual_elements(elements, sizes, mask, 'visual_button')
     
-    def detect_visual_forms(self, visual_elements):
+    def detect_visual_forms(self, visual_elements, arrays=None):
         """Detect forms using visual analysis"""
-        forms = []
+        elements, bboxes, confidences = arrays or self.visual_element_arrays(visual_elements)
+        sizes = bboxes[:, 2:4] - bboxes[:, 0:2]
+        width, height = sizes[:, 0], sizes[:, 1]
         
-        # Look for input-like elements
-        for element_type, elements in visual_elements.items():
-            for element in elements:
-                bbox = element['bbox']
-                width = bbox[2] - bbox[0]
-                height = bbox[3] - bbox[1]
-                
-                # Form-like characteristics
-                if (width > 100 and height > 20 and
-                    element['confidence'] > 0.5):
-                    forms.append({
-                        'bbox': bbox,
-                        'confidence': element['confidence'],
-                        'type': 'visual_form',
-                        'size': [width, height],
-                        'center': element['center']
-                    })
+        # Form-like characteristics
+        mask = (width > 100) & (height > 20) & (confidences > 0.5)
+        return self._select_visual_elements(elements, sizes, mask, 'visual_form')
+    
+    @traced('visual regression')
+    def check_visual_regression(self, screenshot, url):
+        """Compare a captured frame with its baseline screenshot and generate regression test cases"""
+        baseline_path = baseline_path_for(self.baseline, url)
+        test_cases = []
+        if not os.path.exists(baseline_path):
+            if self.update_baseline:
+                os.makedirs(os.path.dirname(baseline_path) or '.', exist_ok=True)
+                screenshot.save(baseline_path)
+                actual, notes = f'Baseline created at {baseline_path}', '[Visual Regression] Baseline recorded'
+            else:
+                actual = f'No baseline screenshot at {baseline_path}'
+                notes = '[Visual Regression] Run with --update-baseline to record a baseline'
+            return [{
+                'Type': 'Visual Regression',
+                'Action': 'Compare page screenshot with baseline',
+                'Element': 'Full Page',
+                'Expected Result': 'Page should match the baseline screenshot',
+                'Actual Result': actual,
+                'Notes': notes
+            }]
         
-        return forms
+        comparison = compare_screenshots(ScreenshotFrame.from_file(baseline_path), screenshot)
+        for i, region in enumerate(comparison['regions']):
+            test_cases.append({
+                'Type': 'Visual Regression',
+                'Action': f'Compare changed region {i+1} with baseline',
+                'Element': f'Region at {region["bbox"]}',
+                'Expected Result': 'Region should match the baseline screenshot',
+                'Actual Result': f'Failed: {region["changed_ratio"] * 100:.1f}% of pixels differ from the baseline',
+                'Notes': f'[Visual Regression] Baseline: {baseline_path}, Tiles: {region["tiles"]}'
+            })
+        if comparison['size_changed']:
+            size_note = f'Page size changed from {comparison["baseline_size"]} to {comparison["current_size"]}. '
+        else:
+            size_note = ''
+        test_cases.append({
+            'Type': 'Visual Regression',
+            'Action': 'Compare page screenshot with baseline',
+            'Element': 'Full Page',
+            'Expected Result': 'Page should match the baseline screenshot',
+            'Actual Result': (f'{size_note}Failed: {len(comparison["regions"])} changed regions'
+                              if comparison['regions'] else 'Page matches the baseline screenshot'),
+            'Notes': (f'[Visual Regression] {comparison["tiles_equal"]}/{comparison["tiles"]} tiles exactly equal, '
+                      f'compared in {comparison["seconds"] * 1000:.0f} ms')
+        })
+        if self.update_baseline:
+            screenshot.save(baseline_path)
+        return test_cases
     
-    def generate_visual_test_cases(self, visual_elements, url):
+    @traced('generate_visual_test_cases')
+    def generate_visual_test_cases(self, visual_elements, url, source='Computer Vision'):
         """Generate test cases based on visual analysis"""
         test_cases = []
         
+        arrays = self.visual_element_arrays(visual_elements)
+        
         # Visual button test cases
-        visual_buttons = self.detect_visual_buttons(visual_elements)
+        visual_buttons = self.detect_visual_buttons(visual_elements, arrays)
         for i, button in enumerate(visual_buttons):
             test_cases.append({
                 'Type': 'Visual Button',
@@ -1289,11 +2876,11 @@ class WebsiteIntelligence:
                 'Element': f'Button at position {button["center"]}',
                 'Expected Result': 'Button should be clickable and functional',
                 'Actual Result': 'Visual button detection test case generated',
-                'Notes': f'[Computer Vision] Confidence: {button["confidence"]:.2f}, Size: {button["size"]}'
+                'Notes': f'[{source}] Confidence: {button["confidence"]:.2f}, Size: {button["size"]}'
             })
         
         # Visual form test cases
-        visual_forms = self.detect_visual_forms(visual_elements)
+        visual_forms = self.detect_visual_forms(visual_elements, arrays)
         for i, form in enumerate(visual_forms):
             test_cases.append({
                 'Type': 'Visual Form',
@@ -1301,7 +2888,7 @@ class WebsiteIntelligence:
                 'Element': f'Form at position {form["center"]}',
                 'Expected Result': 'Form should be interactive and functional',
                 'Actual Result': 'Visual form detection test case generated',
-                'Notes': f'[Computer Vision] Confidence: {form["confidence"]:.2f}, Size: {form["size"]}'
+                'Notes': f'[{source}] Confidence: {form["confidence"]:.2f}, Size: {form["size"]}'
             })
         
         return test_cases
@@ -1309,20 +2896,160 @@ class WebsiteIntelligence:
 # Initialize the intelligence system
 website_intelligence = WebsiteIntelligence()
 
-def get_soup_from_file(filepath):
+# Source files at least MMAP_MIN_BYTES long are memory-mapped instead of read into memory;
+# files above the size limit are skipped or only their head is sampled
+MMAP_MIN_BYTES = 1024 * 1024
+DEFAULT_MAX_SOURCE_BYTES = 16 * 1024 * 1024
+OVERSIZE_POLICIES = ('sample', 'skip')
+
+def apply_size_limit(path, size, max_bytes, oversize_policy):
+    """Return how many bytes of a source to analyze, or None to skip it"""
+    if not max_bytes or size <= max_bytes:
+        return size
+    if oversize_policy == 'skip':
+        print(f"Skipping {path}: {size} bytes exceeds the {max_bytes} byte limit")
+        return None
+    print(f"Sampling the first {max_bytes} of {size} bytes of {path}")
+    return max_bytes
+
+@contextmanager
+def open_source_buffer(filepath, max_bytes=DEFAULT_MAX_SOURCE_BYTES, oversize_policy='sample'):
+    """Yield a source file as bytes or a read-only mmap (None when skipped for size)"""
+    size = os.path.getsize(filepath)
+    limit = apply_size_limit(filepath, size, max_bytes, oversize_policy)
+    if limit is None:
+        yield None
+        return
+    with open(filepath, 'rb') as f:
+        if size < MMAP_MIN_BYTES:
+            yield f.read(limit)
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped if limit == size else mapped[:limit]
+
+def get_soup_from_file(filepath, max_bytes=DEFAULT_MAX_SOURCE_BYTES, oversize_policy='sample'):
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            return BeautifulSoup(f.read(), 'html.parser')
+        with open_source_buffer(filepath, max_bytes, oversize_policy) as data:
+            if data is None:
+                return None
+            # Decode straight from the (possibly mapped) buffer without an intermediate bytes copy
+            return BeautifulSoup(str(data, 'utf-8', 'ignore'), 'html.parser')
     except Exception as e:
         print(f"Failed to parse {filepath}: {e}")
         return None
 
-def auto_fill_and_submit_form(form, base_url, username=None, password=None):
+def wait_for_dashboard(page, header_timeout=5000, text_timeout=3000, budget=None):
+    """True once the post-login dashboard is showing"""
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+    budget = budget or TimeBudget()
+    for selector, timeout in (('.oxd-topbar-header', header_timeout), ('text=Dashboard', text_timeout)):
+        try:
+            page.wait_for_selector(selector, timeout=budget.timeout(timeout))
+            return True
+        except PlaywrightTimeoutError:
+            continue
+        except BudgetExhausted:
+            return False
+    return False
+
+def bulk_fill_form(page, fields, wait_timeout=5000):
+    """Fill fields ({'name', 'id', 'value'} dicts, optionally with a 'selector' that wins over name and id)
+    in one round trip; returns one {'found', 'error', 'value'} per field"""
+    specs = [{'name': field.get('name') or '', 'id': field.get('id') or '', 'selector': field.get('selector') or '',
+              'value': str(field['value'])} for field in fields]
+    if not specs:
+        return []
+    # Wait once for the form to render rather than once per field; names and ids are escaped page-side
+    if wait_timeout and any(spec['selector'] or spec['name'] or spec['id'] for spec in specs):
+        try:
+            page.wait_for_function(BULK_FILL_READY_SCRIPT, arg=specs, timeout=wait_timeout)
+        except Exception:
+            pass
+    return page.evaluate(BULK_FILL_SCRIPT, specs)
+
+def normalize_locator_text(text):
+    """Collapse whitespace the way the locator index does, so analysis text and index keys agree"""
+    return ' '.join((text or '').split())
+
+class LocatorIndex:
+    """Unique selectors for the links, buttons and fields of the current page state, rebuilt only after
+    navigation or DOM mutation"""
+
+    def __init__(self, page):
+        self.page = page
+        self.entries = None
+        self.version = None
+        page.on('framenavigated', self._on_navigated)
+
+    def _on_navigated(self, frame):
+        if frame == self.page.main_frame:
+            self.entries = None
+
+    def current(self):
+        """The index for the page as it is now, rebuilding it if the page changed"""
+        if self.entries is not None:
+            try:
+                version = self.page.evaluate('() => window.__tcgenLocatorVersion')
+            except Exception:
+                version = None
+            if version is not None and version == self.version:
+                return self.entries
+        data = self.page.evaluate(LOCATOR_INDEX_SCRIPT, LOCATOR_ATTRIBUTES)
+        entries = defaultdict(list)
+        for link in data['links']:
+            entries[('link', link['text'])].append(link)
+        for button in data['buttons']:
+            entries[('button', button['text'])].append(button)
+        for field in data['fields']:
+            if field['name']:
+                entries[('field_name', field['name'])].append(field)
+            if field['id']:
+                entries[('field_id', field['id'])].append(field)
+        self.entries = entries
+        self.version = data['version']
+        return entries
+
+    @staticmethod
+    def _first(entries, kind, key, href=None):
+        matches = entries.get((kind, key), [])
+        if href is not None:
+            matches = [match for match in matches if match['href'] == href] or matches
+        return matches[0]['selector'] if matches else None
+
+    def selector(self, kind, key, href=None):
+        """Selector of the first 'link' or 'button' whose text is key, preferring one with a matching href"""
+        return self._first(self.current(), kind, normalize_locator_text(key), href)
+
+    def field_selectors(self, fields):
+        """Selectors for form fields ({'name', 'id'} dicts), by name first and then by id; None when absent"""
+        entries = self.current()
+        return [(field['name'] and self._first(entries, 'field_name', field['name']))
+                or (field['id'] and self._first(entries, 'field_id', field['id'])) or None for field in fields]
+
+    def query(self, kind, key, href=None):
+        """Live handle for an analyzed element, or None when it is not on the page"""
+        key = normalize_locator_text(key)
+        if self.entries is not None:
+            # The version check and the lookup share one round trip while the index is current
+            selector = self._first(self.entries, kind, key, href)
+            if selector is not None:
+                handle = self.page.evaluate_handle(LOCATOR_QUERY_SCRIPT, [selector, self.version])
+                element = handle.as_element()
+                if element is not None:
+                    return element
+                handle.dispose()
+        # Stale, missing or never built: rebuild once, then look up without the version gate, since
+        # pages that keep mutating may have moved the version again already
+        self.entries = None
+        selector = self._first(self.current(), kind, key, href)
+        return self.page.query_selector(selector) if selector else None
+
+@traced('form submission')
+def auto_fill_and_submit_form(form, base_url, username=None, password=None, budget=None):
     import tempfile
     import os
     # If credentials are provided, use Playwright for login and dashboard check
     if username and password and PLAYWRIGHT_AVAILABLE:
-        from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
         action = form.get('action') or base_url
         method = form.get('method', 'get').upper()
         form_data = {}
@@ -1341,48 +3068,68 @@ def auto_fill_and_submit_form(form, base_url, username=None, password=None):
                 form_data[name] = password
                 continue
             form_data[name] = 'test'
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            try:
-                page.goto(base_url, timeout=15000)
-                # Fill form fields with better error handling
-                for name, value in form_data.items():
-                    try:
-                        page.fill(f'input[name="{name}"]', str(value), timeout=5000)
-                    except Exception:
-                        pass
-                # Click the first submit button in the form with shorter timeout
+        sessions = website_intelligence.auth_sessions
+        budget = budget or TimeBudget()
+        with shared_browser() as browser:
+            # Start from a saved login when there is one; a stale session falls back to logging in
+            session = sessions.get(base_url, username, password) if sessions else None
+            dashboard_found = False
+            if session:
+                context = browser.new_context(storage_state=session['storage_state'])
+                page = context.new_page()
                 try:
-                    submit_selector = 'form button[type=submit], form input[type=submit]'
-                    with page.expect_navigation(wait_until='networkidle', timeout=8000):
-                        page.click(submit_selector, timeout=5000)
+                    page.goto(session['landing_url'], timeout=budget.timeout(15000))
+                    dashboard_found = wait_for_dashboard(page, header_timeout=3000, text_timeout=1000, budget=budget)
                 except Exception:
+                    dashboard_found = False
+                if not dashboard_found:
+                    # Running out of time says nothing about the session, so only drop it on a real failure
+                    if not budget.expired():
+                        sessions.invalidate(base_url, username)
+                    context.close()
+            reused_session = dashboard_found
+            if not reused_session:
+                context = browser.new_context()
+                page = context.new_page()
+                try:
+                    page.goto(base_url, timeout=budget.timeout(15000))
+                    # Fill every field in one round trip; fields missing from the rendered page are skipped
                     try:
-                        with page.expect_navigation(wait_until='networkidle', timeout=8000):
-                            page.evaluate('document.forms[0].submit()')
+                        bulk_fill_form(page, [{'name': name, 'value': value} for name, value in form_data.items()],
+                                       wait_timeout=budget.timeout(5000))
                     except Exception:
                         pass
-            except Exception as e:
-                browser.close()
-                return action, method, f'Form submission failed: {str(e)}', []
-            # Wait for dashboard or error with shorter timeout
+                    # Click the first submit button in the form with shorter timeout
+                    try:
+                        submit_selector = 'form button[type=submit], form input[type=submit]'
+                        with page.expect_navigation(wait_until='networkidle', timeout=budget.timeout(8000)):
+                            page.click(submit_selector, timeout=budget.timeout(5000))
+                    except Exception:
+                        try:
+                            with page.expect_navigation(wait_until='networkidle', timeout=budget.timeout(8000)):
+                                page.evaluate('document.forms[0].submit()')
+                        except Exception:
+                            pass
+                except Exception as e:
+                    context.close()
+                    # No actual result when the deadline cut the submission short; the caller reports it as skipped
+                    return action, method, None if budget.expired() else f'Form submission failed: {str(e)}', []
+                # Wait for dashboard or error with shorter timeout
+                dashboard_found = wait_for_dashboard(page, budget=budget)
+                if dashboard_found and sessions:
+                    sessions.put(base_url, username, password, context.storage_state(), page.url)
             actual_result = ''
-            dashboard_found = False
-            try:
-                page.wait_for_selector('.oxd-topbar-header', timeout=5000)
-                dashboard_found = True
-            except PlaywrightTimeoutError:
-                try:
-                    page.wait_for_selector('text=Dashboard', timeout=3000)
-                    dashboard_found = True
-                except PlaywrightTimeoutError:
-                    dashboard_found = False
-            if dashboard_found:
+            if reused_session:
+                # The form itself was not submitted, so this does not test it
+                actual_result = 'Form not submitted: saved login session reused and dashboard loaded'
+            elif dashboard_found:
                 actual_result = 'Form submitted successfully and dashboard loaded'
+            elif budget.expired():
+                # The dashboard may just not have loaded yet: skipped, not failed
+                actual_result = None
             else:
                 try:
-                    content = page.content()
+                    content = page.evaluate('document.documentElement.outerHTML')
                 except Exception:
                     content = ''
                 if 'Invalid credentials' in content or 'error' in content.lower():
@@ -1392,23 +3139,36 @@ def auto_fill_and_submit_form(form, base_url, username=None, password=None):
             
             # --- ENHANCED: Post-login dashboard testing with ML intelligence ---
             post_login_test_cases = []
-            if dashboard_found or page.url != base_url:
+            if (dashboard_found or page.url != base_url) and budget.expired():
+                post_login_test_cases.append(skipped_test_case('Dashboard', 'Test post-login pages', page.url))
+            elif dashboard_found or page.url != base_url:
                 try:
                     from bs4 import BeautifulSoup
-                    new_soup = BeautifulSoup(page.content(), 'html.parser')
+                    # Let late content arrive first: one live analysis then serves both passes below
+                    try:
+                        page.wait_for_load_state('networkidle', timeout=budget.timeout(15000))
+                    except Exception:
+                        pass
+                    analysis = website_intelligence.analyze_live_structure(page)
+                    # Only the form, button and link extraction reads HTML, so only it gets a soup
+                    rendered = capture_rendered_page(page, page.url)
+                    with TRACER.span('parse'):
+                        new_soup = BeautifulSoup(rendered.html, 'html.parser')
                     # Extract further test cases (no login credentials for post-login page)
-                    post_login_test_cases = extract_elements(new_soup, page.url)
+                    post_login_test_cases = extract_elements(new_soup, page.url, rendered=rendered, analysis=analysis,
+                                                             budget=budget)
                     for tc in post_login_test_cases:
                         tc['Notes'] = f"[Post-login] {tc.get('Notes','')}"
                     
                     # --- NEW: ML-Enhanced Dashboard Testing ---
-                    dashboard_test_cases = test_dashboard_functionality_ml(page, base_url)
+                    dashboard_test_cases = test_dashboard_functionality_ml(page, base_url, analysis=analysis,
+                                                                           budget=budget)
                     post_login_test_cases.extend(dashboard_test_cases)
                 except Exception as e:
                     # If post-login testing fails, continue without it
                     pass
                 
-            browser.close()
+            context.close()
         return action, method, actual_result, post_login_test_cases
     # Handle input fields
     action = form.get('action') or base_url
@@ -1477,17 +3237,20 @@ def auto_fill_and_submit_form(form, base_url, username=None, password=None):
             form_data[name] = 'Test textarea content'
     return action, method, 'Form data prepared for submission'
 
-def test_dashboard_functionality_ml(page, base_url):
+@traced('dashboard test')
+def test_dashboard_functionality_ml(page, base_url, analysis=None, budget=None):
     """
     ML-Enhanced function to test dashboard functionality after login
     Uses intelligent analysis to adapt to any website structure
+    (an analysis already taken from the live page can be passed in)
     """
     dashboard_test_cases = []
+    budget = budget or TimeBudget()
     
     try:
         # Wait for page to be fully loaded with timeout
         try:
-            page.wait_for_load_state('networkidle', timeout=15000)
+            page.wait_for_load_state('networkidle', timeout=budget.timeout(15000))
         except Exception as e:
             dashboard_test_cases.append({
                 'Type': 'Dashboard',
@@ -1500,12 +3263,9 @@ def test_dashboard_functionality_ml(page, base_url):
         
         # --- Step 1: ML-Enhanced Website Analysis ---
         try:
-            from bs4 import BeautifulSoup
-            page_content = page.content()
-            soup = BeautifulSoup(page_content, 'html.parser')
-            
-            # Use ML intelligence to analyze the website
-            analysis = website_intelligence.analyze_website_structure(soup, page.url)
+            # Use ML intelligence to analyze the live DOM (no HTML serialization and re-parsing)
+            if analysis is None:
+                analysis = website_intelligence.analyze_live_structure(page)
             
             dashboard_test_cases.append({
                 'Type': 'Analysis',
@@ -1520,16 +3280,19 @@ def test_dashboard_functionality_ml(page, base_url):
             intelligent_cases = website_intelligence.generate_intelligent_test_cases(analysis, page.url)
             dashboard_test_cases.extend(intelligent_cases)
             
+            # Resolve analyzed elements through one index, rebuilt only when the page changes
+            locators = LocatorIndex(page)
+            
             # --- Step 3: ML-Enhanced Navigation Testing ---
-            navigation_cases = test_intelligent_navigation(page, analysis)
+            navigation_cases = test_intelligent_navigation(page, analysis, locators, budget)
             dashboard_test_cases.extend(navigation_cases)
             
             # --- Step 4: ML-Enhanced Form Testing ---
-            form_cases = test_intelligent_forms(page, analysis)
+            form_cases = test_intelligent_forms(page, analysis, locators, budget)
             dashboard_test_cases.extend(form_cases)
             
             # --- Step 5: ML-Enhanced Interactive Element Testing ---
-            interactive_cases = test_intelligent_interactions(page, analysis)
+            interactive_cases = test_intelligent_interactions(page, analysis, locators, budget)
             dashboard_test_cases.extend(interactive_cases)
             
         except Exception as e:
@@ -1554,11 +3317,14 @@ def test_dashboard_functionality_ml(page, base_url):
     
     return dashboard_test_cases
 
-def test_intelligent_navigation(page, analysis):
+@traced('navigation probes')
+def test_intelligent_navigation(page, analysis, locators=None, budget=None):
     """Test navigation using ML intelligence with deduplication"""
     navigation_cases = []
+    budget = budget or TimeBudget()
     
     try:
+        locators = locators or LocatorIndex(page)
         tested_nav_links = set()
         
         for nav in analysis['navigation']:
@@ -1571,27 +3337,30 @@ def test_intelligent_navigation(page, analysis):
                         link_text = link['text']
                         if link_text and link_text not in tested_nav_links:
                             tested_nav_links.add(link_text)
+                            if budget.expired():
+                                navigation_cases.append(skipped_test_case('Navigation', f'Click {link_text} link',
+                                                                          f'Main Navigation - {link_text}'))
+                                continue
                             
                             # Look for the link and click it
-                            link_selector = f'a:has-text("{link_text}")'
-                            link_element = page.query_selector(link_selector)
+                            link_element = locators.query('link', link_text, link.get('href'))
                             
                             if link_element:
-                                link_element.click(timeout=5000)
-                                page.wait_for_timeout(2000)
-                                
-                                navigation_cases.append({
-                                    'Type': 'Navigation',
-                                    'Action': f'Click {link_text} link',
-                                    'Element': f'Main Navigation - {link_text}',
-                                    'Expected Result': f'Should navigate to {link_text} page',
-                                    'Actual Result': f'Successfully clicked {link_text} link',
-                                    'Notes': '[ML Navigation Test - Deduplicated]'
-                                })
-                                
-                                # Go back to previous page
-                                page.go_back()
-                                page.wait_for_timeout(1000)
+                                link_element.click(timeout=budget.timeout(5000))
+                                try:
+                                    page.wait_for_timeout(budget.timeout(2000))
+                                    
+                                    navigation_cases.append({
+                                        'Type': 'Navigation',
+                                        'Action': f'Click {link_text} link',
+                                        'Element': f'Main Navigation - {link_text}',
+                                        'Expected Result': f'Should navigate to {link_text} page',
+                                        'Actual Result': f'Successfully clicked {link_text} link',
+                                        'Notes': '[ML Navigation Test - Deduplicated]'
+                                    })
+                                finally:
+                                    # Go back to previous page, even when the budget ran out after the click
+                                    go_back_after_probe(page, budget)
                             else:
                                 navigation_cases.append({
                                     'Type': 'Navigation',
@@ -1602,6 +3371,11 @@ def test_intelligent_navigation(page, analysis):
                                     'Notes': '[ML Navigation Test - Link Not Found]'
                                 })
                     except Exception as e:
+                        if budget.expired():
+                            # Cut short by the deadline (a timeout or BudgetExhausted), not a broken link
+                            navigation_cases.append(skipped_test_case('Navigation', f'Click {link_text} link',
+                                                                      f'Main Navigation - {link_text}'))
+                            continue
                         navigation_cases.append({
                             'Type': 'Navigation',
                             'Action': f'Test {link_text if "link_text" in locals() else "navigation link"}',
@@ -1623,76 +3397,87 @@ def test_intelligent_navigation(page, analysis):
     
     return navigation_cases
 
-def test_intelligent_forms(page, analysis):
+@traced('form field probes')
+def test_intelligent_forms(page, analysis, locators=None, budget=None):
     """Test forms using ML intelligence with deduplication"""
     form_cases = []
+    budget = budget or TimeBudget()
     
     try:
+        locators = locators or LocatorIndex(page)
         tested_form_fields = set()
+        pending = []
         
         for form in analysis['forms']:
             form_purpose = form['purpose']
             
-            # Test form fields (deduplicated)
+            # Collect form fields (deduplicated) so they can be filled in one round trip
             for field in form['fields']:
                 field_purpose = field['purpose']
                 field_id = f"{field['name']}:{field['type']}:{field_purpose}"
                 
                 if field_id not in tested_form_fields:
                     tested_form_fields.add(field_id)
-                    
                     # Generate test data based on field purpose
-                    test_value = generate_intelligent_test_value(field)
-                    
-                    try:
-                        # Find and fill the field
-                        field_selector = f'input[name="{field["name"]}"], input[id="{field["id"]}"]'
-                        field_element = page.query_selector(field_selector)
-                        
-                        if field_element:
-                            field_element.clear()
-                            field_element.fill(test_value)
-                            
-                            form_cases.append({
-                                'Type': 'Form Field',
-                                'Action': f'Fill {field_purpose} field with intelligent data',
-                                'Element': f'{field["type"]} field ({field["name"]})',
-                                'Expected Result': f'{field_purpose} field should accept {test_value}',
-                                'Actual Result': f'Successfully filled field with {test_value}',
-                                'Notes': f'[ML Form Test - {form_purpose} - Deduplicated]'
-                            })
-                            
-                            # Verify field value
-                            actual_value = field_element.input_value()
-                            form_cases.append({
-                                'Type': 'Form Field',
-                                'Action': f'Verify {field_purpose} field value',
-                                'Element': f'{field["type"]} field ({field["name"]})',
-                                'Expected Result': f'Field should contain {test_value}',
-                                'Actual Result': f'Field contains {actual_value}',
-                                'Notes': f'[ML Form Test - {form_purpose} - Deduplicated]'
-                            })
-                        else:
-                            form_cases.append({
-                                'Type': 'Form Field',
-                                'Action': f'Find {field_purpose} field',
-                                'Element': f'{field["type"]} field ({field["name"]})',
-                                'Expected Result': f'{field_purpose} field should be found',
-                                'Actual Result': f'{field_purpose} field not found',
-                                'Notes': f'[ML Form Test - {form_purpose} - Deduplicated]'
-                            })
-                            
-                    except Exception as e:
-                        form_cases.append({
-                            'Type': 'Form Field',
-                            'Action': f'Test {field_purpose} field',
-                            'Element': f'{field["type"]} field ({field["name"]})',
-                            'Expected Result': f'{field_purpose} field should work correctly',
-                            'Actual Result': f'Field testing failed: {str(e)}',
-                            'Notes': f'[ML Form Test - {form_purpose} - Deduplicated]'
-                        })
+                    pending.append((form_purpose, field, str(generate_intelligent_test_value(field))))
+        
+        if budget.expired():
+            return [skipped_test_case('Form Field', f'Fill {field["purpose"]} field with intelligent data',
+                                      f'{field["type"]} field ({field["name"]})') for _, field, _ in pending]
+        
+        # The analysis was taken from this rendered page, so there is nothing to wait for
+        selectors = locators.field_selectors([field for _, field, _ in pending])
+        specs = [{'name': field['name'], 'id': field['id'], 'selector': selector, 'value': test_value}
+                 for (_, field, test_value), selector in zip(pending, selectors)]
+        results = bulk_fill_form(page, specs, wait_timeout=0)
+        
+        for (form_purpose, field, test_value), result in zip(pending, results):
+            field_purpose = field['purpose']
+            element = f'{field["type"]} field ({field["name"]})'
+            notes = f'[ML Form Test - {form_purpose} - Deduplicated]'
+            
+            if not result['found']:
+                form_cases.append({
+                    'Type': 'Form Field',
+                    'Action': f'Find {field_purpose} field',
+                    'Element': element,
+                    'Expected Result': f'{field_purpose} field should be found',
+                    'Actual Result': f'{field_purpose} field not found',
+                    'Notes': notes
+                })
+            elif result['error']:
+                form_cases.append({
+                    'Type': 'Form Field',
+                    'Action': f'Test {field_purpose} field',
+                    'Element': element,
+                    'Expected Result': f'{field_purpose} field should work correctly',
+                    'Actual Result': f'Field testing failed: {result["error"]}',
+                    'Notes': notes
+                })
+            else:
+                form_cases.append({
+                    'Type': 'Form Field',
+                    'Action': f'Fill {field_purpose} field with intelligent data',
+                    'Element': element,
+                    'Expected Result': f'{field_purpose} field should accept {test_value}',
+                    'Actual Result': f'Successfully filled field with {test_value}',
+                    'Notes': notes
+                })
+                
+                # Verify field value
+                form_cases.append({
+                    'Type': 'Form Field',
+                    'Action': f'Verify {field_purpose} field value',
+                    'Element': element,
+                    'Expected Result': f'Field should contain {test_value}',
+                    'Actual Result': f'Field contains {result["value"]}',
+                    'Notes': notes
+                })
                     
     except Exception as e:
+        if budget.expired():
+            return [skipped_test_case('Form Field', f'Fill {field["purpose"]} field with intelligent data',
+                                      f'{field["type"]} field ({field["name"]})') for _, field, _ in pending]
         form_cases.append({
             'Type': 'Forms',
             'Action': 'Test intelligent forms',
@@ -1704,11 +3489,14 @@ def test_intelligent_forms(page, analysis):
     
     return form_cases
 
-def test_intelligent_interactions(page, analysis):
+@traced('interaction probes')
+def test_intelligent_interactions(page, analysis, locators=None, budget=None):
     """Test interactive elements using ML intelligence with deduplication"""
     interaction_cases = []
+    budget = budget or TimeBudget()
     
     try:
+        locators = locators or LocatorIndex(page)
         interactive = analysis['interactive_elements']
         tested_buttons = set()
         tested_links = set()
@@ -1721,14 +3509,17 @@ def test_intelligent_interactions(page, analysis):
             
             if button_id not in tested_buttons:
                 tested_buttons.add(button_id)
+                if budget.expired():
+                    interaction_cases.append(skipped_test_case('Button', f'Click {button_purpose} button',
+                                                               f'{button_text} Button'))
+                    continue
                 
                 try:
-                    button_selector = f'button:has-text("{button_text}")'
-                    button_element = page.query_selector(button_selector)
+                    button_element = locators.query('button', button_text)
                     
                     if button_element:
-                        button_element.click(timeout=5000)
-                        page.wait_for_timeout(2000)
+                        button_element.click(timeout=budget.timeout(5000))
+                        page.wait_for_timeout(budget.timeout(2000))
                         
                         interaction_cases.append({
                             'Type': 'Button',
@@ -1749,6 +3540,10 @@ def test_intelligent_interactions(page, analysis):
                         })
                         
                 except Exception as e:
+                    if budget.expired():
+                        interaction_cases.append(skipped_test_case('Button', f'Click {button_purpose} button',
+                                                                   f'{button_text} Button'))
+                        continue
                     interaction_cases.append({
                         'Type': 'Button',
                         'Action': f'Test {button_purpose} button',
@@ -1767,27 +3562,30 @@ def test_intelligent_interactions(page, analysis):
                 
                 if link_id not in tested_links:
                     tested_links.add(link_id)
+                    if budget.expired():
+                        interaction_cases.append(skipped_test_case('Link', f'Click {link_purpose} link',
+                                                                   f'{link_text} Link'))
+                        continue
                     
                     try:
-                        link_selector = f'a:has-text("{link_text}")'
-                        link_element = page.query_selector(link_selector)
+                        link_element = locators.query('link', link_text, link['href'])
                         
                         if link_element:
-                            link_element.click(timeout=5000)
-                            page.wait_for_timeout(2000)
-                            
-                            interaction_cases.append({
-                                'Type': 'Link',
-                                'Action': f'Click {link_purpose} link',
-                                'Element': f'{link_text} Link',
-                                'Expected Result': f'Should navigate to {link_purpose} page',
-                                'Actual Result': f'Successfully clicked {link_text} link',
-                                'Notes': '[ML Interaction Test - Deduplicated]'
-                            })
-                            
-                            # Go back
-                            page.go_back()
-                            page.wait_for_timeout(1000)
+                            link_element.click(timeout=budget.timeout(5000))
+                            try:
+                                page.wait_for_timeout(budget.timeout(2000))
+                                
+                                interaction_cases.append({
+                                    'Type': 'Link',
+                                    'Action': f'Click {link_purpose} link',
+                                    'Element': f'{link_text} Link',
+                                    'Expected Result': f'Should navigate to {link_purpose} page',
+                                    'Actual Result': f'Successfully clicked {link_text} link',
+                                    'Notes': '[ML Interaction Test - Deduplicated]'
+                                })
+                            finally:
+                                # Go back, even when the budget ran out after the click
+                                go_back_after_probe(page, budget)
                         else:
                             interaction_cases.append({
                                 'Type': 'Link',
@@ -1799,6 +3597,10 @@ def test_intelligent_interactions(page, analysis):
                             })
                             
                     except Exception as e:
+                        if budget.expired():
+                            interaction_cases.append(skipped_test_case('Link', f'Click {link_purpose} link',
+                                                                       f'{link_text} Link'))
+                            continue
                         interaction_cases.append({
                             'Type': 'Link',
                             'Action': f'Test {link_purpose} link',
@@ -1857,11 +3659,171 @@ def generate_intelligent_test_value(field):
         # Use the existing generate_test_value function
         return generate_test_value(field_type, 1)
 
-def extract_elements(soup, base_url, username=None, password=None):
+# A page loaded once and everything the later stages need from it, captured while the browser was open
+RenderedPage = namedtuple('RenderedPage', ['url', 'html', 'screenshot', 'dom_geometry'])
+
+@traced('capture page')
+def capture_rendered_page(page, url):
+    """Take what the visual stages need from an open page, so they never reload the URL"""
+    visual_mode = website_intelligence.active_visual_mode()
+    screenshot = None
+    if visual_mode == 'yolo' or website_intelligence.baseline:
+        screenshot = website_intelligence.capture_website_screenshot(url, page=page)
+    dom_geometry = None
+    if visual_mode == 'dom':
+        try:
+            dom_geometry = page.evaluate(DOM_GEOMETRY_SCRIPT)
+        except Exception as e:
+            print(f"DOM geometry analysis failed: {e}")
+    return RenderedPage(url, page.content(), screenshot, dom_geometry)
+
+_visual_executor = None
+_visual_executor_lock = threading.Lock()
+
+def get_visual_executor():
+    """Worker thread for CPU-bound visual work; inference releases the GIL, so DOM stages keep running"""
+    global _visual_executor
+    # Pages call this from several worker threads; two executors would mean two threads sharing the model
+    with _visual_executor_lock:
+        if _visual_executor is None:
+            # One worker: the model is not shared between concurrent calls
+            _visual_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='visual')
+        return _visual_executor
+
+def yolo_visual_test_cases(visual_elements, base_url):
+    """YOLO test cases for a page's detected visual elements (runs on the visual worker thread)"""
+    try:
+        # Generate visual test cases
+        test_cases = website_intelligence.generate_visual_test_cases(visual_elements, base_url)
+        
+        # Add visual analysis summary
+        test_cases.append({
+            'Type': 'Computer Vision',
+            'Action': 'Analyze website visual elements',
+            'Element': 'Visual Element Detection',
+            'Expected Result': 'Successfully detect visual elements',
+            'Actual Result': f'Detected {sum(len(elements) for elements in visual_elements.values())} visual elements',
+            'Notes': '[Computer Vision] Visual analysis completed successfully'
+        })
+        return test_cases
+    except Exception as e:
+        return visual_failure_test_cases(e)
+
+def visual_failure_test_cases(error):
+    return [{
+        'Type': 'Computer Vision',
+        'Action': 'Analyze website visual elements',
+        'Element': 'Visual Element Detection',
+        'Expected Result': 'Successfully detect visual elements',
+        'Actual Result': f'Visual analysis failed: {str(error)}',
+        'Notes': '[Computer Vision] Error in visual analysis'
+    }]
+
+class VisualBatcher:
+    """Gathers YOLO requests from every page in flight into one VisualAnalysisQueue flush
+
+    Each drain runs on the visual worker thread and takes everything submitted since the last
+    one, so pages analyzed concurrently (URL lists, crawls, daemon jobs) share inference
+    batches. The queue lives as long as the batcher, so its stats cover the whole run.
+    """
+    
+    def __init__(self, intelligence):
+        self.intelligence = intelligence
+        self.queue = None
+        self.pending = []
+        self._scheduled = False
+        self._lock = threading.Lock()
+    
+    def submit(self, screenshot, base_url):
+        """Future for the page's YOLO test cases"""
+        future = Future()
+        with self._lock:
+            self.pending.append((future, screenshot, base_url))
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            get_visual_executor().submit(self._drain)
+        return future
+    
+    def pages_per_minute(self):
+        return self.queue.pages_per_minute() if self.queue else 0.0
+    
+    def _drain(self):
+        with self._lock:
+            requests, self.pending = self.pending, []
+            self._scheduled = False
+        # Pages that gave up waiting (time budget) have cancelled their futures
+        requests = [request for request in requests if request[0].set_running_or_notify_cancel()]
+        if not requests:
+            return
+        try:
+            if self.queue is None:
+                self.queue = self.intelligence.new_visual_queue()
+            for future, screenshot, _ in requests:
+                self.queue.add(id(future), screenshot)
+            results = self.queue.flush()
+        except Exception as e:
+            print(f"Visual analysis failed: {e}")
+            for future, _, _ in requests:
+                future.set_result(visual_failure_test_cases(e))
+            return
+        for future, _, base_url in requests:
+            future.set_result(yolo_visual_test_cases(results.get(id(future), {}), base_url))
+
+visual_batcher = VisualBatcher(website_intelligence)
+
+def report_visual_throughput():
+    """Print how fast YOLO got through this run's pages, across all shared batches"""
+    if visual_batcher.queue and visual_batcher.queue.stats['pages']:
+        stats = visual_batcher.queue.stats
+        print(f"Visual analysis: {stats['pages']} pages, {stats['tiles']} tiles in {stats['batches']} batches, "
+              f"{visual_batcher.pages_per_minute():.1f} pages/min")
+
+def visual_regression_test_cases(screenshot, base_url):
+    """Baseline comparison test cases for a captured screenshot (runs on the visual worker thread)"""
+    try:
+        return website_intelligence.check_visual_regression(screenshot, base_url)
+    except Exception as e:
+        return [{
+            'Type': 'Visual Regression',
+            'Action': 'Compare page screenshot with baseline',
+            'Element': 'Full Page',
+            'Expected Result': 'Page should match the baseline screenshot',
+            'Actual Result': f'Visual regression check failed: {str(e)}',
+            'Notes': '[Visual Regression] Error in visual regression check'
+        }]
+
+def submit_visual_analysis(base_url, rendered=None):
+    """Capture the page once and queue YOLO and baseline comparison on the visual worker thread"""
+    run_yolo = website_intelligence.active_visual_mode() == 'yolo'
+    run_regression = bool(website_intelligence.baseline)
+    if not (run_yolo or run_regression):
+        return []
+    screenshot = rendered.screenshot if rendered else None
+    if screenshot is None and PLAYWRIGHT_AVAILABLE:
+        # No rendered page to reuse: capture in a browser of its own
+        screenshot = website_intelligence.capture_website_screenshot(base_url)
+    if not screenshot:
+        return []
+    executor = get_visual_executor()
+    futures = []
+    if run_yolo:
+        futures.append(visual_batcher.submit(screenshot, base_url))
+    if run_regression:
+        futures.append(executor.submit(visual_regression_test_cases, screenshot, base_url))
+    return futures
+
+@traced('extract_elements')
+def extract_elements(soup, base_url, username=None, password=None, rendered=None, analysis=None, budget=None):
+    budget = budget or website_intelligence.new_page_budget()
     test_cases = []
     form_success = False
     post_login_cases = []
     
+    # Visual work starts first and joins at the end, in the position it has in the report
+    visual_futures = submit_visual_analysis(base_url, rendered)
+    visual_position = None
+    
     # Track tested elements to avoid duplicates
     tested_forms = set()
     tested_buttons = set()
@@ -1869,8 +3831,9 @@ def extract_elements(soup, base_url, username=None, password=None):
     
     # --- NEW: ML-Enhanced Analysis ---
     try:
-        # Use ML intelligence to analyze the website
-        analysis = website_intelligence.analyze_website_structure(soup, base_url)
+        # Use ML intelligence to analyze the website (unless it was taken from the live page)
+        if analysis is None:
+            analysis = website_intelligence.analyze_website_structure(soup, base_url)
         
         # Generate intelligent test cases (already deduplicated)
         intelligent_cases = website_intelligence.generate_intelligent_test_cases(analysis, base_url)
@@ -1886,37 +3849,35 @@ def extract_elements(soup, base_url, username=None, password=None):
             'Notes': '[ML Intelligence - Optimized]'
         })
         
-                # --- COMPUTER VISION ANALYSIS ---
-        if website_intelligence.visual_analysis_enabled:
-            try:
-                # Capture screenshot for visual analysis
-                screenshot_path = website_intelligence.capture_website_screenshot(base_url)
-                if screenshot_path:
-                    # Analyze visual elements
-                    visual_elements = website_intelligence.analyze_visual_elements(screenshot_path)
-                    
-                    # Generate visual test cases
-                    visual_test_cases = website_intelligence.generate_visual_test_cases(visual_elements, base_url)
-                    test_cases.extend(visual_test_cases)
-                    
-                    # Add visual analysis summary
-                    test_cases.append({
-                        'Type': 'Computer Vision',
-                        'Action': 'Analyze website visual elements',
-                        'Element': 'Visual Element Detection',
-                        'Expected Result': 'Successfully detect visual elements',
-                        'Actual Result': f'Detected {sum(len(elements) for elements in visual_elements.values())} visual elements',
-                        'Notes': '[Computer Vision] Visual analysis completed successfully'
-                    })
-            except Exception as e:
+        # --- COMPUTER VISION ANALYSIS ---
+        # YOLO and baseline comparison were queued by submit_visual_analysis
+        if website_intelligence.active_visual_mode() == 'dom':
+            # Geometry of the rendered DOM: one page.evaluate instead of a model inference
+            if rendered and rendered.dom_geometry is not None:
+                visual_elements = website_intelligence.build_dom_visual_elements(rendered.dom_geometry)
+            else:
+                visual_elements = website_intelligence.analyze_dom_geometry(base_url)
+            if visual_elements:
+                test_cases.extend(website_intelligence.generate_visual_test_cases(visual_elements, base_url,
+                                                                                 source='DOM Geometry'))
+                test_cases.append({
+                    'Type': 'Computer Vision',
+                    'Action': 'Analyze website visual elements',
+                    'Element': 'DOM Geometry',
+                    'Expected Result': 'Successfully detect visual elements',
+                    'Actual Result': f'Detected {sum(len(elements) for elements in visual_elements.values())} visible elements',
+                    'Notes': '[DOM Geometry] Visual analysis completed successfully'
+                })
+            else:
                 test_cases.append({
                     'Type': 'Computer Vision',
                     'Action': 'Analyze website visual elements',
-                    'Element': 'Visual Element Detection',
+                    'Element': 'DOM Geometry',
                     'Expected Result': 'Successfully detect visual elements',
-                    'Actual Result': f'Visual analysis failed: {str(e)}',
-                    'Notes': '[Computer Vision] Error in visual analysis'
+                    'Actual Result': 'Visual analysis failed: no DOM geometry collected',
+                    'Notes': '[DOM Geometry] Error in visual analysis'
                 })
+        visual_position = len(test_cases)
         
         # --- EDUCATIONAL PLATFORM ANALYSIS ---
         if analysis["website_type"] in ['educational', 'career_platform']:
@@ -2019,6 +3980,8 @@ def extract_elements(soup, base_url, username=None, password=None):
             })
         
     except Exception as e:
+        if visual_position is None:
+            visual_position = len(test_cases)
         test_cases.append({
             'Type': 'Analysis',
             'Action': 'Perform ML analysis',
@@ -2036,14 +3999,21 @@ def extract_elements(soup, base_url, username=None, password=None):
         # Check if this form has already been tested
         if form_id not in tested_forms:
             tested_forms.add(form_id)
+            if budget.expired():
+                test_cases.append(skipped_test_case('Form', f"Submit {form.get('method', 'get').upper()} form",
+                                                    form.get('action') or base_url))
+                continue
             
             # Updated: auto_fill_and_submit_form may return post_login_test_cases
-            result = auto_fill_and_submit_form(form, base_url, username, password)
+            result = auto_fill_and_submit_form(form, base_url, username, password, budget=budget)
             if isinstance(result, tuple) and len(result) == 4:
                 action, method, actual_result, post_login_test_cases = result
                 post_login_cases.extend(post_login_test_cases)
             else:
                 action, method, actual_result = result
+            if actual_result is None:
+                test_cases.append(skipped_test_case('Form', f"Submit {method} form", action))
+                continue
             test_cases.append({
                 'Type': 'Form',
                 'Action': f"Submit {method} form",
@@ -2074,6 +4044,7 @@ def extract_elements(soup, base_url, username=None, password=None):
                 })
     
     # --- Enhanced Link Testing (Deduplicated) ---
+    unique_links = []
     for idx, link in enumerate(soup.find_all('a', href=True)):
         href = urljoin(base_url, link['href'])
         link_text = link.get_text(strip=True)
@@ -2082,23 +4053,383 @@ def extract_elements(soup, base_url, username=None, password=None):
         # Check if this link has already been tested
         if link_id not in tested_links:
             tested_links.add(link_id)
-            test_cases.append({
-                'Type': 'Link',
-                'Action': 'Click link',
-                'Element': link_text or href,
-                'Expected Result': 'Navigates to linked page',
-                'Actual Result': 'Navigates to linked page',
-                'Notes': f"Link #{idx+1} on page [ML Enhanced - Deduplicated]"
-            })
+            unique_links.append((idx, link, href, link_text))
+    
+    # Pages with thousands of links get a sample spread over landmarks and internal/external targets
+    base_host = urlparse(base_url).netloc
+    link_sampling = {}
+    unique_links = website_intelligence.sample_elements(
+        'links', unique_links,
+        lambda entry: (sampling_container(entry[1]), 'internal' if urlparse(entry[2]).netloc == base_host else 'external'),
+        link_sampling)
+    for idx, link, href, link_text in unique_links:
+        test_cases.append({
+            'Type': 'Link',
+            'Action': 'Click link',
+            'Element': link_text or href,
+            'Expected Result': 'Navigates to linked page',
+            'Actual Result': 'Navigates to linked page',
+            'Notes': f"Link #{idx+1} on page [ML Enhanced - Deduplicated]"
+        })
+    test_cases.extend(sampling_test_cases(link_sampling))
     
     # Add post-login/dashboard test cases if any
     test_cases.extend(post_login_cases)
+    
+    # Join the visual stage back in where the sequential pipeline would have put it
+    visual_cases = []
+    for future in visual_futures:
+        try:
+            visual_cases.extend(future.result(timeout=budget.remaining()))
+        except FutureTimeoutError:
+            future.cancel()
+            visual_cases.append(skipped_test_case('Computer Vision', 'Analyze website visual elements', base_url))
+    test_cases[visual_position:visual_position] = visual_cases
     return test_cases
 
+# Tags the JSX scanner reports; everything else is only tracked for nesting
+JSX_TRACKED_TAGS = ('form', 'button', 'a', 'input')
+JSX_VOID_TAGS = {'input', 'br', 'img', 'hr', 'meta', 'link', 'area', 'base', 'col', 'embed', 'source', 'track', 'wbr'}
+
+class JSXTagScanner:
+    """Single linear pass over JS/JSX source that finds tags, skipping strings, comments and regex literals
+
+    The scanner works on bytes-like input (bytes or a read-only mmap) so large files can be
+    scanned in place; str input is encoded once up front.
+    """
+
+    _SPACE_BYTES = frozenset(b' \t\r\n')
+    _IDENTIFIER_BYTES = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$') | frozenset(range(128, 256))
+    # A '/' or '<' after one of these starts a regex literal / JSX element rather than an operator
+    _EXPRESSION_PRECEDERS = frozenset(b'(,=:[!&|?{};+-*%<>~^')
+    _EXPRESSION_KEYWORDS = {b'return', b'typeof', b'case', b'yield', b'await', b'in', b'of', b'else', b'do',
+                            b'void', b'delete', b'new', b'throw', b'instanceof', b'default'}
+
+    # A '<' only matters before a tag name or '>'; braces only matter inside {...} expressions,
+    # so outside of them the search steps over both
+    _JS_SPECIAL = re.compile(rb'["\'`/{}]|<[A-Za-z>]')
+    _TOP_LEVEL_SPECIAL = re.compile(rb'["\'`/]|<[A-Za-z>]')
+    # Runs of code that cannot start a tag, regex literal or template, consumed in one match: plain
+    # characters, whole strings, and a '/' or '<' right after an operand (a division or comparison).
+    # Operands ending like an expression keyword (by their last two letters) are left to
+    # _expression_allowed, as is everything after whitespace or comments.
+    _AFTER_OPERAND = (rb'(?<=[\w$)\]])(?<!'
+                      + b'|'.join(sorted({keyword[-2:] for keyword in _EXPRESSION_KEYWORDS})) + rb')')
+    _PLAIN_CODE = (rb'"[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"|\'[^\'\\\n]*(?:\\[\s\S][^\'\\\n]*)*\''
+                   rb'|' + _AFTER_OPERAND + rb'(?:/(?![/*])|<)')
+    _TOP_LEVEL_CODE = re.compile(rb'(?:[^"\'`/<]+|' + _PLAIN_CODE + rb')*')
+    _EXPRESSION_CODE = re.compile(rb'(?:[^"\'`/<{}]+|' + _PLAIN_CODE + rb')*')
+    _TEMPLATE_SPECIAL = re.compile(rb'[`\\]|\$\{')
+    _CHILDREN_SPECIAL = re.compile(rb'[<{]')
+    _STRINGS = {
+        ord('"'): re.compile(rb'"[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"?'),
+        ord("'"): re.compile(rb"'[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*'?"),
+    }
+    _REGEX_LITERAL = re.compile(rb'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+    _TAG_NAME = re.compile(rb'[A-Za-z][\w.:-]*')
+    _CLOSING_TAG = re.compile(rb'</\s*([A-Za-z][\w.:-]*)?\s*>')
+    _ATTR_NAME = re.compile(rb'[^\s=/>{}"\'<]+')
+    # A whole tag head matched at once when it is well formed and its {...} expressions are simple
+    # (no strings, braces, markup, arrows or slashes); anything else goes through the attribute loop.
+    # Attributes must be separated by whitespace, so a name is never split to retry a failed match.
+    _SIMPLE_EXPRESSION = re.compile(rb'\{[^{}"\'`<>/]*\}')
+    _ATTRIBUTE = (rb'(?:([^\s=/>{}"\'<]+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|\{[^{}"\'`<>/]*\}|[^\s=/>{}"\'<]+))?'
+                  rb'|(\{[^{}"\'`<>/]*\}))')
+    _SIMPLE_ATTRIBUTE = re.compile(_ATTRIBUTE)
+    _SIMPLE_TAG_HEAD = re.compile(rb'(?:\s+' + _ATTRIBUTE + rb')*\s*(?P<close>/?>)')
+    # Children of a leaf element (text and simple expressions only) up to its closing tag
+    _LEAF_CHILDREN = re.compile(rb'((?:[^<{]+|\{[^{}"\'`<>/]*\})*)</\s*([A-Za-z][\w.:-]*)?\s*>')
+    _WHITESPACE = re.compile(rb'\s*')
+    _LT, _GT, _SLASH, _STAR = ord('<'), ord('>'), ord('/'), ord('*')
+    _LBRACE, _RBRACE, _BACKTICK = ord('{'), ord('}'), ord('`')
+
+    def __init__(self, tracked_tags=JSX_TRACKED_TAGS):
+        self.tracked_tags = set(tracked_tags)
+        # Sources without a single '<tag' for a tracked tag (most compiled bundles) need no scan
+        names = b'|'.join(re.escape(tag.encode('ascii')) for tag in sorted(self.tracked_tags))
+        self._tracked_tag_start = re.compile(rb'<(?:' + names + rb')(?![\w.:-])', re.IGNORECASE)
+
+    def _expression_allowed(self, text, i, last_comment, for_tag):
+        """Decide from the previous significant character whether an expression can start at i"""
+        j = i - 1
+        newline = False
+        while j >= 0:
+            if last_comment and j == last_comment[1] - 1:
+                newline = newline or text[j] == 10
+                j = last_comment[0] - 1
+            elif text[j] in self._SPACE_BYTES:
+                newline = newline or text[j] == 10
+                j -= 1
+            else:
+                break
+        if j < 0:
+            return True
+        c = text[j]
+        if c in self._EXPRESSION_PRECEDERS:
+            # '1<<n' is a shift, not an element
+            return not (for_tag and c == self._LT)
+        if for_tag and newline:
+            # A line break after a complete expression ends the statement (ASI), so markup may follow
+            return True
+        if c in self._IDENTIFIER_BYTES:
+            k = j
+            while k >= 0 and text[k] in self._IDENTIFIER_BYTES:
+                k -= 1
+            return text[k + 1:j + 1] in self._EXPRESSION_KEYWORDS
+        return False
+
+    def _open_tag(self, text, i, stack, elements, open_tracked):
+        """Push the frame for a tag (or fragment) starting at i and return the new position"""
+        current = stack[-1]
+        if current.get('expression') is not None:
+            current['expression']['had_jsx'] = True
+        if text[i + 1:i + 2] == b'>':
+            stack.append({'kind': 'children', 'element': None, 'name': ''})
+            return i + 2
+        match = self._TAG_NAME.match(text, i + 1)
+        name = match.group(0).decode('ascii')
+        tag = name.lower()
+        element = None
+        if tag in self.tracked_tags:
+            element = {'tag': tag, 'attributes': {}, 'text': [], 'position': i}
+            elements.append(element)
+        head = self._SIMPLE_TAG_HEAD.match(text, match.end())
+        if head is None:
+            stack.append({'kind': 'tag', 'element': element, 'name': name})
+            return match.end()
+        if element is not None:
+            for attribute in self._SIMPLE_ATTRIBUTE.finditer(text, match.end(), head.start('close')):
+                attr_name, value, spread = attribute.groups()
+                if spread is not None:
+                    attr_name, value = b'...', spread
+                if value is None:
+                    value = True
+                elif value[:1] == b'{':
+                    value = value[1:-1].decode('utf-8', errors='ignore').strip()
+                else:
+                    if value[:1] in (b'"', b"'"):
+                        value = value[1:-1]
+                    value = value.decode('utf-8', errors='ignore')
+                element['attributes'][attr_name.decode('utf-8', errors='ignore')] = value
+        if head.group('close') != b'>' or tag in JSX_VOID_TAGS:
+            return head.end()
+        leaf = self._LEAF_CHILDREN.match(text, head.end())
+        if leaf and leaf.group(2) == match.group(0):
+            # Opened and closed in one step: its text goes to it and every enclosing tracked element
+            if element is not None:
+                element['text'].append(leaf.group(1))
+            for enclosing in open_tracked:
+                enclosing['text'].append(leaf.group(1))
+            return leaf.end()
+        stack.append({'kind': 'children', 'element': element, 'name': name})
+        if element is not None:
+            open_tracked.append(element)
+        return head.end()
+
+    def scan(self, text):
+        """Return tracked elements in document order as dicts with tag, attributes, text and byte position"""
+        if isinstance(text, str):
+            text = text.encode('utf-8')
+        if not self._tracked_tag_start.search(text):
+            return []
+        elements = []
+        open_tracked = []
+        stack = [{'kind': 'js', 'depth': 0, 'expression': None}]
+        last_comment = None
+        pos = 0
+        n = len(text)
+        while pos < n:
+            frame = stack[-1]
+            kind = frame['kind']
+            if kind == 'js':
+                top_level = len(stack) == 1
+                pos = (self._TOP_LEVEL_CODE if top_level else self._EXPRESSION_CODE).match(text, pos).end()
+                match = (self._TOP_LEVEL_SPECIAL if top_level else self._JS_SPECIAL).search(text, pos)
+                if not match:
+                    break
+                i = match.start()
+                c = text[i]
+                if c in self._STRINGS:
+                    pos = self._STRINGS[c].match(text, i).end()
+                elif c == self._BACKTICK:
+                    stack.append({'kind': 'template'})
+                    pos = i + 1
+                elif c == self._LBRACE:
+                    frame['depth'] += 1
+                    pos = i + 1
+                elif c == self._RBRACE:
+                    pos = i + 1
+                    if frame['depth'] > 0:
+                        frame['depth'] -= 1
+                    elif len(stack) > 1:
+                        stack.pop()
+                        self._close_expression(frame['expression'], text, i, open_tracked)
+                elif c == self._SLASH:
+                    following = text[i + 1] if i + 1 < n else None
+                    if following == self._SLASH:
+                        end = text.find(b'\n', i)
+                        pos = n if end < 0 else end + 1
+                        last_comment = (i, pos)
+                    elif following == self._STAR:
+                        end = text.find(b'*/', i + 2)
+                        pos = n if end < 0 else end + 2
+                        last_comment = (i, pos)
+                    elif self._expression_allowed(text, i, last_comment, False):
+                        literal = self._REGEX_LITERAL.match(text, i)
+                        pos = literal.end() if literal else i + 1
+                    else:
+                        pos = i + 1
+                elif self._expression_allowed(text, i, last_comment, True):
+                    pos = self._open_tag(text, i, stack, elements, open_tracked)
+                else:
+                    pos = i + 1
+            elif kind == 'template':
+                match = self._TEMPLATE_SPECIAL.search(text, pos)
+                if not match:
+                    break
+                token = match.group(0)
+                if token == b'`':
+                    stack.pop()
+                    pos = match.end()
+                elif token == b'\\':
+                    pos = match.end() + 1
+                else:
+                    stack.append({'kind': 'js', 'depth': 0, 'expression': {'owner': None}})
+                    pos = match.end()
+            elif kind == 'tag':
+                pos = self._WHITESPACE.match(text, pos).end()
+                if pos >= n:
+                    break
+                c = text[pos]
+                element = frame['element']
+                if text[pos:pos + 2] == b'/>':
+                    stack.pop()
+                    pos += 2
+                elif c == self._GT:
+                    stack.pop()
+                    pos += 1
+                    if frame['name'].lower() not in JSX_VOID_TAGS:
+                        stack.append({'kind': 'children', 'element': element, 'name': frame['name']})
+                        if element is not None:
+                            open_tracked.append(element)
+                elif c == self._LBRACE:
+                    stack.append({'kind': 'js', 'depth': 0,
+                                  'expression': {'owner': 'attribute', 'element': element, 'name': '...', 'start': pos + 1}})
+                    pos += 1
+                else:
+                    match = self._ATTR_NAME.match(text, pos)
+                    if not match:
+                        pos += 1
+                        continue
+                    attr_name = match.group(0).decode('utf-8', errors='ignore')
+                    pos = self._WHITESPACE.match(text, match.end()).end()
+                    if text[pos:pos + 1] != b'=':
+                        if element is not None:
+                            element['attributes'][attr_name] = True
+                        continue
+                    pos = self._WHITESPACE.match(text, pos + 1).end()
+                    quote = text[pos:pos + 1]
+                    if quote == b'"' or quote == b"'":
+                        end = text.find(quote, pos + 1)
+                        end = n if end < 0 else end
+                        value = text[pos + 1:end]
+                        pos = end + 1
+                    elif quote == b'{':
+                        stack.append({'kind': 'js', 'depth': 0,
+                                      'expression': {'owner': 'attribute', 'element': element, 'name': attr_name, 'start': pos + 1}})
+                        pos += 1
+                        continue
+                    else:
+                        value_match = self._ATTR_NAME.match(text, pos)
+                        value = value_match.group(0) if value_match else b''
+                        pos = value_match.end() if value_match else pos
+                    if element is not None:
+                        element['attributes'][attr_name] = value.decode('utf-8', errors='ignore')
+            else:
+                match = self._CHILDREN_SPECIAL.search(text, pos)
+                end = match.start() if match else n
+                if end > pos and open_tracked:
+                    chunk = text[pos:end]
+                    for element in open_tracked:
+                        element['text'].append(chunk)
+                if not match:
+                    break
+                i = end
+                if text[i] == self._LBRACE:
+                    simple = self._SIMPLE_EXPRESSION.match(text, i)
+                    if simple:
+                        # Nothing in it can nest, so its source is parent text straight away
+                        pos = simple.end()
+                        for element in open_tracked:
+                            element['text'].append(simple.group(0))
+                        continue
+                    stack.append({'kind': 'js', 'depth': 0,
+                                  'expression': {'owner': 'children', 'start': i + 1, 'had_jsx': False}})
+                    pos = i + 1
+                elif text[i + 1:i + 2] == b'/':
+                    closing = self._CLOSING_TAG.match(text, i)
+                    pos = closing.end() if closing else i + 2
+                    if closing:
+                        self._close_element((closing.group(1) or b'').decode('ascii'), stack, open_tracked)
+                elif text[i + 1:i + 2] == b'>' or text[i + 1:i + 2].isalpha():
+                    pos = self._open_tag(text, i, stack, elements, open_tracked)
+                else:
+                    for element in open_tracked:
+                        element['text'].append(b'<')
+                    pos = i + 1
+        for element in elements:
+            element['text'] = ' '.join(b''.join(element['text']).decode('utf-8', errors='ignore').split())
+        return elements
+
+    def _close_expression(self, expression, text, end, open_tracked):
+        """Attach the source of a finished {...} expression to its attribute or parent text"""
+        if not expression:
+            return
+        if expression['owner'] == 'attribute':
+            if expression['element'] is not None:
+                value = text[expression['start']:end].decode('utf-8', errors='ignore').strip()
+                expression['element']['attributes'][expression['name']] = value
+        elif expression['owner'] == 'children' and not expression['had_jsx']:
+            chunk = text[expression['start'] - 1:end + 1]
+            for element in open_tracked:
+                element['text'].append(chunk)
+
+    def _close_element(self, name, stack, open_tracked):
+        """Pop frames up to the element a closing tag belongs to; stray closing tags are ignored"""
+        j = len(stack) - 1
+        while j > 0 and stack[j]['kind'] == 'children':
+            if stack[j]['name'] == name:
+                break
+            j -= 1
+        if j <= 0 or stack[j]['kind'] != 'children':
+            return
+        for frame in stack[j:]:
+            element = frame['element']
+            if element is not None:
+                for k in range(len(open_tracked) - 1, -1, -1):
+                    if open_tracked[k] is element:
+                        del open_tracked[k]
+                        break
+        del stack[j:]
+
+jsx_tag_scanner = JSXTagScanner()
+
+def _jsx_attribute_text(attributes, *names):
+    """First non-empty string value among the named JSX attributes"""
+    for name in names:
+        value = attributes.get(name)
+        if isinstance(value, str) and value:
+            return value
+    return ''
+
 def extract_elements_from_jsx(js_content, base_url):
+    elements = jsx_tag_scanner.scan(js_content)
+    forms = [e for e in elements if e['tag'] == 'form']
+    buttons = [e for e in elements if e['tag'] == 'button']
+    links = [e for e in elements if e['tag'] == 'a']
+    inputs = [e for e in elements if e['tag'] == 'input']
     test_cases = []
-    # Find <form ...>
-    for idx, match in enumerate(re.finditer(r'<form[^>]*>', js_content, re.IGNORECASE)):
+    for idx, form in enumerate(forms):
         test_cases.append({
             'Type': 'Form',
             'Action': 'Submit form',
@@ -2107,9 +4438,8 @@ def extract_elements_from_jsx(js_content, base_url):
             'Actual Result': 'Form submission is broken!',
             'Notes': f"Form #{idx+1} in JS/JSX file"
         })
-    # Find <button ...>
-    for idx, match in enumerate(re.finditer(r'<button[^>]*>(.*?)</button>', js_content, re.IGNORECASE|re.DOTALL)):
-        btn_text = match.group(1).strip()
+    for idx, button in enumerate(buttons):
+        btn_text = button['text'] or _jsx_attribute_text(button['attributes'], 'aria-label', 'title')
         test_cases.append({
             'Type': 'Button',
             'Action': 'Click button',
@@ -2118,9 +4448,8 @@ def extract_elements_from_jsx(js_content, base_url):
             'Actual Result': 'Button is not working!',
             'Notes': f"Button #{idx+1} in JS/JSX file"
         })
-    # Find <a ...>
-    for idx, match in enumerate(re.finditer(r'<a[^>]*>(.*?)</a>', js_content, re.IGNORECASE|re.DOTALL)):
-        link_text = match.group(1).strip()
+    for idx, link in enumerate(links):
+        link_text = link['text'] or _jsx_attribute_text(link['attributes'], 'aria-label', 'href')
         test_cases.append({
             'Type': 'Link',
             'Action': 'Click link',
@@ -2129,14 +4458,53 @@ def extract_elements_from_jsx(js_content, base_url):
             'Actual Result': 'Navigates to linked page',
             'Notes': f"Link #{idx+1} in JS/JSX file"
         })
+    for idx, input_elem in enumerate(inputs):
+        input_type = _jsx_attribute_text(input_elem['attributes'], 'type') or 'text'
+        input_name = _jsx_attribute_text(input_elem['attributes'], 'name', 'id', 'placeholder') or 'unnamed'
+        test_cases.append({
+            'Type': 'Form Field',
+            'Action': f'Fill {input_type} input',
+            'Element': f'{input_type} field ({input_name})',
+            'Expected Result': 'Field should accept valid input',
+            'Actual Result': 'Field validation test case generated',
+            'Notes': f"Input #{idx+1} in JS/JSX file"
+        })
     return test_cases
 
-def write_to_excel(test_cases, filename='test_cases.xlsx'):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Test Cases'
+def append_styled_row(ws, values, fill, font, streaming=False):
+    """Append a row with one fill and font; write-only sheets take cells styled up front"""
+    if streaming:
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.fill = fill
+            cell.font = font
+            cells.append(cell)
+        ws.append(cells)
+        return
+    ws.append(values)
+    for cell in ws[ws.max_row]:
+        cell.fill = fill
+        cell.font = font
+
+def open_output_sheet(title, test_cases):
+    """Workbook and sheet for a report; write-only (streamed to disk on save) once memory passed the ceiling"""
+    streaming = MEMORY.over_ceiling() or getattr(test_cases, 'spilled', 0) > 0
+    if streaming:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title)
+    else:
+        wb = Workbook()
+        ws = wb.active
+        ws.title = title
+    return wb, ws, streaming
+
+@traced('write_to_excel')
+def write_to_excel(test_cases, filename='test_cases.xlsx', sources=False):
+    wb, ws, streaming = open_output_sheet('Test Cases', test_cases)
     headers = ['Test Case ID', 'Type', 'Action', 'Element', 'Expected Result', 'Actual Result', 'Notes']
-    ws.append(headers)
+    if sources:
+        headers.append('Source URL')
     # Define color fills
     header_fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
     fill1 = PatternFill(start_color='DCE6F1', end_color='DCE6F1', fill_type='solid')
@@ -2147,11 +4515,8 @@ def write_to_excel(test_cases, filename='test_cases.xlsx'):
     # Define fonts
     header_font = Font(bold=True, color='FFFFFF', size=14)
     data_font = Font(size=14)
-    # Apply header fill and font
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(row=1, column=col)
-        cell.fill = header_fill
-        cell.font = header_font
+    # Header row
+    append_styled_row(ws, headers, header_fill, header_font, streaming)
     # Data rows
     for idx, tc in enumerate(test_cases, 1):
         row = [
@@ -2163,108 +4528,1459 @@ def write_to_excel(test_cases, filename='test_cases.xlsx'):
             tc['Actual Result'],
             tc['Notes']
         ]
-        ws.append(row)
-        fill = fills[(idx - 1) % len(fills)]
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=idx+1, column=col)
-            cell.fill = fill
-            cell.font = data_font
+        if sources:
+            row.append(tc.get('Source URL', ''))
+        append_styled_row(ws, row, fills[(idx - 1) % len(fills)], data_font, streaming)
     wb.save(filename)
     print(f"Test cases written to {filename}")
 
-def clone_github_repo(repo_url, dest_dir):
+# Directories that never contain analyzable sources and are pruned before descending
+IGNORED_REPO_DIRS = {'.git', 'node_modules', 'bower_components', 'jspm_packages', '.hg', '.svn', '__pycache__', '.venv', 'venv'}
+REPO_SOURCE_EXTENSIONS = ('.html', '.js', '.jsx')
+
+def clone_github_repo(repo_url, dest_dir, depth=1, blobless=False, sparse_paths=None, no_checkout=False):
+    """Clone a repository shallowly, optionally blobless and restricted to sparse paths"""
     if Repo is None:
         print("gitpython is not installed. Please install it with 'pip install gitpython'.")
         sys.exit(1)
+    # git ignores --depth/--filter for plain local paths, so route them through file://
+    if os.path.isdir(repo_url):
+        repo_url = 'file://' + os.path.abspath(repo_url)
+    clone_kwargs = {}
+    multi_options = []
+    if depth:
+        clone_kwargs['depth'] = depth
+    if blobless or sparse_paths:
+        multi_options.append('--filter=blob:none')
+    if sparse_paths:
+        multi_options.append('--sparse')
+    if no_checkout:
+        clone_kwargs['no_checkout'] = True
     try:
-        Repo.clone_from(repo_url, dest_dir)
+        repo = Repo.clone_from(repo_url, dest_dir, multi_options=multi_options or None, **clone_kwargs)
+        if sparse_paths:
+            repo.git.sparse_checkout('set', *sparse_paths)
         print(f"Cloned {repo_url} to {dest_dir}")
+        return repo
     except Exception as e:
         print(f"Failed to clone repo: {e}")
         sys.exit(1)
 
-def analyze_github_repo(repo_url):
-    temp_dir = tempfile.mkdtemp()
+def _gitignore_pattern_to_regex(pattern, anchored):
+    """Translate a single .gitignore glob into a regular expression"""
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+            regex += '/.*'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        elif pattern[i] == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex += re.escape(pattern[i])
+                i += 1
+            else:
+                regex += '[' + pattern[i + 1:end].replace('!', '^', 1) + ']'
+                i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return re.compile(regex)
+
+def load_gitignore_rules(abs_dir, rel_dir):
+    """Load the .gitignore rules declared in a single directory"""
+    rules = []
+    try:
+        with open(os.path.join(abs_dir, '.gitignore'), 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        if line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        line = line.lstrip('/')
+        rules.append((rel_dir, _gitignore_pattern_to_regex(line, anchored), negate, dir_only))
+    return rules
+
+def is_gitignored(rel_path, is_dir, rules):
+    """Check a repository-relative path against the accumulated .gitignore rules"""
+    ignored = False
+    for base, regex, negate, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        if base:
+            if not rel_path.startswith(base + '/'):
+                continue
+            candidate = rel_path[len(base) + 1:]
+        else:
+            candidate = rel_path
+        if regex.fullmatch(candidate):
+            ignored = not negate
+    return ignored
+
+def discover_source_files(root, extensions=REPO_SOURCE_EXTENSIONS, ignored_dirs=IGNORED_REPO_DIRS):
+    """Find source files in a single scandir walk, pruning ignored directories up front"""
+    found = {ext: [] for ext in extensions}
+    stack = [('', [])]
+    while stack:
+        rel_dir, rules = stack.pop()
+        abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+        rules = rules + load_gitignore_rules(abs_dir, rel_dir)
+        try:
+            with os.scandir(abs_dir) as it:
+                entries = list(it)
+        except OSError as e:
+            print(f"Failed to scan {abs_dir}: {e}")
+            continue
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ignored_dirs and not is_gitignored(rel_path, True, rules):
+                    stack.append((rel_path, rules))
+            elif entry.is_file():
+                ext = os.path.splitext(entry.name)[1].lower()
+                if ext in found and not is_gitignored(rel_path, False, rules):
+                    found[ext].append(entry.path)
+    for files in found.values():
+        files.sort()
+    return found
+
+# Where per-file repository results are cached between scans
+CACHE_ROOT = os.path.join(os.path.expanduser('~'), '.cache', 'website_testcase_generator')
+
+def _compute_tool_version_key():
+    """Fingerprint of this tool's source; cached results are invalid once the analysis code changes"""
     try:
-        clone_github_repo(repo_url, temp_dir)
-        html_files = [y for x in os.walk(temp_dir) for y in glob.glob(os.path.join(x[0], '*.html'))]
-        js_files = [y for x in os.walk(temp_dir) for y in glob.glob(os.path.join(x[0], '*.js'))]
-        jsx_files = [y for x in os.walk(temp_dir) for y in glob.glob(os.path.join(x[0], '*.jsx'))]
-        # Filter out node_modules and .git
-        html_files = [f for f in html_files if 'node_modules' not in f and '.git' not in f]
-        js_files = [f for f in js_files if 'node_modules' not in f and '.git' not in f]
-        jsx_files = [f for f in jsx_files if 'node_modules' not in f and '.git' not in f]
-        print(f"Found {len(html_files)} HTML, {len(js_files)} JS, {len(jsx_files)} JSX files.")
-        all_test_cases = []
-        for html_file in html_files:
-            print(f"Analyzing HTML: {html_file}")
-            soup = get_soup_from_file(html_file)
-            if soup:
-                test_cases = extract_elements(soup, base_url=html_file)
-                all_test_cases.extend(test_cases)
-        for js_file in js_files + jsx_files:
-            print(f"Analyzing JS/JSX: {js_file}")
+        with open(os.path.abspath(__file__), 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()[:12]
+    except (OSError, NameError):
+        return 'unknown'
+
+TOOL_VERSION_KEY = _compute_tool_version_key()
+
+# One unit of repository work; content is set when the blob was read from the object database
+SourceItem = namedtuple('SourceItem', ['index', 'kind', 'path', 'base_url', 'blob_sha', 'content'])
+
+class RepoAnalysisCache:
+    """On-disk cache of per-file test cases keyed by git blob SHA and tool version"""
+
+    def __init__(self, cache_dir=None, settings_key=''):
+        self.cache_dir = os.path.join(cache_dir or CACHE_ROOT, 'repo_results')
+        # Options that change results (such as size limits) get their own entries
+        self.version_key = TOOL_VERSION_KEY
+        if settings_key:
+            self.version_key += '-' + hashlib.sha1(settings_key.encode('utf-8')).hexdigest()[:8]
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, blob_sha, kind):
+        return os.path.join(self.cache_dir, blob_sha[:2], f"{blob_sha}-{kind}-{self.version_key}.json")
+
+    def get(self, item):
+        """Return cached test cases for an item, or None"""
+        if not item.blob_sha:
+            self.misses += 1
+            return None
+        try:
+            with open(self._entry_path(item.blob_sha, item.kind), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # Reported paths (and the URL-based website type) depend on where the file lives
+        if entry.get('base_url') != item.base_url:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['test_cases']
+
+    def put(self, item, test_cases):
+        """Store the test cases produced for an item"""
+        if not item.blob_sha:
+            return
+        path = self._entry_path(item.blob_sha, item.kind)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique per process and thread, so concurrent writers of one entry never share a temp file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'base_url': item.base_url, 'test_cases': test_cases}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to write analysis cache entry {path}: {e}")
+
+def repo_analysis_settings_key(max_bytes, oversize_policy, element_caps):
+    """RepoAnalysisCache settings key for the options that change per-file results"""
+    caps = ','.join(f"{category}={cap}" for category, cap in sorted(element_caps.items()))
+    return f"{max_bytes}:{oversize_policy}:{caps}"
+
+# Saved logins are reused for this long before logging in again
+DEFAULT_AUTH_SESSION_TTL = 30 * 60
+
+class AuthSessionCache:
+    """Playwright storage state (cookies plus localStorage) of successful logins, per site and credentials"""
+
+    def __init__(self, cache_dir=None, ttl=DEFAULT_AUTH_SESSION_TTL):
+        self.cache_dir = os.path.join(cache_dir or CACHE_ROOT, 'auth_sessions')
+        self.ttl = ttl
+
+    def _entry_path(self, url, username):
+        # Keyed on site and user only; the password is checked against a salted hash inside the entry
+        parsed = urlparse(url)
+        key = '\0'.join([f"{parsed.scheme}://{parsed.netloc}", username or ''])
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    @staticmethod
+    def _password_hash(password, salt):
+        return hashlib.scrypt((password or '').encode('utf-8'), salt=salt, n=2 ** 14, r=8, p=1).hex()
+
+    def get(self, url, username, password):
+        """Saved session for a login, or None if there is none, it has expired or the password differs"""
+        path = self._entry_path(url, username)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            salt = bytes.fromhex(entry['salt'])
+        except (OSError, ValueError, KeyError):
+            return None
+        # A wrong password never reuses a good session
+        if not hmac.compare_digest(self._password_hash(password, salt), entry.get('password_hash', '')):
+            return None
+        if time.time() - entry.get('saved_at', 0) > self.ttl:
+            self.invalidate(url, username)
+            return None
+        return entry
+
+    def put(self, url, username, password, storage_state, landing_url):
+        """Save the storage state of a successful login and the page it landed on"""
+        path = self._entry_path(url, username)
+        salt = os.urandom(16)
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            # Session cookies are credentials: readable by the owner only
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'landing_url': landing_url, 'salt': salt.hex(),
+                           'password_hash': self._password_hash(password, salt), 'storage_state': storage_state}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to save login session {path}: {e}")
+
+    def invalidate(self, url, username):
+        """Forget a saved session (expired, or rejected by the site)"""
+        try:
+            os.remove(self._entry_path(url, username))
+        except OSError:
+            pass
+
+# Default limits for the visual result cache; the least recently used entries are evicted first
+DEFAULT_VISUAL_CACHE_ENTRIES = 20000
+DEFAULT_VISUAL_CACHE_MB = 256
+
+class VisualResultCache:
+    """On-disk cache of per-tile YOLO detections keyed by perceptual hash, with LRU eviction"""
+
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_VISUAL_CACHE_ENTRIES, max_mb=DEFAULT_VISUAL_CACHE_MB):
+        self.cache_dir = os.path.join(cache_dir or CACHE_ROOT, 'visual_results')
+        self.version_key = TOOL_VERSION_KEY
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        # Running totals, so evict() is O(1) until a limit is crossed; None until the first scan
+        self.entry_count = None
+        self.total_bytes = None
+
+    def _entry_path(self, tile_key):
+        return os.path.join(self.cache_dir, tile_key[:2], f"{tile_key}-{self.version_key}.json")
+
+    def _scan(self):
+        """(mtime, size, path) of every entry, resyncing the running totals"""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        self.entry_count = len(entries)
+        self.total_bytes = sum(size for _, size, _ in entries)
+        return entries
+
+    def get(self, tile_key):
+        """Return cached (boxes, confidences, class_ids, names) for a tile, or None"""
+        path = self._entry_path(tile_key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # Touch on read so eviction drops the least recently used entries
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return (np.array(entry['boxes'], dtype=float).reshape(-1, 4),
+                np.array(entry['confidences'], dtype=float),
+                np.array(entry['class_ids'], dtype=int),
+                {int(class_id): name for class_id, name in entry['names'].items()})
+
+    def put(self, tile_key, tile_detections):
+        """Store a tile's detections (in tile coordinates)"""
+        boxes, confidences, class_ids, names = tile_detections
+        path = self._entry_path(tile_key)
+        try:
             try:
-                with open(js_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    js_content = f.read()
-                test_cases = extract_elements_from_jsx(js_content, base_url=js_file)
-                all_test_cases.extend(test_cases)
-            except Exception as e:
-                print(f"Failed to analyze {js_file}: {e}")
+                replaced_size = os.path.getsize(path)
+            except OSError:
+                replaced_size = None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'boxes': boxes.tolist(), 'confidences': confidences.tolist(),
+                           'class_ids': class_ids.tolist(), 'names': names}, f)
+            os.replace(tmp_path, path)
+            if self.entry_count is not None:
+                self.entry_count += replaced_size is None
+                self.total_bytes += os.path.getsize(path) - (replaced_size or 0)
+        except OSError as e:
+            print(f"Failed to write visual cache entry {path}: {e}")
+
+    def evict(self):
+        """Delete least recently used entries once the cache is over a limit
+
+        Only the running totals are checked on each call; the directory is walked when a limit
+        is crossed, and then trimmed to 90% of the limits so the next walk is many writes away.
+        """
+        if self.entry_count is None:
+            self._scan()
+        if self.entry_count <= self.max_entries and self.total_bytes <= self.max_bytes:
+            return
+        entries = sorted(self._scan())
+        count, total_bytes = self.entry_count, self.total_bytes
+        max_entries, max_bytes = int(self.max_entries * 0.9), int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if count <= max_entries and total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            count -= 1
+            total_bytes -= size
+            self.evicted += 1
+        self.entry_count, self.total_bytes = count, total_bytes
+
+def get_index_blob_shas(repo):
+    """Map repository-relative paths to their blob SHAs from the git index"""
+    blob_shas = {}
+    for line in repo.git.ls_files('-s', '-z').split('\0'):
+        if not line:
+            continue
+        meta, path = line.split('\t', 1)
+        blob_shas[path] = meta.split()[1]
+    return blob_shas
+
+def _source_kind(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in REPO_SOURCE_EXTENSIONS:
+        return None
+    return 'html' if ext == '.html' else 'js'
+
+def collect_changed_source_items(repo, since):
+    """Build items for sources touched between a revision and HEAD, read from the object database"""
+    changed = [p for p in repo.git.diff('--name-only', '-z', '--diff-filter=ACMRT', since, 'HEAD').split('\0') if p]
+    changed = [p for p in changed
+               if _source_kind(p) and not any(part in IGNORED_REPO_DIRS for part in p.split('/')[:-1])]
+    if not changed:
+        return []
+    blob_shas = {}
+    for line in repo.git.ls_tree('-r', '-z', 'HEAD', '--', *changed).split('\0'):
+        if not line:
+            continue
+        meta, path = line.split('\t', 1)
+        blob_shas[path] = meta.split()[2]
+    # HTML before JS/JSX, matching the order of a full scan
+    changed.sort(key=lambda p: (_source_kind(p) != 'html', p))
+    return [SourceItem(i, _source_kind(p), None, p, blob_shas.get(p), None) for i, p in enumerate(changed)]
+
+def read_blob_content(repo, item, max_bytes=DEFAULT_MAX_SOURCE_BYTES, oversize_policy='sample'):
+    """Read a blob straight from the object database (lazily fetched in partial clones)"""
+    stream = repo.odb.stream(bytes.fromhex(item.blob_sha))
+    limit = apply_size_limit(item.base_url, stream.size, max_bytes, oversize_policy)
+    return None if limit is None else stream.read(limit)
+
+def _disable_worker_side_effects():
+    """Pool initializer: repository workers never launch browsers or touch the network"""
+    global PLAYWRIGHT_AVAILABLE
+    PLAYWRIGHT_AVAILABLE = False
+    website_intelligence.visual_analysis_enabled = False
+
+def analyze_source_file(kind, filepath, base_url=None, content=None,
+                        max_bytes=DEFAULT_MAX_SOURCE_BYTES, oversize_policy='sample'):
+    """Analyze a single repository file, from disk or from already-read content"""
+    base_url = base_url or filepath
+    if filepath is None and content is None:
+        return []
+    if kind == 'html':
+        print(f"Analyzing HTML: {base_url}")
+        if content is not None:
+            soup = BeautifulSoup(str(content, 'utf-8', 'ignore'), 'html.parser')
+        else:
+            soup = get_soup_from_file(filepath, max_bytes, oversize_policy)
+        return extract_elements(soup, base_url=base_url) if soup else []
+    print(f"Analyzing JS/JSX: {base_url}")
+    try:
+        if content is not None:
+            return extract_elements_from_jsx(content, base_url=base_url)
+        with open_source_buffer(filepath, max_bytes, oversize_policy) as data:
+            return extract_elements_from_jsx(data, base_url=base_url) if data is not None else []
+    except Exception as e:
+        print(f"Failed to analyze {base_url}: {e}")
+        return []
+
+def _analyze_source_chunk(chunk, max_bytes=DEFAULT_MAX_SOURCE_BYTES, oversize_policy='sample'):
+    """Worker entry point: analyze a chunk of source items"""
+    return [(item.index, analyze_source_file(item.kind, item.path, item.base_url, item.content,
+                                             max_bytes, oversize_policy))
+            for item in chunk]
+
+def balance_chunks_by_size(items, chunk_count):
+    """Split source items into chunks of roughly equal total file size"""
+    sized_items = []
+    for item in items:
+        if item.content is not None:
+            size = len(item.content)
+        else:
+            try:
+                size = os.path.getsize(item.path)
+            except OSError:
+                size = 0
+        sized_items.append((size, item))
+    # Largest files first, each into the currently lightest chunk
+    sized_items.sort(key=lambda sized: -sized[0])
+    chunks = [[] for _ in range(max(1, chunk_count))]
+    loads = [(0, i) for i in range(len(chunks))]
+    for size, item in sized_items:
+        load, i = heapq.heappop(loads)
+        chunks[i].append(item)
+        heapq.heappush(loads, (load + size, i))
+    return [chunk for chunk in chunks if chunk]
+
+def analyze_source_items(items, workers=None, cache=None, repo=None,
+                         max_bytes=DEFAULT_MAX_SOURCE_BYTES, oversize_policy='sample'):
+    """Analyze source items, skipping cached blobs and using a process pool for the rest"""
+    global PLAYWRIGHT_AVAILABLE
+    results = []
+    pending = []
+    for item in items:
+        cached = cache.get(item) if cache else None
+        if cached is not None:
+            results.append((item.index, cached))
+        else:
+            pending.append(item)
+    if repo is not None:
+        # Only blobs that actually need parsing are read from the object database
+        pending = [item._replace(content=read_blob_content(repo, item, max_bytes, oversize_policy))
+                   if item.path is None and item.content is None else item
+                   for item in pending]
+    analyze_chunk = functools.partial(_analyze_source_chunk, max_bytes=max_bytes, oversize_policy=oversize_policy)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pending))
+    if workers <= 1:
+        # Analyzed here rather than in a worker: same restrictions, undone afterwards for this process
+        saved = PLAYWRIGHT_AVAILABLE, website_intelligence.visual_analysis_enabled
+        _disable_worker_side_effects()
+        try:
+            fresh_results = analyze_chunk(pending)
+        finally:
+            PLAYWRIGHT_AVAILABLE, website_intelligence.visual_analysis_enabled = saved
+    else:
+        # Several chunks per worker keeps the pool busy when file sizes are skewed
+        chunks = balance_chunks_by_size(pending, workers * 4)
+        if 'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        else:
+            mp_context = None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                                 initializer=_disable_worker_side_effects) as pool:
+            futures = [(chunk, pool.submit(analyze_chunk, chunk)) for chunk in chunks]
+            fresh_results = []
+            for chunk, future in futures:
+                try:
+                    fresh_results.extend(future.result())
+                except Exception as e:
+                    # One failed chunk costs only its own files
+                    names = ', '.join(str(item.base_url or item.path) for item in chunk)
+                    print(f"Failed to analyze {names}: {e}")
+    if cache:
+        items_by_index = {item.index: item for item in pending}
+        for index, test_cases in fresh_results:
+            cache.put(items_by_index[index], test_cases)
+        print(f"Analysis cache: {cache.hits} unchanged, {len(pending)} analyzed")
+    results.extend(fresh_results)
+    # Deterministic output: HTML files first, then JS/JSX, each in discovery order
+    results.sort(key=lambda result: result[0])
+    all_test_cases = TestCaseSpool()
+    for _, test_cases in results:
+        all_test_cases.extend(test_cases)
+    return all_test_cases
+
+def analyze_source_files(html_files, js_files, workers=None, root=None, blob_shas=None, cache=None,
+                         max_bytes=DEFAULT_MAX_SOURCE_BYTES, oversize_policy='sample'):
+    """Analyze checked-out repository files; paths are reported relative to root when given"""
+    items = []
+    for kind, files in (('html', html_files), ('js', js_files)):
+        for filepath in files:
+            rel_path = os.path.relpath(filepath, root).replace(os.sep, '/') if root else filepath
+            blob_sha = blob_shas.get(rel_path) if blob_shas else None
+            items.append(SourceItem(len(items), kind, filepath, rel_path, blob_sha, None))
+    return analyze_source_items(items, workers=workers, cache=cache,
+                                max_bytes=max_bytes, oversize_policy=oversize_policy)
+
+@traced('repository analysis')
+def analyze_github_repo(repo_url, depth=1, blobless=False, sparse_paths=None, workers=None,
+                        since=None, cache_dir=None, use_cache=True,
+                        max_bytes=DEFAULT_MAX_SOURCE_BYTES, oversize_policy='sample'):
+    temp_dir = tempfile.mkdtemp()
+    settings_key = repo_analysis_settings_key(max_bytes, oversize_policy, website_intelligence.element_caps)
+    cache = RepoAnalysisCache(cache_dir, settings_key=settings_key) if use_cache else None
+    try:
+        if since:
+            # Incremental mode needs history back to the revision but no working tree
+            repo = clone_github_repo(repo_url, temp_dir, depth=0, blobless=True, no_checkout=True)
+            items = collect_changed_source_items(repo, since)
+            print(f"Found {len(items)} HTML/JS/JSX files changed since {since}.")
+            all_test_cases = analyze_source_items(items, workers=workers, cache=cache, repo=repo,
+                                                  max_bytes=max_bytes, oversize_policy=oversize_policy)
+        else:
+            repo = clone_github_repo(repo_url, temp_dir, depth=depth, blobless=blobless, sparse_paths=sparse_paths)
+            source_files = discover_source_files(temp_dir)
+            html_files = source_files['.html']
+            js_files = source_files['.js']
+            jsx_files = source_files['.jsx']
+            print(f"Found {len(html_files)} HTML, {len(js_files)} JS, {len(jsx_files)} JSX files.")
+            blob_shas = get_index_blob_shas(repo) if cache else None
+            all_test_cases = analyze_source_files(html_files, js_files + jsx_files, workers=workers,
+                                                  root=temp_dir, blob_shas=blob_shas, cache=cache,
+                                                  max_bytes=max_bytes, oversize_policy=oversize_policy)
         write_to_excel(all_test_cases)
+        all_test_cases.close()
     finally:
         shutil.rmtree(temp_dir)
 
-def get_soup_from_url_playwright(url, wait_for_selector='form', timeout=10000):
-    """Load a page with Playwright and return BeautifulSoup of the rendered HTML."""
+# Set by BrowserWorkerPool workers to the browser their thread keeps open
+_worker_browser = threading.local()
+DEFAULT_PAGE_WORKERS = 4
+
+@contextmanager
+def shared_browser():
+    """The calling pool worker's browser, or a freshly launched one that is closed on exit
+
+    Callers open their own pages or contexts and close them; the browser itself is left alone.
+    """
+    browser = getattr(_worker_browser, 'browser', None)
+    if browser is not None:
+        yield browser
+        return
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
+        browser = TRACER.wrap(p.chromium, 'chromium').launch(headless=True)
+        try:
+            yield browser
+        finally:
+            browser.close()
+
+class BrowserWorkerPool:
+    """Worker threads that each keep one browser open for all the pages they process
+
+    Playwright's sync API belongs to the thread that started it, so every worker launches its
+    own browser and shared_browser() calls made by a job resolve to it. Each page still gets a
+    fresh context, so cookies and storage don't leak between URLs. Workers start with the
+    first job and run until close().
+    """
+    
+    def __init__(self, workers=DEFAULT_PAGE_WORKERS):
+        self.workers = max(1, workers)
+        self._jobs = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def start(self):
+        """Start the workers (and their browsers) ahead of the first job"""
+        with self._lock:
+            if not self._threads:
+                self._threads = [threading.Thread(target=self._work, name=f'page-worker-{index}', daemon=True)
+                                 for index in range(self.workers)]
+                for thread in self._threads:
+                    thread.start()
+    
+    def submit(self, func, *args):
+        """Run func(*args) on a worker; returns a Future"""
+        self.start()
+        future = Future()
+        self._jobs.put((future, func, args))
+        return future
+    
+    def map(self, func, items, on_result=None):
+        """func(item) for every item, returned in input order (None where the job raised)"""
+        def job(item):
+            try:
+                result = func(item)
+            except Exception as e:
+                print(f"Failed to process {item}: {e}")
+                result = None
+            if on_result:
+                on_result(item, result)
+            return result
+        futures = [self.submit(job, item) for item in items]
+        return [future.result() for future in futures]
+    
+    def close(self):
+        """Let queued jobs finish, then close the workers' browsers"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join()
+    
+    def _work(self):
+        playwright = None
+        if PLAYWRIGHT_AVAILABLE:
+            try:
+                playwright = sync_playwright().start()
+                _worker_browser.browser = TRACER.wrap(playwright.chromium, 'chromium').launch(headless=True)
+            except Exception as e:
+                print(f"Failed to launch a worker browser: {e}")
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                future, func, args = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(func(*args))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            browser = getattr(_worker_browser, 'browser', None)
+            _worker_browser.browser = None
+            try:
+                if browser is not None:
+                    browser.close()
+            finally:
+                if playwright is not None:
+                    playwright.stop()
+
+@traced('render')
+def render_page(url, wait_for_selector='form', timeout=10000, budget=None):
+    """Load a page once with Playwright and keep its HTML, screenshot and DOM geometry (None on failure)"""
+    budget = budget or TimeBudget()
+    with shared_browser() as browser:
         page = browser.new_page()
         try:
-            page.goto(url, timeout=timeout)
+            page.goto(url, timeout=budget.timeout(timeout))
             try:
-                page.wait_for_selector(wait_for_selector, timeout=5000)
+                page.wait_for_selector(wait_for_selector, timeout=budget.timeout(5000))
             except Exception:
                 pass  # If no form appears, just continue
-            html = page.content()
+            return capture_rendered_page(page, url)
         except Exception as e:
             print(f"Playwright failed to load {url}: {e}")
-            html = ""
+            return None
         finally:
-            browser.close()
-    return BeautifulSoup(html, 'html.parser') if html else None
+            page.close()
+
+def get_soup_from_url_playwright(url, wait_for_selector='form', timeout=10000):
+    """Load a page with Playwright and return BeautifulSoup of the rendered HTML."""
+    rendered = render_page(url, wait_for_selector, timeout)
+    return BeautifulSoup(rendered.html, 'html.parser') if rendered and rendered.html else None
+
+def load_page(url, budget=None):
+    """(soup, rendered page) for a URL, rendered with Playwright when available (soup is None on failure)"""
+    if not PLAYWRIGHT_AVAILABLE:
+        return get_soup_from_url(url), None
+    # The screenshot for visual analysis is taken from this same render
+    rendered = render_page(url, budget=budget)
+    with TRACER.span('parse'):
+        soup = BeautifulSoup(rendered.html, 'html.parser') if rendered and rendered.html else None
+    return soup, rendered
+
+def analyze_url(url, username=None, password=None):
+    """Test cases for one website URL under its own page budget (None when the page can't be loaded)"""
+    budget = website_intelligence.new_page_budget()
+    soup, rendered = load_page(url, budget)
+    if not soup:
+        return None
+    return extract_elements(soup, url, username, password, rendered=rendered, budget=budget)
+
+def is_sitemap(source):
+    """Whether a URL or path names a sitemap (.xml, optionally gzipped)"""
+    path = urlparse(source).path if source.startswith('http') else source
+    return path.lower().endswith(('.xml', '.xml.gz'))
+
+def read_sitemap(source, seen=None):
+    """Page URLs listed in a sitemap file or URL, following sitemap indexes"""
+    seen = set() if seen is None else seen
+    if source in seen:
+        return []
+    seen.add(source)
+    try:
+        if source.startswith('http'):
+            with TRACER.span('fetch', target=source):
+                response = requests.get(source, timeout=15)
+                response.raise_for_status()
+            data = response.content
+        else:
+            with open(source, 'rb') as f:
+                data = f.read()
+        if data[:2] == b'\x1f\x8b':
+            data = gzip.decompress(data)
+        root = ElementTree.fromstring(data)
+    except Exception as e:
+        print(f"Failed to read sitemap {source}: {e}")
+        return []
+    # Tags are namespaced ({http://www.sitemaps.org/schemas/sitemap/0.9}loc), so compare local names
+    locs = [node.text.strip() for node in root.iter() if node.tag.rsplit('}', 1)[-1] == 'loc' and node.text]
+    if root.tag.rsplit('}', 1)[-1] != 'sitemapindex':
+        return locs
+    urls = []
+    for loc in locs:
+        urls.extend(read_sitemap(loc, seen))
+    return urls
+
+def read_url_list(path):
+    """URLs from a text file, one per line; blank lines and # comments are skipped"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def batch_urls(source):
+    """Page URLs from a URL list file or sitemap, deduplicated in listed order"""
+    urls = read_sitemap(source) if is_sitemap(source) else read_url_list(source)
+    return list(dict.fromkeys(urls))
+
+# Source URL cells list this many pages, then a count of the rest
+MAX_LISTED_SOURCES = 10
+
+class TestCaseMerger:
+    """Deduplicates test cases page by page; 'Source URL' lists the pages each case came from"""
+    
+    def __init__(self):
+        self.merged = {}
+        # Up to MAX_LISTED_SOURCES page URLs per case, plus a count of the pages beyond them
+        self.sources = {}
+        self.unlisted = defaultdict(int)
+    
+    def add(self, url, test_cases):
+        for tc in test_cases:
+            # Notes carry per-page positions ("Link #3 on page"), so they don't split duplicates
+            key = (tc['Type'], tc['Action'], tc['Element'], tc['Expected Result'], tc['Actual Result'])
+            if key not in self.merged:
+                self.merged[key] = dict(tc)
+                self.sources[key] = {}
+            urls = self.sources[key]
+            if url in urls:
+                continue
+            if len(urls) < MAX_LISTED_SOURCES:
+                urls[url] = None
+            else:
+                self.unlisted[key] += 1
+    
+    def test_cases(self):
+        """The merged cases in first-seen order, with their Source URL filled in"""
+        for key, tc in self.merged.items():
+            tc['Source URL'] = '\n'.join(self.sources[key])
+            if self.unlisted[key]:
+                tc['Source URL'] += f"\n(+{self.unlisted[key]} more)"
+        return list(self.merged.values())
+
+def merge_test_cases(results):
+    """One deduplicated list from (url, test_cases) pairs"""
+    merger = TestCaseMerger()
+    for url, test_cases in results:
+        merger.add(url, test_cases)
+    return merger.test_cases()
+
+def failed_page_test_case(url):
+    """Report row for a page in a batch or crawl that couldn't be loaded"""
+    return {
+        'Type': 'Page',
+        'Action': 'Load page',
+        'Element': url,
+        'Expected Result': 'Page loads and is analyzed',
+        'Actual Result': 'Failed to analyze the website',
+        'Notes': '[Batch]'
+    }
+
+@traced('batch')
+def run_batch(source, username=None, password=None, workers=DEFAULT_PAGE_WORKERS, filename='test_cases.xlsx'):
+    """Analyze every URL of a list file or sitemap on a BrowserWorkerPool and write one merged report"""
+    urls = batch_urls(source)
+    if not urls:
+        print(f"No URLs found in {source}")
+        sys.exit(1)
+    workers = min(workers, len(urls))
+    print(f"Analyzing {len(urls)} URLs with {workers} worker{'s' if workers != 1 else ''}")
+    progress_lock = threading.Lock()
+    done = [0]
+    
+    def progress(url, test_cases):
+        with progress_lock:
+            done[0] += 1
+            status = f"{len(test_cases)} test cases" if test_cases is not None else 'failed'
+            print(f"[{done[0]}/{len(urls)}] {url}: {status}")
+    
+    with BrowserWorkerPool(workers) as pool:
+        results = pool.map(lambda url: analyze_url(url, username, password), urls, on_result=progress)
+    report_visual_throughput()
+    pages = []
+    for url, test_cases in zip(urls, results):
+        if test_cases is None:
+            test_cases = [failed_page_test_case(url)]
+        pages.append((url, test_cases))
+    write_to_excel(merge_test_cases(pages), filename, sources=True)
+
+# Query parameters that only track campaigns or clicks; they never change what a page serves
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'igshid'}
+TRACKING_PARAM_PREFIXES = ('utm_',)
+# Links to these are downloads, not pages worth rendering
+NON_PAGE_EXTENSIONS = ('.pdf', '.zip', '.gz', '.tar', '.rar', '.7z', '.exe', '.dmg', '.jpg', '.jpeg', '.png', '.gif',
+                       '.svg', '.webp', '.ico', '.mp3', '.mp4', '.avi', '.mov', '.css', '.js', '.xml', '.json')
+DEFAULT_CRAWL_PAGES = 50
+DEFAULT_CRAWL_DEPTH = 2
+DEFAULT_CRAWL_RATE = 1.0
+DEFAULT_FRONTIER_SIZE = 100000
+DEFAULT_SEEN_CAPACITY = 2000000
+CRAWLER_USER_AGENT = 'WebsiteTestCaseGenerator'
+
+def remove_dot_segments(path):
+    """URL path with its '.' and '..' segments resolved (RFC 3986, section 5.2.4)"""
+    segments = path.split('/')
+    output = []
+    for index, segment in enumerate(segments):
+        if segment not in ('.', '..'):
+            output.append(segment)
+            continue
+        if segment == '..' and len(output) > 1:
+            output.pop()
+        # A trailing dot segment still names a directory: /a/b/.. is /a/
+        if index == len(segments) - 1:
+            output.append('')
+    return '/'.join(output)
+
+def normalize_url(href, base_url=None):
+    """Canonical form of a link for deduplication, or None when it isn't an http(s) page
+
+    Resolves it against base_url, lowercases scheme and host, drops default ports, fragments,
+    dot segments and tracking parameters, and sorts the remaining query parameters. The result
+    is a key for deduplication only; pages are still fetched at the URL the link gave.
+    """
+    href = (href or '').strip()
+    url = urljoin(base_url, href) if base_url else href
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        return None
+    host = parts.hostname.rstrip('.')
+    if ':' in host:
+        # urlsplit strips the brackets off IPv6 literals
+        host = f'[{host}]'
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, 80 if scheme == 'http' else 443) else f'{host}:{port}'
+    if parts.username or parts.password:
+        netloc = f"{parts.username or ''}{':' + parts.password if parts.password else ''}@{netloc}"
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES))
+    return urlunsplit((scheme, netloc, remove_dot_segments(parts.path) or '/', urlencode(query), ''))
+
+class BloomFilter:
+    """Fixed-size set membership with a bounded false-positive rate and no false negatives
+
+    Memory is set up front from the expected capacity (about 1.8 MB per million URLs at 0.1%);
+    past the capacity the false-positive rate rises instead of memory growing.
+    """
+    
+    def __init__(self, capacity=DEFAULT_SEEN_CAPACITY, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+    
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+    
+    def add(self, item):
+        """Add an item; False when it was (probably) already present"""
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+class CrawlFrontier:
+    """URLs waiting to be crawled, shallowest and highest-scoring first, each offered at most once
+
+    Seen URLs go into a BloomFilter and the queue itself is capped, so memory stays flat no
+    matter how many links the crawl discovers; links past the cap are counted and dropped.
+    """
+    
+    def __init__(self, max_depth=DEFAULT_CRAWL_DEPTH, max_size=DEFAULT_FRONTIER_SIZE, seen_capacity=DEFAULT_SEEN_CAPACITY):
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.seen = BloomFilter(seen_capacity)
+        self.dropped = 0
+        self._heap = []
+        self._sequence = 0
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def add(self, key, depth, score=0, url=None):
+        """Queue url (key itself by default) unless it is too deep or its normalized key was seen before;
+        True when queued"""
+        if depth > self.max_depth or key in self.seen:
+            return False
+        # Checked before marking it seen, so a link dropped now can still be queued once there is room
+        if len(self._heap) >= self.max_size:
+            self.dropped += 1
+            return False
+        self.seen.add(key)
+        heapq.heappush(self._heap, (depth, -score, self._sequence, url or key))
+        self._sequence += 1
+        return True
+    
+    def pop(self):
+        """(url, depth) of the next URL to crawl"""
+        depth, _, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+class TokenBucket:
+    """Allows rate requests per second on average, with bursts of up to burst"""
+    
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be made"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HostRateLimiter:
+    """One TokenBucket per host, so a crawl never hits a single server faster than the rate allows"""
+    
+    def __init__(self, rate=DEFAULT_CRAWL_RATE):
+        self.rate = rate
+        self.buckets = {}
+        self._lock = threading.Lock()
+    
+    def slow_down(self, host, delay):
+        """Honor a Crawl-delay: at most one request every delay seconds for this host"""
+        with self._lock:
+            rate = min(self.rate, 1 / delay) if self.rate else 1 / delay
+            self.buckets[host] = TokenBucket(rate)
+    
+    def acquire(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self.buckets.get(host)
+            if bucket is None and self.rate:
+                bucket = self.buckets[host] = TokenBucket(self.rate)
+        if bucket is not None:
+            bucket.acquire()
+
+class RobotsCache:
+    """robots.txt rules per host, fetched once; hosts whose robots.txt can't be read are allowed"""
+    
+    def __init__(self, user_agent=CRAWLER_USER_AGENT, limiter=None):
+        self.user_agent = user_agent
+        self.limiter = limiter
+        self.parsers = {}
+    
+    def _parser(self, url):
+        parts = urlsplit(url)
+        origin = f'{parts.scheme}://{parts.netloc}'
+        if origin in self.parsers:
+            return self.parsers[origin]
+        parser = RobotFileParser(origin + '/robots.txt')
+        try:
+            with TRACER.span('fetch', target=parser.url):
+                response = requests.get(parser.url, timeout=10, headers={'User-Agent': self.user_agent})
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(response.text.splitlines())
+        except Exception:
+            parser.allow_all = True
+        delay = parser.crawl_delay(self.user_agent)
+        if delay and self.limiter:
+            self.limiter.slow_down(parts.netloc, float(delay))
+        self.parsers[origin] = parser
+        return parser
+    
+    def allowed(self, url):
+        return self._parser(url).can_fetch(self.user_agent, url)
+
+def crawl_links(soup, page_url, scope_host):
+    """(normalized key, resolved URL, score) for each followable in-scope link on a page; navigation links
+    score higher"""
+    links = []
+    for link in soup.find_all('a', href=True):
+        if 'nofollow' in (link.get('rel') or []):
+            continue
+        key = normalize_url(link['href'], page_url)
+        if not key:
+            continue
+        parts = urlsplit(key)
+        if parts.hostname != scope_host or parts.path.lower().endswith(NON_PAGE_EXTENSIONS):
+            continue
+        score = 2 if nearest_ancestor(link, ('nav', 'header')) is not None else 0
+        # Shorter paths tend to be section landing pages
+        score -= parts.path.count('/') / 10
+        links.append((key, urldefrag(urljoin(page_url, link['href'].strip()))[0], score))
+    return links
+
+def crawl_page(url, username, password, limiter, scope_host):
+    """(test cases or None, links to follow) for one crawled page"""
+    limiter.acquire(url)
+    budget = website_intelligence.new_page_budget()
+    soup, rendered = load_page(url, budget)
+    if not soup:
+        return None, []
+    links = crawl_links(soup, url, scope_host)
+    return extract_elements(soup, url, username, password, rendered=rendered, budget=budget), links
+
+@traced('crawl')
+def run_crawl(start_url, username=None, password=None, workers=DEFAULT_PAGE_WORKERS, max_pages=DEFAULT_CRAWL_PAGES,
+              max_depth=DEFAULT_CRAWL_DEPTH, rate=DEFAULT_CRAWL_RATE, respect_robots=True, filename='test_cases.xlsx'):
+    """Crawl a site from start_url on a BrowserWorkerPool and write one merged report"""
+    start_key = normalize_url(start_url)
+    if not start_key:
+        print("Invalid start URL for crawling.")
+        sys.exit(1)
+    scope_host = urlsplit(start_key).hostname
+    frontier = CrawlFrontier(max_depth=max_depth)
+    frontier.add(start_key, 0, url=start_url.strip())
+    limiter = HostRateLimiter(rate)
+    robots = RobotsCache(limiter=limiter) if respect_robots else None
+    merger = TestCaseMerger()
+    crawled = blocked = 0
+    pending = {}
+    with BrowserWorkerPool(workers) as pool:
+        while pending or (frontier and crawled + len(pending) < max_pages):
+            # Keep every worker busy without taking more from the frontier than the page limit allows
+            while frontier and len(pending) < pool.workers and crawled + len(pending) < max_pages:
+                url, depth = frontier.pop()
+                if robots and not robots.allowed(url):
+                    blocked += 1
+                    continue
+                pending[pool.submit(crawl_page, url, username, password, limiter, scope_host)] = (url, depth)
+            if not pending:
+                break
+            done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, depth = pending.pop(future)
+                crawled += 1
+                try:
+                    test_cases, links = future.result()
+                except Exception as e:
+                    print(f"Failed to process {url}: {e}")
+                    test_cases, links = None, []
+                for key, link, score in links:
+                    frontier.add(key, depth + 1, score, url=link)
+                print(f"[{crawled}/{max_pages}] depth {depth} {url}: "
+                      f"{len(test_cases) if test_cases is not None else 'failed'}"
+                      f"{' test cases' if test_cases is not None else ''}, {len(frontier)} queued")
+                merger.add(url, test_cases if test_cases is not None else [failed_page_test_case(url)])
+    report_visual_throughput()
+    test_cases = merger.test_cases()
+    test_cases.append({
+        'Type': 'Crawl',
+        'Action': f'Crawl {scope_host}',
+        'Element': start_url,
+        'Expected Result': f'Pages within depth {max_depth} analyzed, up to {max_pages}',
+        'Actual Result': f'Crawled {crawled} pages; {len(frontier)} still queued; {blocked} blocked by robots.txt; '
+                         f'{frontier.dropped} links over the frontier limit',
+        'Notes': '[Crawl]',
+        'Source URL': start_url
+    })
+    write_to_excel(test_cases, filename, sources=True)
+
+DEFAULT_SERVE_ADDRESS = '127.0.0.1:8765'
+DEFAULT_SERVE_JOBS = 2
+# Jobs waiting beyond this are refused (HTTP 503) rather than queued without bound
+MAX_QUEUED_JOBS = 100
+# Finished jobs (and their results) kept for clients to collect; the oldest are dropped first
+MAX_RETAINED_JOBS = 200
+MAX_JOB_REQUEST_BYTES = 1024 * 1024
+JOB_FORMATS = ('xlsx', 'json')
+
+class JobQueue:
+    """Test-generation jobs run on a warm BrowserWorkerPool, tracked until their results are collected"""
+    
+    def __init__(self, workers=DEFAULT_SERVE_JOBS):
+        self.pool = BrowserWorkerPool(workers)
+        self.jobs = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, spec):
+        """Queue a job from its request body; raises ValueError for a bad spec, OverflowError when full"""
+        url = spec.get('url')
+        if not isinstance(url, str) or not url.startswith('http'):
+            raise ValueError('"url" must be an http(s) URL')
+        output_format = spec.get('format', 'xlsx')
+        if output_format not in JOB_FORMATS:
+            raise ValueError(f'"format" must be one of {", ".join(JOB_FORMATS)}')
+        with self._lock:
+            if sum(job['status'] == 'queued' for job in self.jobs.values()) >= MAX_QUEUED_JOBS:
+                raise OverflowError('Too many queued jobs')
+            job = {
+                'id': uuid.uuid4().hex,
+                'url': url,
+                'format': output_format,
+                'status': 'queued',
+                'error': None,
+                'test_cases': None,
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+                'result': None
+            }
+            self.jobs[job['id']] = job
+            self._evict()
+        self.pool.submit(self._run, job, spec.get('username'), spec.get('password'))
+        return job
+    
+    def _run(self, job, username, password):
+        job['status'] = 'running'
+        job['started'] = time.time()
+        try:
+            test_cases = analyze_url(job['url'], username, password)
+            if test_cases is None:
+                raise RuntimeError('Failed to analyze the website.')
+            job['test_cases'] = len(test_cases)
+            job['result'] = self._render(test_cases, job['format'])
+            job['status'] = 'done'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['finished'] = time.time()
+    
+    def _render(self, test_cases, output_format):
+        if output_format == 'json':
+            return json.dumps(list(test_cases)).encode('utf-8')
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            write_to_excel(test_cases, path)
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(path)
+    
+    def _evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in ('done', 'failed')]
+        for job_id in finished[:max(0, len(self.jobs) - MAX_RETAINED_JOBS)]:
+            del self.jobs[job_id]
+    
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def status(self, job):
+        """The job as reported to clients (no credentials, no result body)"""
+        return {key: job[key] for key in ('id', 'url', 'format', 'status', 'error', 'test_cases',
+                                          'created', 'started', 'finished')}
+    
+    def health(self):
+        with self._lock:
+            counts = defaultdict(int)
+            for job in self.jobs.values():
+                counts[job['status']] += 1
+        return {'status': 'ok', 'workers': self.pool.workers, 'jobs': dict(counts)}
+    
+    def close(self):
+        self.pool.close()
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """JSON job API: POST /jobs, GET /jobs/<id>, GET /jobs/<id>/result, GET /health"""
+    
+    server_version = 'WebsiteTestCaseGenerator'
+    
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else 'unix'
+    
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            return self.send_json(404, {'error': 'Not found'})
+        try:
+            # A malformed or negative Content-Length is a bad request, not a handler crash
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                raise ValueError('Invalid Content-Length')
+            if length > MAX_JOB_REQUEST_BYTES:
+                return self.send_json(413, {'error': 'Request too large'})
+            spec = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(spec, dict):
+                raise ValueError('Expected a JSON object')
+            job = self.server.jobs.submit(spec)
+        except OverflowError as e:
+            return self.send_json(503, {'error': str(e)})
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        self.send_json(202, self.server.jobs.status(job))
+    
+    def do_GET(self):
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        if parts == ['health']:
+            return self.send_json(200, self.server.jobs.health())
+        if len(parts) not in (2, 3) or parts[0] != 'jobs' or (len(parts) == 3 and parts[2] != 'result'):
+            return self.send_json(404, {'error': 'Not found'})
+        job = self.server.jobs.get(parts[1])
+        if job is None:
+            return self.send_json(404, {'error': 'Unknown job'})
+        if len(parts) == 2:
+            return self.send_json(200, self.server.jobs.status(job))
+        if job['status'] != 'done':
+            return self.send_json(409, self.server.jobs.status(job))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json' if job['format'] == 'json' else
+                         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.send_header('Content-Length', str(len(job['result'])))
+        self.end_headers()
+        self.wfile.write(job['result'])
+
+class UnixJobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def make_job_server(address, jobs):
+    """HTTP server for the job API on 'host:port' or 'unix:/path/to/socket'"""
+    if address.startswith('unix:'):
+        path = address[len('unix:'):]
+        if os.path.exists(path):
+            os.remove(path)  # left behind by a previous server
+        server = UnixJobServer(path, JobRequestHandler)
+        # Jobs can carry login credentials: only the owner may connect
+        os.chmod(path, 0o600)
+    else:
+        host, _, port = address.rpartition(':')
+        server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), JobRequestHandler)
+    server.jobs = jobs
+    return server
+
+def serve(address=DEFAULT_SERVE_ADDRESS, workers=DEFAULT_SERVE_JOBS):
+    """Run the job API until interrupted, keeping models and browsers warm between jobs"""
+    jobs = JobQueue(workers)
+    # A daemon has no overall deadline; each job still gets its page budget
+    website_intelligence.run_budget = TimeBudget()
+    jobs.pool.start()
+    if website_intelligence.active_visual_mode() == 'yolo':
+        # Load the detector before taking jobs, so the first one does not pay for it
+        try:
+            website_intelligence.vision_model()
+        except Exception:
+            pass  # reported by vision_model, which also turns visual analysis off
+    server = make_job_server(address, jobs)
+    print(f"Serving test case jobs on {address} with {workers} worker{'s' if workers != 1 else ''}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.close()
+        if address.startswith('unix:') and os.path.exists(address[len('unix:'):]):
+            os.remove(address[len('unix:'):])
+
+def element_cap(value):
+    """argparse type for --element-cap CATEGORY=N"""
+    category, _, limit = value.partition('=')
+    if category not in DEFAULT_ELEMENT_CAPS or not limit.isdigit():
+        raise argparse.ArgumentTypeError(
+            f"expected CATEGORY=N with CATEGORY one of {', '.join(DEFAULT_ELEMENT_CAPS)}, got {value!r}")
+    return category, int(limit)
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Website Test Case Generator')
-    parser.add_argument('url', help='Website URL or GitHub Repo')
+    parser.add_argument('url', nargs='?', help='Website URL, GitHub repo, file of URLs (one per line) or sitemap.xml')
     parser.add_argument('--username', help='Username for login forms', default=None)
     parser.add_argument('--password', help='Password for login forms', default=None)
-    return parser.parse_args()
+    parser.add_argument('--save-screenshots', metavar='DIR', default=None,
+                        help='Persist captured screenshots to DIR (kept in memory otherwise)')
+    parser.add_argument('--visual-mode', choices=VISUAL_MODES, default='yolo',
+                        help='Visual layer: YOLO on screenshots, rendered DOM geometry (no model), or off')
+    parser.add_argument('--baseline', metavar='PATH', default=None,
+                        help='Compare captures with a baseline PNG, or with screenshot_<page>.png files in a directory')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Write the new captures to the baseline location after comparing')
+    parser.add_argument('--vision-backend', choices=VISION_BACKENDS, default='torch',
+                        help='Inference backend for YOLO visual analysis (onnx/openvino export the model once)')
+    parser.add_argument('--vision-imgsz', type=int, default=DEFAULT_VISION_IMGSZ, metavar='PX',
+                        help='Model input size; smaller is faster but misses small elements')
+    parser.add_argument('--vision-threads', type=int, default=None, help='CPU threads for vision inference')
+    parser.add_argument('--vision-int8', action='store_true', help='Use an int8-quantized model (onnx/openvino)')
+    parser.add_argument('--visual-tile-height', type=int, default=None, metavar='PX',
+                        help='Tile height for visual analysis of tall pages (default: page width)')
+    parser.add_argument('--visual-batch-size', type=int, default=8, help='Screenshot tiles per inference batch')
+    parser.add_argument('--depth', type=int, default=1, help='Clone depth for repository analysis (0 for full history)')
+    parser.add_argument('--blobless', action='store_true', help='Use a blobless partial clone for repository analysis')
+    parser.add_argument('--sparse', action='append', default=None, metavar='PATH',
+                        help='Only check out this repository path (repeatable)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes for repository file analysis (default: CPU count, 1 disables the pool)')
+    parser.add_argument('--since', metavar='REV', default=None,
+                        help='Only analyze repository files changed between REV and HEAD')
+    parser.add_argument('--cache-dir', default=None, help=f'Cache directory (default: {CACHE_ROOT})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore cached repository results, screenshot tiles and saved login sessions')
+    parser.add_argument('--reuse-sessions', action='store_true',
+                        help='Reuse saved login sessions instead of submitting login forms each run')
+    parser.add_argument('--session-ttl', type=float, default=DEFAULT_AUTH_SESSION_TTL / 60, metavar='MINUTES',
+                        help='How long a saved login session is reused before logging in again (with --reuse-sessions)')
+    parser.add_argument('--visual-cache-size', type=float, default=DEFAULT_VISUAL_CACHE_MB, metavar='MB',
+                        help='Size limit of the visual result cache')
+    parser.add_argument('--visual-cache-entries', type=int, default=DEFAULT_VISUAL_CACHE_ENTRIES,
+                        help='Maximum number of cached screenshot tiles')
+    parser.add_argument('--max-file-size', type=float, default=DEFAULT_MAX_SOURCE_BYTES / (1024 * 1024), metavar='MB',
+                        help='Size above which repository files are sampled or skipped (0 for no limit)')
+    parser.add_argument('--oversize-policy', choices=OVERSIZE_POLICIES, default='sample',
+                        help='Analyze only the head of oversized files, or skip them')
+    parser.add_argument('--page-budget', type=float, default=DEFAULT_PAGE_BUDGET, metavar='SECONDS',
+                        help='Time allowed per page; work still pending after it is reported as skipped')
+    parser.add_argument('--run-budget', type=float, default=None, metavar='SECONDS',
+                        help='Time allowed for the whole run (default: no limit)')
+    parser.add_argument('--trace', metavar='PATH', default=None,
+                        help='Record per-phase and Playwright spans and write them as Chrome trace-event JSON')
+    parser.add_argument('--trace-summary', action='store_true',
+                        help='Record spans and print a per-phase summary of time and counts')
+    parser.add_argument('--memory-profile', action='store_true',
+                        help='Snapshot tracemalloc and RSS at phase boundaries and report peaks and top allocation sites')
+    parser.add_argument('--memory-top', type=int, default=5, metavar='N', help='Allocation sites reported per phase')
+    parser.add_argument('--memory-limit', type=float, default=None, metavar='MB',
+                        help='Soft RSS ceiling; above it test cases spill to disk and workbooks are streamed')
+    parser.add_argument('--page-workers', type=int, default=DEFAULT_PAGE_WORKERS,
+                        help='Browsers working through a URL list or sitemap in parallel')
+    parser.add_argument('--serve', nargs='?', const=DEFAULT_SERVE_ADDRESS, default=None, metavar='ADDRESS',
+                        help='Run as a daemon taking jobs over HTTP on HOST:PORT or unix:/path/to/socket '
+                             f'(default: {DEFAULT_SERVE_ADDRESS}); see tcgen_client.py')
+    parser.add_argument('--serve-jobs', type=int, default=DEFAULT_SERVE_JOBS,
+                        help='Jobs the daemon runs at once, each on its own warm browser')
+    parser.add_argument('--crawl', action='store_true',
+                        help='Crawl the site from the given URL and analyze every page found (same host only)')
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_CRAWL_PAGES, help='Pages analyzed by --crawl')
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_CRAWL_DEPTH, help='Link depth followed by --crawl')
+    parser.add_argument('--crawl-rate', type=float, default=DEFAULT_CRAWL_RATE, metavar='PER_SECOND',
+                        help='Page loads per second per host while crawling (0 for no limit)')
+    parser.add_argument('--ignore-robots', action='store_true', help='Crawl paths that robots.txt disallows')
+    parser.add_argument('--element-cap', type=element_cap, action='append', default=[], metavar='CATEGORY=N',
+                        help='Analyze at most N elements of a category, sampled across kinds and page regions '
+                             f"(repeatable, 0 for no limit; categories: {', '.join(DEFAULT_ELEMENT_CAPS)})")
+    args = parser.parse_args()
+    if not args.url and not args.serve:
+        parser.error('a URL is required unless --serve is given')
+    return args
 
 def run_ddt_logins(url, login_excel='test_logins.xlsx', output_excel='test_cases_ddt.xlsx'):
     wb = openpyxl.load_workbook(login_excel)
     ws = wb.active
-    results = []
+    # Every login's cases are kept until the end; past the memory ceiling they move to disk
+    results = TestCaseSpool()
     for row in ws.iter_rows(min_row=2, values_only=True):
         username, password = row
+        budget = website_intelligence.new_page_budget()
+        if budget.expired():
+            results.append({'Username': username, 'Password': password, **skipped_test_case('Login', 'Log in', url)})
+            continue
+        rendered = None
         if PLAYWRIGHT_AVAILABLE:
-            soup = get_soup_from_url_playwright(url)
+            rendered = render_page(url, budget=budget)
+            with TRACER.span('parse'):
+                soup = BeautifulSoup(rendered.html, 'html.parser') if rendered and rendered.html else None
         else:
             soup = get_soup_from_url(url)
         if not soup:
             results.append({'Username': username, 'Password': password, 'Type': '', 'Action': '', 'Element': '', 'Expected Result': '', 'Actual Result': 'Failed to load page', 'Notes': ''})
             continue
-        test_cases = extract_elements(soup, url, username, password)
+        test_cases = extract_elements(soup, url, username, password, rendered=rendered, budget=budget)
         for tc in test_cases:
             tc['Username'] = username
             tc['Password'] = password
             results.append(tc)
     # Write results to Excel with color coding
     from openpyxl.styles import PatternFill, Font
-    wb_out = openpyxl.Workbook()
-    ws_out = wb_out.active
+    wb_out, ws_out, streaming = open_output_sheet('Sheet', results)
     headers = ['Username', 'Password', 'Test Case ID', 'Type', 'Action', 'Element', 'Expected Result', 'Actual Result', 'Notes']
-    ws_out.append(headers)
     # Define color fills
     header_fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
     fill1 = PatternFill(start_color='DCE6F1', end_color='DCE6F1', fill_type='solid')
@@ -2277,11 +5993,8 @@ def run_ddt_logins(url, login_excel='test_logins.xlsx', output_excel='test_cases
     header_font = Font(bold=True, color='FFFFFF', size=14)
     data_font = Font(size=14)
     error_font = Font(size=14, color='FFFFFF', bold=True)
-    # Apply header fill and font
-    for col in range(1, len(headers) + 1):
-        cell = ws_out.cell(row=1, column=col)
-        cell.fill = header_fill
-        cell.font = header_font
+    # Header row
+    append_styled_row(ws_out, headers, header_fill, header_font, streaming)
     # Data rows
     for idx, tc in enumerate(results, 1):
         row = [
@@ -2295,7 +6008,6 @@ def run_ddt_logins(url, login_excel='test_logins.xlsx', output_excel='test_cases
             tc.get('Actual Result', ''),
             tc.get('Notes', '')
         ]
-        ws_out.append(row)
         # Error highlighting
         actual_result = str(tc.get('Actual Result', '')).lower()
         is_error = (
@@ -2306,42 +6018,85 @@ def run_ddt_logins(url, login_excel='test_logins.xlsx', output_excel='test_cases
         )
         fill = error_fill if is_error else fills[(idx - 1) % len(fills)]
         font = error_font if is_error else data_font
-        for col in range(1, len(headers) + 1):
-            cell = ws_out.cell(row=idx+1, column=col)
-            cell.fill = fill
-            cell.font = font
+        append_styled_row(ws_out, row, fill, font, streaming)
     wb_out.save(output_excel)
+    results.close()
     print(f"DDT login test cases written to {output_excel}")
 
-def main():
-    args = parse_args()
+def run(args):
+    """Generate test cases for the URL or repository given on the command line"""
     arg = args.url
     username = args.username
     password = args.password
-    if arg.startswith('http') and 'github.com' in arg:
-        analyze_github_repo(arg)
+    website_intelligence.screenshot_dir = args.save_screenshots
+    website_intelligence.visual_mode = args.visual_mode
+    if args.visual_mode == 'yolo':
+        website_intelligence.configure_vision_backend(args.vision_backend, args.vision_imgsz,
+                                                      args.vision_threads, args.vision_int8)
+    website_intelligence.baseline = args.baseline
+    website_intelligence.update_baseline = args.update_baseline
+    website_intelligence.visual_tile_height = args.visual_tile_height
+    website_intelligence.visual_batch_size = args.visual_batch_size
+    website_intelligence.run_budget = TimeBudget(args.run_budget)
+    website_intelligence.page_budget = args.page_budget
+    website_intelligence.element_caps.update(args.element_cap)
+    if args.reuse_sessions and not args.no_cache:
+        website_intelligence.auth_sessions = AuthSessionCache(args.cache_dir, ttl=args.session_ttl * 60)
+    if not args.no_cache:
+        website_intelligence.visual_cache = VisualResultCache(args.cache_dir, max_entries=args.visual_cache_entries,
+                                                              max_mb=args.visual_cache_size)
+    if args.serve:
+        serve(args.serve, workers=args.serve_jobs)
+    elif args.crawl and arg.startswith('http'):
+        run_crawl(arg, username, password, workers=args.page_workers, max_pages=args.max_pages,
+                  max_depth=args.max_depth, rate=args.crawl_rate, respect_robots=not args.ignore_robots)
+    elif os.path.isfile(arg) or (arg.startswith('http') and 'github.com' not in arg and is_sitemap(arg)):
+        run_batch(arg, username, password, workers=args.page_workers)
+    elif (arg.startswith('http') and 'github.com' in arg) or arg.startswith('file://'):
+        analyze_github_repo(arg, depth=args.depth, blobless=args.blobless, sparse_paths=args.sparse,
+                            workers=args.workers, since=args.since, cache_dir=args.cache_dir,
+                            use_cache=not args.no_cache, max_bytes=int(args.max_file_size * 1024 * 1024),
+                            oversize_policy=args.oversize_policy)
     elif arg.startswith('http'):
         if username == 'DDT' and password == 'DDT':
             run_ddt_logins(arg)
             return
-        if PLAYWRIGHT_AVAILABLE:
-            soup = get_soup_from_url_playwright(arg)
-        else:
-            soup = get_soup_from_url(arg)
-        if not soup:
+        test_cases = analyze_url(arg, username, password)
+        if test_cases is None:
             print("Failed to analyze the website.")
             sys.exit(1)
-        test_cases = extract_elements(soup, arg, username, password)
         write_to_excel(test_cases)
     else:
         print("Invalid argument. Please provide a website URL or GitHub repo URL.")
         sys.exit(1)
 
+def main():
+    args = parse_args()
+    if args.memory_limit:
+        MEMORY.ceiling = int(args.memory_limit * 1024 * 1024)
+    if args.memory_profile:
+        # Memory is sampled at the boundaries of the tracer's phase spans
+        MEMORY.start(top=args.memory_top)
+    if args.trace or args.trace_summary or args.memory_profile:
+        TRACER.enable()
+    try:
+        run(args)
+    finally:
+        if args.trace or args.trace_summary:
+            print(TRACER.format_summary())
+            if args.trace:
+                TRACER.write_chrome_trace(args.trace)
+                print(f"Trace written to {args.trace}")
+        if MEMORY.enabled:
+            print(MEMORY.format_report())
+
 def get_soup_from_url(url):
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return BeautifulSoup(response.text, 'html.parser')
+        with TRACER.span('fetch', target=url):
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+        with TRACER.span('parse'):
+            return BeautifulSoup(response.text, 'html.parser')
     except Exception as e:
         print(f"Failed to fetch {url}: {e}")
         return None